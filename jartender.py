@@ -1,34 +1,115 @@
 import os
 import sys
 import json
+import argparse
 from pathlib import Path
 
-class BColors:
-    HEADER = '\033[95m'
-    OKBLUE = '\033[94m'
-    OKCYAN = '\033[96m'
-    OKGREEN = '\033[38;2;120;200;120m'
-    LOGOYELLOW = '\033[38;2;200;180;100m'
-    WARNING = '\033[93m'
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-
-from modules import (
-    Manifester,
-    Contractor,
-    Serverlistinitializer,
-    Lister,
-    ServerLauncher,
-    AboutJartender,
-    Settings,
-    ServerInstaller,
-)
-from modules.java import javamgr
+from modules.Colors import BColors
+from modules import Settings
 # 读取服务器 EULA 初始化列表 列出 服务器启动 关于 设置 安装
+# 其余模块（requests、tabulate 等较重的依赖）在菜单或子命令真正用到时才导入，
+# 启动耗时可用 python jartender.py bench-startup 检查。
+
+
+def parse_args(argv=None):
+    """命令行参数；不带子命令时进入交互菜单"""
+    parser = argparse.ArgumentParser(description="Jartender - A Simple Minecraft Server Manager")
+    subparsers = parser.add_subparsers(dest="command")
+
+    scan_parser = subparsers.add_parser("scan", help="扫描并更新服务器列表")
+    scan_parser.add_argument("--force", action="store_true", help="忽略缓存，重新探测所有核心")
+    scan_parser.add_argument("--unattended", action="store_true", help="无人值守：多个核心时自动选择，不等待输入")
+    scan_parser.add_argument("--summary", metavar="FILE", help="将扫描摘要以 JSON 写入文件（- 表示标准输出，此时进度信息写到标准错误）")
+
+    watch_parser = subparsers.add_parser("watch", help="监视服务器目录，增量更新服务器列表")
+    watch_parser.add_argument("--interval", type=float, default=5.0, help="轮询间隔（秒），仅轮询模式使用")
+    watch_parser.add_argument("--poll", action="store_true", help="不使用 inotify，强制定时轮询")
+
+    registry_parser = subparsers.add_parser("registry", help="在服务器注册表与 list.json 之间导入/导出")
+    registry_parser.add_argument("action", choices=["import", "export"])
+    registry_parser.add_argument("--file", default=None, help="JSON 文件路径，默认 list.json")
+
+    start_parser = subparsers.add_parser("start", help="在后台启动服务器")
+    start_parser.add_argument("server", help="服务器名称（服务器文件夹名）")
+    start_parser.add_argument("--gui", action="store_true", help="以 GUI 模式启动")
+
+    stop_parser = subparsers.add_parser("stop", help="停止后台运行的服务器")
+    stop_parser.add_argument("server", nargs="?", help="服务器名称（服务器文件夹名）")
+    stop_parser.add_argument("--all", action="store_true", help="并行停止所有正在运行的服务器")
+
+    console_parser = subparsers.add_parser("console", help="连接后台服务器的控制台")
+    console_parser.add_argument("server", help="服务器名称（服务器文件夹名）")
+
+    jvm_parser = subparsers.add_parser("jvm", help="查看或设置服务器的 JVM 参数方案")
+    jvm_parser.add_argument("server", help="服务器名称（服务器文件夹名）")
+    jvm_parser.add_argument("--profile", help="方案名：aikar / zgc / minimal / default")
+    jvm_parser.add_argument("--heap", type=int, default=None, help="固定堆大小（MiB），0 表示自动推算")
+
+    java_parser = subparsers.add_parser("java", help="查看或指定服务器使用的 Java")
+    java_parser.add_argument("server", help="服务器名称（服务器文件夹名）")
+    java_group = java_parser.add_mutually_exclusive_group()
+    java_group.add_argument("--set", metavar="PATH", help="手动指定 Java 可执行文件")
+    java_group.add_argument("--auto", action="store_true", help="清除手动指定，按 Minecraft 版本自动选择")
+
+    supervise_parser = subparsers.add_parser("supervise", help="在前台守护所有受管服务器，崩溃时自动重启")
+    supervise_parser.add_argument("--interval", type=float, default=1.0, help="检查间隔（秒）")
+
+    profile_parser = subparsers.add_parser("profile", help="用 jcmd 线程转储对服务器做采样分析，输出热点帧与 collapsed stack")
+    profile_parser.add_argument("name", help="服务器名称")
+    profile_parser.add_argument("--duration", type=float, default=30.0, help="采样时长（秒）")
+    profile_parser.add_argument("--interval", type=float, default=0.5, help="采样间隔（秒）")
+    profile_parser.add_argument("--top", type=int, default=20, help="报告中显示的帧数")
+    profile_parser.add_argument("--all-states", action="store_true", help="工作线程也计入非 RUNNABLE 状态")
+    profile_parser.add_argument("--output", default=None, help="collapsed stack 输出路径")
+
+    metrics_parser = subparsers.add_parser("metrics", help="在前台运行 Prometheus 指标端点")
+    metrics_parser.add_argument("--host", default=None, help="监听地址，默认 127.0.0.1")
+    metrics_parser.add_argument("--port", type=int, default=None, help="监听端口，默认取 config.json 的 metrics.port")
+    metrics_parser.add_argument("--interval", type=float, default=None, help="汇总间隔（秒）")
+
+    ping_parser = subparsers.add_parser("ping", help="通过 Server List Ping 查询服务器在线状态与人数")
+    ping_parser.add_argument("names", nargs="*", help="服务器名称，默认查询注册表中的全部服务器")
+    ping_parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+
+    rcon_parser = subparsers.add_parser("rcon", help="通过 RCON 向多个服务器并发发送命令")
+    rcon_parser.add_argument("names", nargs="*", help="服务器名称，默认全部启用了 RCON 的服务器")
+    rcon_parser.add_argument("-c", "--cmd", dest="commands", action="append", help="要发送的命令，可重复；不指定时逐行读取输入")
+
+    lag_parser = subparsers.add_parser("lag", help="查看服务器的卡顿统计（Can't keep up、看门狗、TPS）")
+    lag_parser.add_argument("name", nargs="?", help="服务器名称，默认全部受管服务器")
+
+    top_parser = subparsers.add_parser("top", help="查看运行中服务器的 CPU、内存、线程与磁盘读写")
+    top_parser.add_argument("--interval", type=float, default=2.0, help="刷新间隔（秒）")
+    top_parser.add_argument("--once", action="store_true", help="只输出一次")
+    top_parser.add_argument("--history", metavar="NAME", help="显示某个服务器的近期样本")
+
+    status_parser = subparsers.add_parser("status", help="查看受管服务器的状态")
+    status_parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+
+    cds_parser = subparsers.add_parser("cds", help="查看或清除服务器的 AppCDS 归档")
+    cds_parser.add_argument("name", help="服务器名称")
+    cds_parser.add_argument("--clear", action="store_true", help="删除归档，下次启动时重新生成")
+
+    boot_parser = subparsers.add_parser("bench", help="在服务器副本中测量启动耗时，比较 JVM 方案与 Java 运行时")
+    boot_parser.add_argument("name", help="服务器名称")
+    boot_parser.add_argument("--runs", type=int, default=3, help="每种组合的启动次数")
+    boot_parser.add_argument("--profile", action="append", help="JVM 方案，可重复指定；默认为服务器当前方案")
+    boot_parser.add_argument("--java", action="append", help="Java 路径或 auto，可重复指定；默认 auto")
+    boot_parser.add_argument("--heap", type=int, default=None, help="堆大小（MB）")
+    boot_parser.add_argument("--fresh", action="store_true", help="每次启动前重新复制服务器")
+    boot_parser.add_argument("--timeout", type=float, default=300.0, help="单次启动超时（秒）")
+    boot_parser.add_argument("--threshold", type=float, default=0.10, help="判定回归的中位数增幅")
+    boot_parser.add_argument("--history", action="store_true", help="只显示历史报告，不运行")
+
+    bench_parser = subparsers.add_parser("bench-startup", help="测量 Jartender 启动耗时，超出预算时返回非零")
+    bench_parser.add_argument("--runs", type=int, default=5, help="重复次数，取中位数")
+    bench_parser.add_argument("--budget-ms", type=float, default=None, help="导入耗时预算（毫秒）")
+
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
+    args = parse_args()
     # 基本变量初始化
     current_dir = Path(__file__).parent
     modules_dir = current_dir / "modules"
@@ -57,7 +138,194 @@ if __name__ == "__main__":
             if not config_exists:
                 Settings.save_config({"serverpath": str(Settings.DEFAULT_SERVERS_DIR)})
 
-    initialize()
+    if args.command == "bench-startup":
+        from modules import Startupbench
+        budget_ms = args.budget_ms if args.budget_ms is not None else Startupbench.DEFAULT_BUDGET_MS
+        sys.exit(0 if Startupbench.run(args.runs, budget_ms) else 1)
+
+    if args.command is None:
+        initialize()
+    else:
+        # 子命令可能由 cron / 服务调用，不能在首次启动时询问目录
+        Settings.ensure_bootstrap_files()
+
+    if args.command == "scan":
+        from modules import Serverlistinitializer
+        if args.summary == "-":
+            # 标准输出只留给 JSON 摘要，进度信息改写到标准错误
+            from contextlib import redirect_stdout
+            with redirect_stdout(sys.stderr):
+                summary = Serverlistinitializer.initialize(force=args.force, unattended=args.unattended)
+        else:
+            summary = Serverlistinitializer.initialize(force=args.force, unattended=args.unattended)
+        if args.summary == "-":
+            print(json.dumps(summary, indent=4, ensure_ascii=False))
+        elif args.summary:
+            Path(args.summary).write_text(json.dumps(summary, indent=4, ensure_ascii=False), encoding="utf-8")
+        sys.exit(1 if summary["ambiguous"] or summary["errors"] else 0)
+    elif args.command == "registry":
+        from modules import Registry
+        list_path = Path(args.file) if args.file else Settings.LIST_PATH
+        if args.action == "import":
+            print(f"已导入 {Registry.import_json(list_path)} 个服务器")
+        else:
+            Registry.export_json(list_path)
+            print(f"已导出到 {list_path}")
+        sys.exit(0)
+    elif args.command == "watch":
+        from modules import Watcher
+        Watcher.watch(interval=args.interval, use_inotify=not args.poll)
+        sys.exit(0)
+    elif args.command == "start":
+        from modules import ServerLauncher
+        managed = ServerLauncher.launch(args.server, Settings.server_root(), args.gui)
+        sys.exit(0 if managed else 1)
+    elif args.command == "stop":
+        from modules import ServerLauncher
+        if args.all:
+            sys.exit(0 if ServerLauncher.stop_all() else 1)
+        if not args.server:
+            print("请指定服务器名称，或使用 --all")
+            sys.exit(2)
+        sys.exit(0 if ServerLauncher.stop(args.server) else 1)
+    elif args.command == "console":
+        from modules import Console
+        sys.exit(0 if Console.attach(args.server) else 1)
+    elif args.command == "jvm":
+        from modules import JvmProfiles, Registry
+        try:
+            if (args.profile is not None or args.heap is not None) and not JvmProfiles.configure(args.server, args.profile, args.heap):
+                print(f"❌ 找不到名为 '{args.server}' 的服务器！")
+                sys.exit(1)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        server = Registry.get_server(args.server)
+        if server is None:
+            print(f"❌ 找不到名为 '{args.server}' 的服务器！")
+            sys.exit(1)
+        jvm = JvmProfiles.resolve(server)
+        print(f"方案: {jvm['profile']}，堆大小: {jvm['heap_mb']} MiB")
+        print(" ".join(jvm["args"]))
+        sys.exit(0)
+    elif args.command == "java":
+        from modules import Registry
+        from modules.java import javaselector
+        try:
+            if (args.set or args.auto) and not javaselector.set_override(args.server, args.set):
+                print(f"❌ 找不到名为 '{args.server}' 的服务器！")
+                sys.exit(1)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        server = Registry.get_server(args.server)
+        if server is None:
+            print(f"❌ 找不到名为 '{args.server}' 的服务器！")
+            sys.exit(1)
+        java = javaselector.select_java(server)
+        required = f"，需要 Java {java['required']}+" if java["required"] else ""
+        print(f"{java['path']}（{java['reason']}{required}）")
+        sys.exit(0)
+    elif args.command == "supervise":
+        from modules import Supervisor, Sampler, LagAnalyzer
+        try:
+            Supervisor.get_supervisor().acquire_supervise_lock()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print("🛡️ 正在守护受管服务器，按 Ctrl+C 退出（服务器继续运行）")
+        # 资源样本写入 run/<服务器>/resources.json，卡顿统计写入 lag.json，供 status / top / lag / 菜单读取
+        Sampler.get_sampler().start()
+        LagAnalyzer.start_monitor(lambda status: print(f"⚠️ {status['server_name']} 持续过载: {status['reason']}"))
+        if Settings.metrics_settings()["enabled"]:
+            from modules import Metrics
+            Metrics.serve()
+        try:
+            Supervisor.get_supervisor().supervise(args.interval)
+        except KeyboardInterrupt:
+            print("已停止守护。")
+        sys.exit(0)
+    elif args.command == "cds":
+        from modules import AppCDS
+        if args.clear:
+            print(f"🗑️ 已删除 {AppCDS.invalidate(args.name)} 个归档")
+        else:
+            AppCDS.print_archives(args.name)
+        sys.exit(0)
+    elif args.command == "bench":
+        from modules import Bootbench
+        if not args.history:
+            try:
+                Bootbench.benchmark(args.name, args.runs, args.profile, args.java, args.heap,
+                                    args.fresh, args.timeout)
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+        sys.exit(0 if Bootbench.print_report(args.name, args.threshold) else 1)
+    elif args.command == "profile":
+        from modules import ThreadProfiler
+        path = ThreadProfiler.profile(args.name, args.duration, args.interval, args.top,
+                                      args.all_states, args.output)
+        sys.exit(0 if path else 1)
+    elif args.command == "metrics":
+        from modules import Metrics
+        try:
+            Metrics.serve(args.host, args.port, args.interval, background=False)
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print(f"❌ 无法启动指标端点: {e}")
+            sys.exit(1)
+        sys.exit(0)
+    elif args.command == "ping":
+        from modules import Pinger
+        rows = Pinger.refresh(args.names or None)
+        if args.json:
+            print(json.dumps(rows, indent=4, ensure_ascii=False))
+        else:
+            Pinger.print_rows(rows)
+        sys.exit(0)
+    elif args.command == "rcon":
+        import asyncio
+        from modules import Rcon
+        if not args.commands:
+            Rcon.interactive(args.names or None)
+            sys.exit(0)
+        entries, skipped = Rcon.targets(args.names or None)
+        if skipped:
+            print(f"⚠️ 未启用 RCON，已跳过: {', '.join(skipped)}")
+        failed = False
+        for command, results in zip(args.commands, asyncio.run(Rcon.run_commands(entries, args.commands))):
+            print(f"> {command}")
+            Rcon.print_results(results)
+            failed = failed or not all(result["ok"] for result in results)
+        sys.exit(1 if failed else 0)
+    elif args.command == "lag":
+        from modules import Supervisor, LagAnalyzer
+        names = [args.name] if args.name else [row["server_name"] for row in Supervisor.get_supervisor().status()]
+        if not names:
+            print("当前没有受管的服务器。")
+        LagAnalyzer.print_report(names)
+        sys.exit(0)
+    elif args.command == "top":
+        from modules import Sampler
+        try:
+            if args.history:
+                Sampler.print_history(args.history)
+            elif args.once:
+                Sampler.print_table(Sampler.collect(args.interval))
+            else:
+                Sampler.top(args.interval)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    elif args.command == "status":
+        from modules import Supervisor
+        if args.json:
+            print(json.dumps(Supervisor.get_supervisor().status(), indent=4, ensure_ascii=False))
+        else:
+            Supervisor.print_status()
+        sys.exit(0)
 
 
     def gradient_yellow_rgb(text, offset):
@@ -92,6 +360,7 @@ if __name__ == "__main__":
         print(BColors.WARNING + "⚠️服务器列表为空。您需要初始化服务器列表。")
         ifinitserver = input("初始化服务器列表？(Y/n)")
         if ifinitserver == "Y":
+            from modules import Serverlistinitializer
             Serverlistinitializer.initialize()
         elif ifinitserver == "n":
             print("您跳过了服务器列表初始化。您可以稍后手动进行初始化。")
@@ -129,26 +398,51 @@ def start_server_menu(current_server):
     print("1. 选择服务器核心")
     print("2. 直接启动服务器")
     print("3. 以 GUI 启动服务器")
+    print("4. 查看服务器状态")
+    print("5. 停止当前服务器")
+    print("6. 连接当前服务器的控制台")
+    print("7. 查看资源占用")
+    print("8. 查询在线状态与人数")
     print("0. 返回主菜单")
 
     choice = input("请选择操作: ").strip()
 
     if choice == "1":
+        from modules import Lister
         server_list = Lister.load_server_list()
         current_server = Lister.display_servers(server_list)
         return current_server
     elif choice == "2":
         print("正在启动服务器...")
+        from modules import ServerLauncher
         config = Settings.load_config()
         ServerLauncher.launch(current_server, Settings.server_root(config), False)
     elif choice == "3":
         print("正在以 GUI 模式启动服务器...")
+        from modules import ServerLauncher
         config = Settings.load_config()
         ServerLauncher.launch(current_server, Settings.server_root(config), True)
+    elif choice == "4":
+        from modules import Supervisor
+        Supervisor.print_status()
+    elif choice == "5":
+        from modules import ServerLauncher
+        ServerLauncher.stop(current_server)
+    elif choice == "6":
+        from modules import Console
+        Console.attach(current_server)
+    elif choice == "7":
+        from modules import Sampler
+        Sampler.print_table(Sampler.collect())
+    elif choice == "8":
+        from modules import Pinger
+        Pinger.print_rows(Pinger.refresh())
     elif choice == "0":
-        return
+        return current_server
     else:
         print("无效输入，请重新选择。")
+    # 服务器在后台运行，返回菜单时保留当前选择
+    return current_server
 
 
 def manage_server_menu(current_server):
@@ -161,6 +455,7 @@ def manage_server_menu(current_server):
     print("4. Worlds 管理")
     print("5. 服务器设置")
     print("6. 扫描并更新服务器列表")
+    print("7. 监视服务器目录（自动更新列表）")
     print("0. 返回主菜单")
 
     choice = input("请选择操作: ").strip()
@@ -172,19 +467,29 @@ def manage_server_menu(current_server):
         config = Settings.load_config()
         server_root = Settings.server_root(config)
         print(f"当前服务器目录{server_root}")
+        from modules import ServerInstaller
         ServerInstaller.run(server_root)
     elif choice == "3":
         print("进入 Plugins 管理...")
     elif choice == "4":
         print("进入 Worlds 管理...")
     elif choice == "5":
-        print("进入服务器设置...")
+        print("进入服务器设置（JVM 参数方案与 Java）...")
+        from modules import JvmProfiles
+        from modules.java import javaselector
+        JvmProfiles.configure_menu(current_server)
+        javaselector.configure_menu(current_server)
     elif choice == "6":
         if "y" == input("确认扫描(y)"):
+            force = input("忽略缓存并重新探测所有核心？(y/N)").strip().lower() == "y"
             print("开始扫描...")
-            Serverlistinitializer.initialize()
+            from modules import Serverlistinitializer
+            Serverlistinitializer.initialize(force=force)
         else:
             print("用户取消了扫描。")
+    elif choice == "7":
+        from modules import Watcher
+        Watcher.watch()
     elif choice == "0":
         return
     else:
@@ -207,8 +512,10 @@ def settings_menu():
     elif choice == "2":
         print("进入全局设置...WIP,目前不可用")
     elif choice == "3":
+        from modules import AboutJartender
         AboutJartender.about()
     elif choice == "4":
+        from modules.java import javamgr
         javamgr.main_menu()
     elif choice == "0":
         return
@@ -1,4 +1,4 @@
-from jartender import BColors
+from modules.Colors import BColors
 
 def gradient_yellow_rgb(text, offset):
     start_color = (112, 214, 255)
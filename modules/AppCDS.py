@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from modules import Settings
+from modules.java import javaselector
+
+"""
+AppCDS（应用类数据共享）归档管理，缩短 JVM 启动时类加载的耗时。
+1.每个服务器、每个 Java 运行时各有一个动态归档 cds/<服务器>/<运行时>.jsa，旁边的 .json 记录生成归档时的指纹：
+  核心 JAR（路径、大小、mtime 与 sha256）、mods 目录中的 JAR、JDK 构建号与 JVM 方案。
+2.启动时指纹一致且归档存在，使用 -XX:SharedArchiveFile；否则删除旧归档，
+  以 -XX:ArchiveClassesAtExit 启动，服务器正常停止时由 JVM 写出新归档。
+3.动态归档需要 HotSpot 13+；Java 8–12 与 OpenJ9 不传任何参数。归档损坏或不匹配时 JVM 只会给出警告并照常启动。
+config.json 中 "appcds": false 可全局关闭。
+"""
+
+MIN_JAVA_MAJOR = 13
+MODS_DIR = "mods"
+
+USE = "use"
+DUMP = "dump"
+UNSUPPORTED = "unsupported"
+DISABLED = "disabled"
+
+
+def enabled(config: Optional[dict] = None) -> bool:
+    if config is None:
+        try:
+            config = Settings.load_config()
+        except (OSError, ValueError):
+            config = {}
+    return bool(config.get("appcds", True))
+
+
+@lru_cache(maxsize=None)
+def _version_output(java: str, mtime_ns: int) -> Optional[str]:
+    # mtime 作为缓存键的一部分：原地升级 JDK 后重新读取
+    try:
+        result = subprocess.run([java, "-version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def jdk_build(java: str) -> Optional[Dict[str, object]]:
+    """
+    `java -version` 中的构建信息
+    :return: {"build", "major", "hotspot"}；无法执行时返回 None
+    """
+    executable = shutil.which(java) or java
+    try:
+        real_path = os.path.realpath(executable)
+        mtime_ns = os.stat(real_path).st_mtime_ns
+    except OSError:
+        return None
+    output = _version_output(real_path, mtime_ns)
+    if output is None:
+        return None
+    match = re.search(r'version "([^"]+)"', output)
+    return {
+        # 完整输出包含运行时与虚拟机两行的 (build ...)，足以区分同一版本的不同构建
+        "build": " | ".join(line.strip() for line in output.splitlines() if line.strip()),
+        "major": javaselector.java_major(match.group(1)) if match else None,
+        "hotspot": "OpenJ9" not in output,
+    }
+
+
+def _mods_fingerprint(server_dir: Path) -> str:
+    digest = hashlib.sha256()
+    mods_dir = server_dir / MODS_DIR
+    try:
+        entries = sorted(
+            (entry for entry in os.scandir(mods_dir) if entry.is_file() and entry.name.endswith(".jar")),
+            key=lambda entry: entry.name,
+        )
+    except OSError:
+        entries = []
+    for entry in entries:
+        stat = entry.stat()
+        digest.update(f"{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _jar_fingerprint(jar_path: str, previous: Optional[dict]) -> Optional[dict]:
+    """核心 JAR 的指纹；大小与 mtime 未变时沿用记录的 sha256，避免每次启动都重新计算"""
+    from modules import ManifestCache
+
+    try:
+        stat = os.stat(jar_path)
+    except OSError:
+        return None
+    fingerprint = {"path": str(Path(jar_path).resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and all(previous.get(key) == value for key, value in fingerprint.items()):
+        fingerprint["sha256"] = previous.get("sha256")
+    else:
+        fingerprint["sha256"] = ManifestCache.file_sha256(jar_path)
+    return fingerprint
+
+
+def archive_dir(server_name: str) -> Path:
+    return Settings.CDS_DIR / server_name
+
+
+def archive_path(server_name: str, java: str) -> Path:
+    """按 Java 可执行文件的真实路径区分运行时"""
+    real_path = os.path.realpath(shutil.which(java) or java)
+    key = hashlib.sha1(real_path.encode("utf-8")).hexdigest()[:12]
+    return archive_dir(server_name) / f"{key}.jsa"
+
+
+def _load_record(record_path: Path) -> Optional[dict]:
+    try:
+        return json.loads(record_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _remove(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def prepare(server: dict, java: str, profile: str) -> Dict[str, object]:
+    """
+    决定本次启动的 CDS 参数，必要时清除失效的归档
+    :return: {"state", "args", "archive", "reason"}，state 为 use / dump / unsupported / disabled
+    """
+    if not enabled():
+        return {"state": DISABLED, "args": [], "archive": None, "reason": "config.json 中已关闭"}
+    build = jdk_build(java)
+    if build is None or not build["hotspot"] or (build["major"] or 0) < MIN_JAVA_MAJOR:
+        return {"state": UNSUPPORTED, "args": [], "archive": None, "reason": f"需要 HotSpot {MIN_JAVA_MAJOR}+"}
+
+    archive = archive_path(server["server_name"], java)
+    record_path = archive.with_suffix(".json")
+    record = _load_record(record_path) or {}
+    jar = _jar_fingerprint(server["jar_path"], record.get("jar"))
+    current = {
+        "jar": jar,
+        "mods": _mods_fingerprint(Path(server["jar_path"]).parent),
+        "jdk_build": build["build"],
+        "java": os.path.realpath(shutil.which(java) or java),
+        "profile": profile,
+    }
+
+    if archive.exists() and record == current:
+        return {"state": USE, "args": [f"-XX:SharedArchiveFile={archive}"], "archive": archive, "reason": "归档有效"}
+
+    if not archive.exists():
+        reason = "尚无归档" if not record else "上次未能生成归档（服务器未正常停止）"
+    else:
+        changed = [name for name in ("jar", "mods", "jdk_build", "profile") if record.get(name) != current[name]]
+        reason = "已变化: " + ", ".join(changed)
+    _remove(archive)
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    # 先写入指纹；JVM 在正常退出时写出归档，二者同时存在才视为有效
+    tmp_path = record_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(current, indent=4, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, record_path)
+    return {"state": DUMP, "args": [f"-XX:ArchiveClassesAtExit={archive}"], "archive": archive, "reason": reason}
+
+
+def invalidate(server_name: str) -> int:
+    """删除服务器的全部归档，返回删除的归档数量"""
+    directory = archive_dir(server_name)
+    removed = len(list(directory.glob("*.jsa"))) if directory.exists() else 0
+    shutil.rmtree(directory, ignore_errors=True)
+    return removed
+
+
+def archives(server_name: str) -> List[dict]:
+    """服务器已有的归档及其记录"""
+    directory = archive_dir(server_name)
+    if not directory.exists():
+        return []
+    rows = []
+    for record_path in sorted(directory.glob("*.json")):
+        archive = record_path.with_suffix(".jsa")
+        record = _load_record(record_path) or {}
+        rows.append({
+            "archive": str(archive),
+            "exists": archive.exists(),
+            "size": archive.stat().st_size if archive.exists() else 0,
+            "java": record.get("java"),
+            "profile": record.get("profile"),
+        })
+    return rows
+
+
+def print_archives(server_name: str) -> None:
+    rows = archives(server_name)
+    if not rows:
+        print(f"服务器 {server_name} 还没有 AppCDS 归档。")
+        return
+    for row in rows:
+        state = f"{row['size'] / 1024 / 1024:.1f} MiB" if row["exists"] else "等待下次正常停止时生成"
+        print(f"📦 {row['java']} [{row['profile']}]: {state}")
+
+
+if __name__ == "__main__":
+    import sys
+    print_archives(sys.argv[1])
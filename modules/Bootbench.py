@@ -0,0 +1,281 @@
+import queue
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from modules import Settings, Registry, JvmProfiles, ServerProperties, Shutdown
+from modules.java import javaselector
+
+"""
+服务器启动基准：在服务器的临时副本中按指定的 JVM 方案与 Java 运行时各启动 N 次。
+1.记录墙钟时间与日志中的关键节点：首行输出、开始加载、准备世界、"Done (12.345s)!"；
+  Done 之后发送 list 命令，收到回应的时刻即服务器开始处理 tick 的时刻（first_tick）。
+2.测量完成后通过控制台保存并停止（见 Shutdown），停止耗时同样记录。
+3.结果写入注册表的 bench_runs 表，报告中位数 / p95，并与同一方案、同一运行时、同一堆大小的上一批结果比较，标出回归。
+副本的 server-port 改为空闲端口并关闭 RCON / Query，不会与正在运行的原服务器冲突。
+"""
+
+DONE_PATTERN = re.compile(r'Done \((\d+(?:[.,]\d+)?)s\)! For help, type "help"')
+# list 命令的回应："There are 0 of a max of 20 players online" / "There are 0/20 players online"
+LIST_RESPONSE = "players online"
+
+# 日志节点：(名称, 匹配文本)，按首次出现的时刻记录
+MARKERS = (
+    ("server_start", "Starting minecraft server version"),
+    ("preparing_level", "Preparing level"),
+    ("spawn_area", "Preparing spawn area"),
+    ("start_region", "Preparing start region"),
+)
+
+# 不复制到副本中的内容
+SCRATCH_IGNORE = shutil.ignore_patterns("logs", "crash-reports", "*.log", "*.lck")
+
+DEFAULT_BOOT_TIMEOUT = 300.0
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+# 没有 wait_for 消费时最多暂存的输出行数（节点时间在读取时就已记录，不依赖这些行）
+PENDING_LINES = 1000
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """最近秩法求百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class BenchProcess(Shutdown.PopenTarget):
+    """一次基准运行中的服务器进程：读取输出的同时记录各节点相对启动的时间"""
+
+    def __init__(self, process: subprocess.Popen, started: float):
+        super().__init__(process, process_group=True)
+        self.started = started
+        self.markers: Dict[str, float] = {}
+        self.done_s: Optional[float] = None
+        self._start_reader()
+
+    def _read_output(self) -> None:
+        try:
+            for raw in iter(self.process.stdout.readline, b""):
+                elapsed = time.monotonic() - self.started
+                line = raw.decode("utf-8", errors="replace").rstrip()
+                self.markers.setdefault("first_output", elapsed)
+                for name, text in MARKERS:
+                    if name not in self.markers and text in line:
+                        self.markers[name] = elapsed
+                match = DONE_PATTERN.search(line)
+                if match and "done" not in self.markers:
+                    self.markers["done"] = elapsed
+                    self.done_s = float(match.group(1).replace(",", "."))
+                elif "done" in self.markers and "first_tick" not in self.markers and LIST_RESPONSE in line:
+                    self.markers["first_tick"] = elapsed
+                self._push(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._lines.put(None)
+
+
+    def _push(self, line: str) -> None:
+        # 两次 wait_for 之间的输出只保留最近 PENDING_LINES 行，丢弃最旧的
+        while self._lines.qsize() >= PENDING_LINES:
+            try:
+                self._lines.get_nowait()
+            except queue.Empty:
+                break
+        self._lines.put(line)
+
+
+def prepare_scratch(server_dir: Path, scratch_dir: Path) -> None:
+    """复制服务器到临时目录，并改用空闲端口"""
+    if scratch_dir.exists():
+        shutil.rmtree(scratch_dir)
+    shutil.copytree(server_dir, scratch_dir, ignore=SCRATCH_IGNORE, symlinks=True)
+    ServerProperties.update(scratch_dir, {
+        "server-port": free_port(),
+        "enable-rcon": False,
+        "enable-query": False,
+    })
+
+
+def run_once(command: List[str], cwd: Path, boot_timeout: float, timeouts: dict) -> dict:
+    """启动一次并测量，返回单次结果；boot_timeout 同时限制等待启动完成与第一个 tick 的总时间"""
+    started = time.monotonic()
+    process = subprocess.Popen(
+        command, cwd=str(cwd),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    target = BenchProcess(process, started)
+    result = {"ok": False, "error": None}
+    try:
+        if not target.wait_for(('For help, type "help"',), boot_timeout):
+            result["error"] = "启动超时" if target.is_alive() else f"进程提前退出 (返回码 {process.poll()})"
+        else:
+            # 控制台命令在 tick 循环中处理，回应出现即表示第一个 tick 已经开始
+            target.send("list")
+            if target.wait_for((LIST_RESPONSE,), max(0.0, started + boot_timeout - time.monotonic())):
+                result["ok"] = True
+            else:
+                result["error"] = "等待第一个 tick 超时"
+    finally:
+        stop_started = time.monotonic()
+        outcome = Shutdown.graceful_stop(target, timeouts)
+        result["stop_s"] = round(time.monotonic() - stop_started, 3)
+        if outcome != Shutdown.CONSOLE and result["ok"]:
+            result["error"] = f"未能正常停止: {outcome}"
+        if process.stdin is not None:
+            process.stdin.close()
+
+    result["done_s"] = target.done_s
+    result["wall_done_s"] = target.markers.get("done")
+    result["first_tick_s"] = target.markers.get("first_tick")
+    result["markers"] = {name: round(value, 3) for name, value in target.markers.items()}
+    return result
+
+
+def benchmark(server_name: str, runs: int = 3, profiles: Optional[List[str]] = None,
+              runtimes: Optional[List[str]] = None, heap_mb: Optional[int] = None,
+              fresh: bool = False, boot_timeout: float = DEFAULT_BOOT_TIMEOUT) -> List[dict]:
+    """
+    对一个服务器运行启动基准
+    :param profiles: JVM 方案名，默认为服务器当前方案
+    :param runtimes: Java 可执行文件路径，"auto" 表示自动选择，默认自动选择
+    :param fresh: 每次运行前重新复制服务器（冷启动），否则同一组合的多次运行共用一个副本
+    """
+    server = Registry.get_server(server_name)
+    if server is None:
+        raise ValueError(f"找不到名为 '{server_name}' 的服务器")
+    server_dir = Settings.server_root() / server_name
+    jar_name = Path(server["jar_path"]).name
+    profiles = profiles or [JvmProfiles.profile_name(server)]
+    unknown = [name for name in profiles if name not in JvmProfiles.PROFILES]
+    if unknown:
+        raise ValueError(f"未知的 JVM 方案: {', '.join(unknown)}，可选: {', '.join(JvmProfiles.PROFILES)}")
+    runtimes = runtimes or ["auto"]
+    timeouts = Settings.stop_timeouts()
+    batch_id = uuid.uuid4().hex[:12]
+    scratch_dir = Settings.BENCH_DIR / f"{server_name}-{batch_id}"
+
+    results = []
+    try:
+        for profile in profiles:
+            heap = heap_mb or server.get("heap_mb") or JvmProfiles.heap_size_mb(profile)
+            for runtime in runtimes:
+                java = javaselector.java_command(server) if runtime == "auto" else runtime
+                java_major = javaselector.runtime_major(java)
+                if not JvmProfiles.supports(profile, java_major):
+                    print(f"⚠️ 方案 {profile} 需要 Java {JvmProfiles.PROFILES[profile]['min_java']}+，"
+                          f"跳过 {java}（Java {java_major}）")
+                    continue
+                command = [java, *JvmProfiles.jvm_args(profile, heap), "-jar", jar_name, "-nogui"]
+                for index in range(runs):
+                    if fresh or index == 0:
+                        prepare_scratch(server_dir, scratch_dir)
+                    print(f"⏱️ [{profile} / Java {java_major or '?'} / {heap} MiB] 第 {index + 1}/{runs} 次启动...")
+                    run = run_once(command, scratch_dir, boot_timeout, timeouts)
+                    run.update(
+                        batch_id=batch_id, server_name=server_name, profile=profile, java_path=java,
+                        java_major=java_major, heap_mb=heap, run_index=index, started_at=time.time(),
+                        ok=int(run["ok"]),
+                    )
+                    if run["ok"]:
+                        print(f"   Done {run['done_s']}s，墙钟 {run['wall_done_s']:.2f}s，"
+                              f"首个 tick {run['first_tick_s'] or 0:.2f}s，停止 {run['stop_s']:.2f}s")
+                    else:
+                        print(f"   ❌ {run['error']}")
+                    results.append(run)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        if results:
+            Registry.add_bench_runs(results)
+    return results
+
+
+def summarize(runs: List[dict]) -> dict:
+    """一组运行的统计：成功次数与各指标的中位数 / p95"""
+    ok_runs = [run for run in runs if run.get("ok")]
+    summary = {"runs": len(runs), "ok": len(ok_runs)}
+    for metric in ("wall_done_s", "done_s", "first_tick_s", "stop_s"):
+        values = [run[metric] for run in ok_runs if run.get(metric) is not None]
+        summary[metric] = {
+            "median": statistics.median(values) if values else None,
+            "p95": percentile(values, 95),
+        }
+    return summary
+
+
+def report(server_name: str, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[dict]:
+    """
+    按 (方案, Java, 堆大小) 分组，比较最新一批与上一批的墙钟启动时间中位数
+    :return: 每组 {"profile", "java_path", "java_major", "heap_mb", "latest", "previous", "change", "regression"}
+    """
+    groups: Dict[tuple, Dict[str, List[dict]]] = {}
+    for run in Registry.bench_history(server_name):
+        batches = groups.setdefault((run["profile"], run["java_path"], run["heap_mb"]), {})
+        batches.setdefault(run["batch_id"], []).append(run)
+
+    rows = []
+    for (profile, java_path, heap_mb), batches in groups.items():
+        # 字典保持插入顺序，历史按时间排列，最后一批即最新
+        ordered = list(batches.values())
+        latest = summarize(ordered[-1])
+        previous = summarize(ordered[-2]) if len(ordered) > 1 else None
+        change = None
+        if previous and latest["wall_done_s"]["median"] and previous["wall_done_s"]["median"]:
+            change = latest["wall_done_s"]["median"] / previous["wall_done_s"]["median"] - 1
+        rows.append({
+            "profile": profile,
+            "java_path": java_path,
+            "java_major": ordered[-1][0].get("java_major"),
+            "heap_mb": heap_mb,
+            "latest": latest,
+            "previous": previous,
+            "change": change,
+            "regression": change is not None and change > threshold,
+        })
+    return rows
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:.2f}s" if value is not None else "-"
+
+
+def print_report(server_name: str, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> bool:
+    """打印报告，存在回归时返回 False"""
+    rows = report(server_name, threshold)
+    if not rows:
+        print(f"服务器 {server_name} 还没有启动基准记录。")
+        return True
+    print(f"=== {server_name} 启动基准（最新一批） ===")
+    for row in rows:
+        latest = row["latest"]
+        heap = f"{row['heap_mb']} MiB" if row["heap_mb"] else "堆大小未记录"
+        print(f"[{row['profile']} / Java {row['java_major'] or '?'} / {heap}] {row['java_path']}")
+        print(f"  成功 {latest['ok']}/{latest['runs']}，"
+              f"墙钟 中位数 {_fmt(latest['wall_done_s']['median'])} p95 {_fmt(latest['wall_done_s']['p95'])}，"
+              f"Done 中位数 {_fmt(latest['done_s']['median'])}，"
+              f"首个 tick 中位数 {_fmt(latest['first_tick_s']['median'])}，"
+              f"停止 中位数 {_fmt(latest['stop_s']['median'])}")
+        if row["change"] is not None:
+            mark = "⚠️ 回归" if row["regression"] else "✅"
+            print(f"  {mark} 相比上一批 {row['change'] * 100:+.1f}%")
+    return not any(row["regression"] for row in rows)
+
+
+if __name__ == "__main__":
+    import sys
+    print_report(sys.argv[1])
@@ -0,0 +1,12 @@
+# 终端颜色，所有模块共用，避免反向导入入口脚本 jartender.py
+class BColors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKCYAN = '\033[96m'
+    OKGREEN = '\033[38;2;120;200;120m'
+    LOGOYELLOW = '\033[38;2;200;180;100m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+    UNDERLINE = '\033[4m'
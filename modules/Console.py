@@ -0,0 +1,282 @@
+import asyncio
+import os
+import sys
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from modules import Supervisor, LagAnalyzer
+
+"""
+控制台中继：一个 asyncio 事件循环同时读取所有受管服务器的输出，不必为每个服务器开一个终端。
+1.受管服务器的标准输出写入 run/<服务器名>/console.log（见 Supervisor），Jartender 重启后也能继续读取；
+  中继增量读取这些文件，每个服务器每轮最多读取 READ_CHUNK 字节，刷屏的服务器不会拖慢其他服务器。
+2.每个服务器保留最近 scrollback 行（deque 环形缓冲），内存占用固定。
+3.订阅者（attach）各有一个有界队列，消费不及时时丢弃最旧的行，不会反过来阻塞读取。
+4.analyze=True 时每行新输出同时交给该服务器的 LagAnalyzer，统计卡顿并定期写入 run/<服务器名>/lag.json；
+  建立控制台时回溯的旧输出只进入缓冲区，不参与分析（旧日志的时间戳无法确定日期）。
+"""
+
+DEFAULT_SCROLLBACK = 1000
+SUBSCRIBER_QUEUE_SIZE = 2000
+READ_CHUNK = 64 * 1024
+POLL_INTERVAL = 0.2
+
+DETACH_COMMAND = ":detach"
+SWITCH_COMMAND = ":switch"
+
+
+class Subscription:
+    """一个控制台订阅者，队列满时丢弃最旧的行"""
+
+    def __init__(self, server_name: str, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.server_name = server_name
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, line: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(line)
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+
+class ServerConsole:
+    """单个服务器的输出：读取位置、环形缓冲与订阅者"""
+
+    def __init__(self, server_name: str, log_path: str, scrollback: int = DEFAULT_SCROLLBACK,
+                 analyzer: Optional[LagAnalyzer.LagAnalyzer] = None):
+        self.server_name = server_name
+        self.log_path = log_path
+        self.analyzer = analyzer
+        self.overloaded = False
+        self.lines: Deque[str] = deque(maxlen=scrollback)
+        self.subscribers: Set[Subscription] = set()
+        self.partial = b""
+        # 首次读取时只回溯足够填满缓冲区的内容
+        try:
+            stat = os.stat(log_path)
+            size, self.inode = stat.st_size, stat.st_ino
+        except OSError:
+            size, self.inode = 0, None
+        self.offset = max(0, size - scrollback * 256)
+        self._skip_partial = self.offset > 0
+        # 在此位置之前结束的行是建立控制台前的旧输出
+        self.analyze_from = size
+
+    def poll(self) -> int:
+        """读取新增的输出并分发，返回读取的字节数"""
+        try:
+            stat = os.stat(self.log_path)
+            size = stat.st_size
+            if size < self.offset or stat.st_ino != self.inode:
+                # 日志被截断，或服务器重新启动时轮转成了新文件，从头开始
+                self.offset = 0
+                self.partial = b""
+                self.inode = stat.st_ino
+                self.analyze_from = 0
+            if size == self.offset:
+                return 0
+            with open(self.log_path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read(READ_CHUNK)
+        except OSError:
+            return 0
+
+        # 缓冲区第一个字节在文件中的位置，用来计算每行结束的位置
+        position = self.offset - len(self.partial)
+        self.offset += len(data)
+        *lines, self.partial = (self.partial + data).split(b"\n")
+        if self._skip_partial and lines:
+            position += len(lines[0]) + 1
+            lines = lines[1:]
+            self._skip_partial = False
+        for raw in lines:
+            position += len(raw) + 1
+            self.publish(raw.rstrip(b"\r").decode("utf-8", errors="replace"), position > self.analyze_from)
+        return len(data)
+
+    def publish(self, line: str, analyze: bool = True) -> None:
+        self.lines.append(line)
+        if analyze and self.analyzer is not None:
+            self.analyzer.feed(line)
+        for subscription in self.subscribers:
+            subscription.push(line)
+
+
+class ConsoleRelay:
+    def __init__(self, supervisor: Optional[Supervisor.Supervisor] = None,
+                 scrollback: int = DEFAULT_SCROLLBACK, interval: float = POLL_INTERVAL,
+                 analyze: bool = False, on_overload: Optional[Callable[[dict], None]] = None):
+        self.supervisor = supervisor or Supervisor.get_supervisor()
+        self.scrollback = scrollback
+        self.interval = interval
+        self.analyze = analyze
+        self.on_overload = on_overload
+        self.consoles: Dict[str, ServerConsole] = {}
+
+    def sync_servers(self) -> None:
+        """为新出现的受管服务器建立控制台"""
+        self.supervisor.load()
+        for name, server in list(self.supervisor.servers.items()):
+            if name not in self.consoles and server.log_path.exists():
+                analyzer = LagAnalyzer.LagAnalyzer(name) if self.analyze else None
+                self.consoles[name] = ServerConsole(name, str(server.log_path), self.scrollback, analyzer)
+
+    def check_lag(self) -> None:
+        """保存有变化的卡顿统计，服务器进入持续过载时回调 on_overload"""
+        for console in list(self.consoles.values()):
+            if console.analyzer is None:
+                continue
+            if console.analyzer.dirty:
+                console.analyzer.save()
+            status = console.analyzer.status()
+            if status["overloaded"] and not console.overloaded and self.on_overload is not None:
+                self.on_overload(status)
+            console.overloaded = status["overloaded"]
+
+    def poll_once(self) -> int:
+        total = 0
+        for console in list(self.consoles.values()):
+            total += console.poll()
+        return total
+
+    async def run(self) -> None:
+        """持续读取所有服务器的输出，直到任务被取消"""
+        rounds = 0
+        while True:
+            if rounds % 25 == 0:
+                self.sync_servers()
+                if self.analyze:
+                    self.check_lag()
+            rounds += 1
+            # 还有积压时立即进入下一轮，但每轮都让出事件循环
+            await asyncio.sleep(0 if self.poll_once() else self.interval)
+
+    def attach(self, server_name: str, replay: bool = True) -> Subscription:
+        """订阅一个服务器的控制台；replay 为 True 时先推送缓冲区中的历史输出"""
+        self.sync_servers()
+        console = self.consoles.get(server_name)
+        if console is None:
+            raise KeyError(server_name)
+        subscription = Subscription(server_name)
+        if replay:
+            for line in console.lines:
+                subscription.push(line)
+        console.subscribers.add(subscription)
+        return subscription
+
+    def detach(self, subscription: Subscription) -> None:
+        console = self.consoles.get(subscription.server_name)
+        if console is not None:
+            console.subscribers.discard(subscription)
+
+    async def send(self, server_name: str, command: str) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.supervisor.send_command, server_name, command)
+
+    def server_names(self) -> List[str]:
+        self.sync_servers()
+        return sorted(self.consoles)
+
+
+async def _print_lines(subscription: Subscription) -> None:
+    reported = 0
+    while True:
+        line = await subscription.get()
+        if subscription.dropped != reported:
+            print(f"... 输出过快，已丢弃 {subscription.dropped - reported} 行 ...")
+            reported = subscription.dropped
+        print(line)
+
+
+async def _read_input(queue: asyncio.Queue) -> None:
+    """把终端输入转为协程可等待的队列（POSIX 终端下注册为事件循环的读事件）"""
+    loop = asyncio.get_running_loop()
+    if os.name != "nt" and sys.stdin.isatty():
+        # 直接读文件描述符并自行分行：经由 sys.stdin 的缓冲读取时，一次粘贴的多行只有第一行会触发读事件
+        fd = sys.stdin.fileno()
+        pending = bytearray()
+
+        def on_readable():
+            data = os.read(fd, 4096)
+            if not data:
+                loop.remove_reader(fd)
+                queue.put_nowait(None)
+                return
+            pending.extend(data)
+            *lines, rest = bytes(pending).split(b"\n")
+            pending[:] = rest
+            for line in lines:
+                queue.put_nowait(line.decode("utf-8", errors="replace") + "\n")
+        loop.add_reader(fd, on_readable)
+        try:
+            await asyncio.Future()
+        finally:
+            loop.remove_reader(fd)
+    else:
+        # 守护线程阻塞读取，断开时不需要等它结束
+        def reader():
+            for line in iter(sys.stdin.readline, ""):
+                loop.call_soon_threadsafe(queue.put_nowait, line)
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+        threading.Thread(target=reader, daemon=True).start()
+        await asyncio.Future()
+
+
+async def interactive(server_name: str) -> None:
+    """
+    连接到服务器控制台：输入的内容作为命令发送；
+    :switch <名称> 切换到其他服务器，:detach 或 Ctrl+D 断开（服务器继续运行）
+    """
+    relay = ConsoleRelay()
+    relay_task = asyncio.create_task(relay.run())
+    inputs: asyncio.Queue = asyncio.Queue()
+    input_task = asyncio.create_task(_read_input(inputs))
+
+    subscription = relay.attach(server_name)
+    printer = asyncio.create_task(_print_lines(subscription))
+    print(f"🔌 已连接到 {server_name} 的控制台，输入 {DETACH_COMMAND} 断开，{SWITCH_COMMAND} <名称> 切换服务器")
+    try:
+        while True:
+            line = await inputs.get()
+            if line is None or line.strip() == DETACH_COMMAND:
+                break
+            line = line.strip()
+            if line.startswith(SWITCH_COMMAND):
+                target = line[len(SWITCH_COMMAND):].strip()
+                if target not in relay.server_names():
+                    print(f"❌ 没有受管的服务器: {target}，可选: {', '.join(relay.server_names())}")
+                    continue
+                relay.detach(subscription)
+                printer.cancel()
+                subscription = relay.attach(target)
+                printer = asyncio.create_task(_print_lines(subscription))
+                print(f"🔀 已切换到 {target}")
+            elif line and not await relay.send(subscription.server_name, line):
+                print(f"❌ 无法发送命令，服务器 {subscription.server_name} 未在运行")
+    finally:
+        relay.detach(subscription)
+        for task in (printer, input_task, relay_task):
+            task.cancel()
+        await asyncio.gather(printer, input_task, relay_task, return_exceptions=True)
+    print("🔌 已断开控制台，服务器仍在后台运行。")
+
+
+def attach(server_name: str) -> bool:
+    """同步入口：连接控制台直到断开"""
+    if Supervisor.get_supervisor().get(server_name) is None:
+        print(f"❌ 服务器 '{server_name}' 未由 Jartender 启动过")
+        return False
+    try:
+        asyncio.run(interactive(server_name))
+    except KeyboardInterrupt:
+        print("\n🔌 已断开控制台，服务器仍在后台运行。")
+    return True
+
+
+if __name__ == "__main__":
+    attach(sys.argv[1])
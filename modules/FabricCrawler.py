@@ -5,6 +5,8 @@ import math
 import json
 import shutil
 
+from modules import Metrics
+
 
 def fabric_crawler(current_dir):
     # 获取终端宽度
@@ -40,6 +42,7 @@ def fabric_crawler(current_dir):
         )
 
         try:
+            started = time.perf_counter()
             with requests.get(download_url, stream=True) as resp:
                 print(f"\n正在下载Fabric Server: {download_url}")
                 resp.raise_for_status()
@@ -59,6 +62,7 @@ def fabric_crawler(current_dir):
                     for chunk in resp.iter_content(chunk_size=8192):
                         if chunk:
                             file.write(chunk)
+            Metrics.observe("download", time.perf_counter() - started)
 
             print(f"\n下载完成! 文件已保存至: {filepath}")
             return filepath, current_minecraft_version, current_fabric_loader_version
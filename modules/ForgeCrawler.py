@@ -5,6 +5,9 @@ from re import L
 import shutil
 import requests
 import time
+
+from modules import Metrics
+
 # 全局变量存储选中的项目（与 FabricCrawler 一致）
 selected_item = None
 
@@ -61,6 +64,7 @@ def forge_crawler(current_dir):
         filepath = os.path.join(current_dir, filename)
 
         try:
+            started = time.perf_counter()
             with requests.get(download_url, stream=True) as resp:
                 print(f"\n正在下载Forge Installer: {download_url}")
                 resp.raise_for_status()
@@ -69,6 +73,7 @@ def forge_crawler(current_dir):
                         if chunk:
                             file.write(chunk)
                 print(f"\n下载完成! 文件已保存至: {filepath}")
+            Metrics.observe("download", time.perf_counter() - started)
             return filepath, current_minecraft_version, current_forge_version
         except Exception as e:
             print(f"下载失败: {e}")
@@ -0,0 +1,56 @@
+import os
+from typing import Dict, Optional
+
+"""
+读取宿主机的 CPU / 内存信息，用于决定并发探测数量等。
+Linux 下读取 /proc/meminfo，其他系统拿不到内存信息时返回 None，由调用方自行降级。
+"""
+
+MEMINFO_PATH = "/proc/meminfo"
+
+
+def cpu_count() -> int:
+    """可用 CPU 核心数（优先考虑进程亲和性）"""
+    if hasattr(os, "sched_getaffinity"):
+        try:
+            return max(1, len(os.sched_getaffinity(0)))
+        except OSError:
+            pass
+    return max(1, os.cpu_count() or 1)
+
+
+def meminfo() -> Dict[str, int]:
+    """解析 /proc/meminfo，单位为 kB；不可用时返回空字典"""
+    result: Dict[str, int] = {}
+    try:
+        with open(MEMINFO_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                parts = value.split()
+                if parts and parts[0].isdigit():
+                    result[key.strip()] = int(parts[0])
+    except OSError:
+        return {}
+    return result
+
+
+def available_memory_mb() -> Optional[int]:
+    """当前可用内存 (MiB)"""
+    info = meminfo()
+    if "MemAvailable" in info:
+        return info["MemAvailable"] // 1024
+    if "MemFree" in info:
+        return (info["MemFree"] + info.get("Cached", 0)) // 1024
+    return None
+
+
+def total_memory_mb() -> Optional[int]:
+    """物理内存总量 (MiB)"""
+    info = meminfo()
+    if "MemTotal" in info:
+        return info["MemTotal"] // 1024
+    return None
+
+
+if __name__ == "__main__":
+    print(f"CPU: {cpu_count()}, 可用内存: {available_memory_mb()} MiB / {total_memory_mb()} MiB")
@@ -0,0 +1,209 @@
+from typing import Dict, List, Optional
+
+from modules import HostInspector, Settings
+
+"""
+JVM 参数方案：每个服务器在注册表中记录 jvm_profile（方案名）与可选的 heap_mb（固定堆大小）。
+1.aikar：针对 Paper 等服务端调优的 G1 参数（Aikar's flags），大堆（>12G）时自动换用对应的一组参数。
+2.zgc：大堆低停顿，需要 Java 17 及以上；选中的 Java 低于 17 时改用 default 方案。
+3.minimal：大厅等轻负载服务器，Serial GC 与小堆。
+4.default：不设置 GC，只设置堆大小。
+堆大小由物理内存、当前可用内存与同机运行的服务器数量推算，避免多个服务器合计超出物理内存。
+"""
+
+DEFAULT_PROFILE = "aikar"
+
+# 为操作系统与其他进程保留的内存：至少 1 GiB 或物理内存的 15%
+OS_RESERVE_MB = 1024
+OS_RESERVE_RATIO = 0.15
+# 堆之外 JVM 还需要元空间、线程栈、直接内存等，按堆的 25% 估算
+JVM_OVERHEAD_RATIO = 1.25
+HEAP_GRANULARITY_MB = 256
+
+AIKAR_FLAGS = [
+    "-XX:+UseG1GC",
+    "-XX:+ParallelRefProcEnabled",
+    "-XX:MaxGCPauseMillis=200",
+    "-XX:+UnlockExperimentalVMOptions",
+    "-XX:+DisableExplicitGC",
+    "-XX:+AlwaysPreTouch",
+    "-XX:G1HeapWastePercent=5",
+    "-XX:G1MixedGCCountTarget=4",
+    "-XX:G1MixedGCLiveThresholdPercent=90",
+    "-XX:G1RSetUpdatingPauseTimePercent=5",
+    "-XX:SurvivorRatio=32",
+    "-XX:+PerfDisableSharedMem",
+    "-XX:MaxTenuringThreshold=1",
+    "-Dusing.aikars.flags=https://mcflags.emc.gs",
+    "-Daikars.new.flags=true",
+]
+AIKAR_SMALL_HEAP = [
+    "-XX:G1NewSizePercent=30",
+    "-XX:G1MaxNewSizePercent=40",
+    "-XX:G1HeapRegionSize=8M",
+    "-XX:G1ReservePercent=20",
+    "-XX:InitiatingHeapOccupancyPercent=15",
+]
+AIKAR_LARGE_HEAP = [
+    "-XX:G1NewSizePercent=40",
+    "-XX:G1MaxNewSizePercent=50",
+    "-XX:G1HeapRegionSize=16M",
+    "-XX:G1ReservePercent=15",
+    "-XX:InitiatingHeapOccupancyPercent=20",
+]
+AIKAR_LARGE_HEAP_MB = 12 * 1024
+
+PROFILES: Dict[str, dict] = {
+    "aikar": {
+        "description": "G1 调优（Aikar's flags），适合 Paper/Spigot 及大多数模组服",
+        "min_heap_mb": 1024,
+        "max_heap_mb": 32 * 1024,
+        "fixed_heap": True,
+    },
+    "zgc": {
+        "description": "ZGC，适合 16G 以上的大堆，停顿极短（需要 Java 17+）",
+        "flags": ["-XX:+UseZGC", "-XX:+AlwaysPreTouch", "-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"],
+        "min_heap_mb": 4096,
+        "max_heap_mb": 64 * 1024,
+        "fixed_heap": True,
+        # 低于此版本的 JVM 不认识 -XX:+UseZGC，会直接拒绝启动
+        "min_java": 17,
+    },
+    "minimal": {
+        "description": "Serial GC 与小堆，适合大厅/登录等轻负载服务器",
+        "flags": ["-XX:+UseSerialGC", "-XX:+DisableExplicitGC"],
+        "min_heap_mb": 512,
+        "max_heap_mb": 1024,
+        "fixed_heap": False,
+    },
+    "default": {
+        "description": "JVM 默认 GC，仅设置堆大小",
+        "flags": [],
+        "min_heap_mb": 1024,
+        "max_heap_mb": 32 * 1024,
+        "fixed_heap": False,
+    },
+}
+
+
+def default_profile(config: Optional[dict] = None) -> str:
+    """config.json 中的 default_jvm_profile，未设置或无效时为 aikar"""
+    if config is None:
+        try:
+            config = Settings.load_config()
+        except (OSError, ValueError):
+            config = {}
+    name = config.get("default_jvm_profile")
+    return name if name in PROFILES else DEFAULT_PROFILE
+
+
+def profile_name(server: Optional[dict], config: Optional[dict] = None) -> str:
+    name = (server or {}).get("jvm_profile")
+    return name if name in PROFILES else default_profile(config)
+
+
+def supports(profile: str, java_major: Optional[int]) -> bool:
+    """方案能否用于该主版本的 Java；主版本未知时不做限制"""
+    minimum = PROFILES[profile].get("min_java")
+    return minimum is None or java_major is None or java_major >= minimum
+
+
+def heap_size_mb(profile: str, cohosted: int = 1) -> int:
+    """
+    推算单个服务器的堆大小 (MiB)
+    :param cohosted: 同机运行的服务器数量（包括即将启动的这一个）
+    """
+    spec = PROFILES[profile]
+    total = HostInspector.total_memory_mb()
+    if total is None:
+        # 拿不到内存信息（非 Linux）时使用方案的下限
+        return spec["min_heap_mb"]
+
+    reserve = max(OS_RESERVE_MB, int(total * OS_RESERVE_RATIO))
+    share = (total - reserve) / max(1, cohosted)
+    # 其他服务器已经占用的内存从可用内存中体现，不超出当前可用内存
+    available = HostInspector.available_memory_mb()
+    if available is not None:
+        share = min(share, available - OS_RESERVE_MB)
+    heap = int(share / JVM_OVERHEAD_RATIO) // HEAP_GRANULARITY_MB * HEAP_GRANULARITY_MB
+    if heap < spec["min_heap_mb"]:
+        # 内存不足以满足方案下限时不强行超额分配，只保证一个能启动的最小堆
+        return max(HEAP_GRANULARITY_MB, heap)
+    return min(heap, spec["max_heap_mb"])
+
+
+def jvm_args(profile: str, heap_mb: int) -> List[str]:
+    """方案对应的 JVM 参数（不含 java 本身与 -jar）"""
+    spec = PROFILES[profile]
+    if spec["fixed_heap"]:
+        args = [f"-Xms{heap_mb}M", f"-Xmx{heap_mb}M"]
+    else:
+        args = [f"-Xms{min(heap_mb, spec['min_heap_mb'])}M", f"-Xmx{heap_mb}M"]
+    if profile == "aikar":
+        args += AIKAR_FLAGS + (AIKAR_LARGE_HEAP if heap_mb > AIKAR_LARGE_HEAP_MB else AIKAR_SMALL_HEAP)
+    else:
+        args += spec["flags"]
+    return args
+
+
+def resolve(server: Optional[dict], cohosted: int = 1, java_major: Optional[int] = None) -> dict:
+    """
+    服务器实际使用的方案、堆大小与参数
+    :param java_major: 将要使用的 Java 主版本，方案不支持时改用 default
+    :return: {"profile", "heap_mb", "args"}
+    """
+    profile = profile_name(server)
+    if not supports(profile, java_major):
+        print(f"⚠️ 方案 {profile} 需要 Java {PROFILES[profile]['min_java']}+，"
+              f"当前为 Java {java_major}，改用 default 方案")
+        profile = "default"
+    heap_mb = (server or {}).get("heap_mb") or heap_size_mb(profile, cohosted)
+    return {"profile": profile, "heap_mb": int(heap_mb), "args": jvm_args(profile, int(heap_mb))}
+
+
+def configure(server_name: str, profile: Optional[str] = None, heap_mb: Optional[int] = None) -> bool:
+    """设置服务器的方案与固定堆大小（heap_mb 为 0 表示恢复自动推算）"""
+    from modules import Registry
+
+    fields = {}
+    if profile is not None:
+        if profile not in PROFILES:
+            raise ValueError(f"未知的 JVM 方案: {profile}，可选: {', '.join(PROFILES)}")
+        fields["jvm_profile"] = profile
+    if heap_mb is not None:
+        fields["heap_mb"] = heap_mb or None
+    return Registry.update_server(server_name, **fields)
+
+
+def configure_menu(server_name: str) -> None:
+    """交互式选择服务器的 JVM 方案"""
+    from modules import Registry
+
+    server = Registry.get_server(server_name)
+    if server is None:
+        print(f"❌ 找不到名为 '{server_name}' 的服务器！")
+        return
+    current = resolve(server)
+    print(f"当前方案: {current['profile']}，堆大小: {current['heap_mb']} MiB"
+          f"{'（固定）' if server.get('heap_mb') else '（自动推算）'}")
+    names = list(PROFILES)
+    for index, name in enumerate(names, 1):
+        print(f"{index}. {name:<8} {PROFILES[name]['description']}")
+    choice = input("选择方案（回车保持不变）: ").strip()
+    profile = None
+    if choice:
+        if not choice.isdigit() or not 1 <= int(choice) <= len(names):
+            print("无效输入。")
+            return
+        profile = names[int(choice) - 1]
+    heap = input("固定堆大小 MiB（回车保持不变，0 为自动推算）: ").strip()
+    if heap and not heap.isdigit():
+        print("无效输入。")
+        return
+    configure(server_name, profile, int(heap) if heap else None)
+    print(f"✅ 已更新，下次启动生效: {resolve(Registry.get_server(server_name))['args'][:2]}")
+
+
+if __name__ == "__main__":
+    for name in PROFILES:
+        print(name, " ".join(jvm_args(name, heap_size_mb(name))))
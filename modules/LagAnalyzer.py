@@ -0,0 +1,256 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+from modules import Settings
+
+"""
+从服务器输出中提取卡顿信息，挂在控制台中继（Console）上逐行分析。
+1.识别原版 / Paper 的 "Can't keep up! ... Running 2034ms or 40 ticks behind"、
+  Paper / Spigot 看门狗（"has not responded for N seconds" / "has stopped responding"）、
+  /tps 的 "TPS from last 1m, 5m, 15m: ..." 与 Paper /mspt 的 "◴ avg/min/max" 行。
+2.每行先做子串判断，只有命中关键字的行才执行（预编译的）正则，绝大多数日志行的开销只是几次 in 判断。
+  命中的行还必须来自对应的日志器（卡顿为 Server thread 的 WARN，看门狗为 Watchdog 线程的 ERROR），
+  消息本身以关键字开头；玩家聊天（"<名字> ..."）即使包含关键字也不计入。
+3.按分钟聚合：卡顿次数、落后 tick 数、最长一次卡顿、看门狗次数、最低 TPS、最高 MSPT；
+  只保留最近 history_minutes 分钟（deque），内存占用固定。
+4.最近 window_minutes 分钟中有 overloaded_minutes 分钟出现卡顿（或 TPS 低于阈值），或出现看门狗警告，视为持续过载。
+supervise 运行时每个受管服务器都有一个分析器，结果写入 run/<服务器>/lag.json。
+"""
+
+# 日志前缀：原版 / Forge "[12:34:56] [Server thread/WARN] [minecraft/MinecraftServer]: "，
+# Fabric "[12:34:56] [Server thread/WARN] (Minecraft) "，Paper "[12:34:56 WARN]: "（不含线程名）
+LOG_PREFIX = re.compile(
+    r"^\[\d{2}:\d{2}:\d{2}(?:\] \[(?P<thread>[^\]/]+)/(?P<level>[A-Z]+)\](?: \[[^\]]*\]: |: | \([^)]*\) )"
+    r"| (?P<paper_level>[A-Z]+)\]: )"
+)
+# 以下模式都从消息开头匹配
+CANT_KEEP_UP = re.compile(r"Can't keep up! .*?Running (\d+)ms or (\d+) ticks behind")
+WATCHDOG = re.compile(r"The server has (?:not responded for (\d+) seconds|stopped responding)")
+TPS_LINE = re.compile(r"TPS from last 1m, 5m, 15m: \W*?\*?(\d+(?:\.\d+)?)")
+MSPT_LINE = re.compile(r"◴\W*?(\d+(?:\.\d+)?)/\W*?(\d+(?:\.\d+)?)/\W*?(\d+(?:\.\d+)?)")
+# 日志行首的时间 [12:34:56]，用来把重放的历史输出归入正确的分钟
+LOG_TIME = re.compile(r"^\[(\d{2}):(\d{2}):(\d{2})")
+# Minecraft 的 § 颜色代码与 ANSI 转义序列
+FORMATTING = re.compile(r"§.|\x1b\[[0-9;]*m")
+
+SNAPSHOT_FILE = "lag.json"
+
+
+class MinuteBucket:
+    __slots__ = ("minute", "lag_events", "ticks_behind", "worst_ms", "watchdog", "min_tps", "max_mspt")
+
+    def __init__(self, minute: int):
+        self.minute = minute
+        self.lag_events = 0
+        self.ticks_behind = 0
+        self.worst_ms = 0
+        self.watchdog = 0
+        self.min_tps: Optional[float] = None
+        self.max_mspt: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _line_minute(line: str, now: float) -> int:
+    """行首时间所在的分钟（Unix 分钟数）；没有时间前缀时使用当前时间"""
+    match = LOG_TIME.match(line)
+    if match is None:
+        return int(now // 60)
+    local = time.localtime(now)
+    stamp = time.mktime((local.tm_year, local.tm_mon, local.tm_mday,
+                         int(match.group(1)), int(match.group(2)), int(match.group(3)), 0, 0, -1))
+    if stamp > now + 60:
+        # 跨过午夜：日志时间属于前一天
+        stamp -= 86400
+    return int(stamp // 60)
+
+
+def _split_prefix(line: str) -> Optional[Tuple[Optional[str], str, str]]:
+    """拆出 (线程名, 级别, 去掉格式代码的消息)；不是服务器日志行或是玩家聊天时返回 None"""
+    line = FORMATTING.sub("", line)
+    match = LOG_PREFIX.match(line)
+    if match is None:
+        return None
+    message = line[match.end():]
+    if message.startswith("<"):
+        return None
+    return match.group("thread"), match.group("level") or match.group("paper_level"), message
+
+
+class LagAnalyzer:
+    def __init__(self, server_name: str, settings: Optional[dict] = None):
+        self.server_name = server_name
+        self.settings = settings or Settings.lag_settings()
+        self.buckets: Deque[MinuteBucket] = deque(maxlen=max(1, int(self.settings["history_minutes"])))
+        self.last_tps: Optional[float] = None
+        # 单调递增的累计次数（供 Prometheus 的 rate() 使用），不随窗口滑动减少
+        self.lag_events_total = 0
+        self.watchdog_total = 0
+        self.dirty = False
+
+    def _bucket(self, minute: int) -> MinuteBucket:
+        if self.buckets and self.buckets[-1].minute == minute:
+            return self.buckets[-1]
+        if self.buckets and self.buckets[-1].minute > minute:
+            # 乱序的行（极少见）归入已有的最近分钟，保持 deque 有序
+            for bucket in reversed(self.buckets):
+                if bucket.minute <= minute:
+                    return bucket
+            return self.buckets[0]
+        bucket = MinuteBucket(minute)
+        self.buckets.append(bucket)
+        return bucket
+
+    def feed(self, line: str, now: Optional[float] = None) -> bool:
+        """分析一行输出，包含卡顿信息时返回 True"""
+        if "keep up" in line:
+            parts = _split_prefix(line)
+            if parts is None or parts[1] != "WARN" or parts[0] not in (None, "Server thread"):
+                return False
+            match = CANT_KEEP_UP.match(parts[2])
+            if match is None:
+                return False
+            bucket = self._bucket(_line_minute(line, now or time.time()))
+            bucket.lag_events += 1
+            self.lag_events_total += 1
+            bucket.ticks_behind += int(match.group(2))
+            bucket.worst_ms = max(bucket.worst_ms, int(match.group(1)))
+        elif "respond" in line:
+            parts = _split_prefix(line)
+            if parts is None or parts[1] != "ERROR" or (parts[0] is not None and "Watchdog" not in parts[0]):
+                return False
+            match = WATCHDOG.match(parts[2])
+            if match is None:
+                return False
+            bucket = self._bucket(_line_minute(line, now or time.time()))
+            bucket.watchdog += 1
+            self.watchdog_total += 1
+            if match.group(1):
+                bucket.worst_ms = max(bucket.worst_ms, int(match.group(1)) * 1000)
+        elif "TPS from last" in line:
+            parts = _split_prefix(line)
+            match = TPS_LINE.match(parts[2]) if parts is not None else None
+            if match is None:
+                return False
+            tps = self.last_tps = float(match.group(1))
+            bucket = self._bucket(_line_minute(line, now or time.time()))
+            bucket.min_tps = tps if bucket.min_tps is None else min(bucket.min_tps, tps)
+        elif "◴" in line:
+            parts = _split_prefix(line)
+            match = MSPT_LINE.match(parts[2]) if parts is not None else None
+            if match is None:
+                return False
+            mspt = float(match.group(3))
+            bucket = self._bucket(_line_minute(line, now or time.time()))
+            bucket.max_mspt = mspt if bucket.max_mspt is None else max(bucket.max_mspt, mspt)
+        else:
+            return False
+        self.dirty = True
+        return True
+
+    def _lagging(self, bucket: MinuteBucket) -> bool:
+        if bucket.lag_events:
+            return True
+        return bucket.min_tps is not None and bucket.min_tps < self.settings["tps_threshold"]
+
+    def status(self, now: Optional[float] = None) -> dict:
+        """
+        最近窗口内的卡顿概况
+        :return: {"server_name", "overloaded", "reason", "lagging_minutes", "lag_events", "worst_ms", "last_tps",
+                  "lag_events_total", "watchdog_total", "minutes"}
+        """
+        window = max(1, int(self.settings["window_minutes"]))
+        first_minute = int((now or time.time()) // 60) - window + 1
+        recent = [bucket for bucket in self.buckets if bucket.minute >= first_minute]
+        lagging = sum(1 for bucket in recent if self._lagging(bucket))
+        watchdog = sum(bucket.watchdog for bucket in recent)
+        reason = None
+        if watchdog:
+            reason = f"最近 {window} 分钟出现 {watchdog} 次看门狗警告"
+        elif lagging >= self.settings["overloaded_minutes"]:
+            reason = f"最近 {window} 分钟中有 {lagging} 分钟出现卡顿"
+        return {
+            "server_name": self.server_name,
+            "overloaded": reason is not None,
+            "reason": reason,
+            "lagging_minutes": lagging,
+            "lag_events": sum(bucket.lag_events for bucket in recent),
+            "worst_ms": max((bucket.worst_ms for bucket in recent), default=0),
+            "last_tps": self.last_tps,
+            "lag_events_total": self.lag_events_total,
+            "watchdog_total": self.watchdog_total,
+            "minutes": [bucket.to_dict() for bucket in self.buckets],
+        }
+
+    def save(self, run_dir: Optional[str] = None) -> None:
+        path = os.path.join(run_dir or str(Settings.RUN_DIR / self.server_name), SNAPSHOT_FILE)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(dict(self.status(), updated_at=time.time()), f)
+            os.replace(tmp_path, path)
+            self.dirty = False
+        except OSError:
+            pass
+
+
+def load_status(server_name: str) -> Optional[dict]:
+    """读取 supervise 写入的卡顿概况；重新按当前时间计算窗口"""
+    try:
+        with open(Settings.RUN_DIR / server_name / SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    analyzer = LagAnalyzer(server_name)
+    analyzer.last_tps = data.get("last_tps")
+    analyzer.lag_events_total = data.get("lag_events_total", 0)
+    analyzer.watchdog_total = data.get("watchdog_total", 0)
+    for entry in data.get("minutes") or []:
+        bucket = MinuteBucket(entry["minute"])
+        for name in MinuteBucket.__slots__[1:]:
+            setattr(bucket, name, entry.get(name, getattr(bucket, name)))
+        analyzer.buckets.append(bucket)
+    return analyzer.status()
+
+
+def start_monitor(on_overload: Optional[Callable[[dict], None]] = None) -> threading.Thread:
+    """在后台线程中运行控制台中继，为每个受管服务器分析输出（supervise 使用）"""
+    import asyncio
+    from modules import Console
+
+    relay = Console.ConsoleRelay(analyze=True, on_overload=on_overload)
+    thread = threading.Thread(target=lambda: asyncio.run(relay.run()), name="lag-analyzer", daemon=True)
+    thread.start()
+    return thread
+
+
+def print_report(server_names: List[str]) -> None:
+    for name in server_names:
+        status = load_status(name)
+        if status is None:
+            print(f"{name:<24} 暂无数据（需要运行 supervise）")
+            continue
+        tps = f"{status['last_tps']:.1f}" if status["last_tps"] is not None else "-"
+        mark = f"⚠️ {status['reason']}" if status["overloaded"] else "✅ 正常"
+        print(f"{name:<24} TPS {tps:<5} 卡顿 {status['lag_events']:<4} 最长 {status['worst_ms']}ms  {mark}")
+        recent = status["minutes"][-10:]
+        for bucket in recent:
+            if bucket["lag_events"] or bucket["watchdog"] or bucket["min_tps"] is not None:
+                stamp = time.strftime("%H:%M", time.localtime(bucket["minute"] * 60))
+                extra = f" TPS {bucket['min_tps']}" if bucket["min_tps"] is not None else ""
+                print(f"{'':<24} {stamp} 卡顿 {bucket['lag_events']} 次，落后 {bucket['ticks_behind']} tick，"
+                      f"最长 {bucket['worst_ms']}ms{extra}")
+
+
+if __name__ == "__main__":
+    import sys
+    analyzer = LagAnalyzer("stdin")
+    for text in sys.stdin:
+        analyzer.feed(text)
+    print(json.dumps(analyzer.status(), indent=4, ensure_ascii=False))
@@ -1,19 +1,14 @@
-import json
 import shutil
+import sqlite3
 from tabulate import tabulate
-from modules import Settings
+from modules import Registry
 
 def load_server_list():
-    """加载 list.json 并解析 JSON"""
-    if not Settings.LIST_PATH.exists():
-        print(f"❌ 配置文件 {Settings.LIST_PATH} 不存在！")
-        return []
-
+    """从服务器注册表加载服务器列表"""
     try:
-        with open(Settings.LIST_PATH, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except json.JSONDecodeError as e:
-        print(f"❌ 解析 JSON 出错: {e}")
+        return Registry.all_servers()
+    except sqlite3.Error as e:
+        print(f"❌ 读取服务器注册表出错: {e}")
         return []
 
 def get_terminal_width():
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from modules import Settings
+
+"""
+持久化的核心信息缓存，避免每次扫描都重新探测没有变化的核心。
+1.以 (解析后的 jar 路径, 文件大小, mtime) 作为快速指纹，命中即直接复用。
+2.探测结果不只取决于 jar 本身：Forge / NeoForge 读取文件夹的 libraries/，混合端看 jar 文件名。
+  这些输入记为"文件夹上下文"，与指纹一起比较，升级 libraries/ 中的 Forge 后缓存失效。
+3.路径变了但大小相同时，计算 sha256 作为后备指纹，只用于原路径已不存在的条目（文件夹被重命名或移动），
+  两个文件夹中内容相同的启动器 jar 不会共用结果。
+4.prune() 清理已不存在的 jar 对应的条目。
+"""
+
+CACHE_VERSION = 2
+
+# Manifester 的 _inspect_libraries 读取的目录
+LIBRARY_DIRS = (
+    ("net", "neoforged", "neoforge"),
+    ("net", "neoforged", "forge"),
+    ("net", "minecraftforge", "forge"),
+)
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """流式计算文件的 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def folder_context(jar_path: str) -> str:
+    """探测结果依赖的 jar 以外的输入：jar 文件名与 libraries/ 中的 Forge / NeoForge 版本目录"""
+    server_dir = os.path.dirname(jar_path)
+    parts = [os.path.basename(jar_path)]
+    for group in LIBRARY_DIRS:
+        try:
+            with os.scandir(os.path.join(server_dir, "libraries", *group)) as entries:
+                versions = sorted(entry.name for entry in entries if entry.is_dir())
+        except OSError:
+            continue
+        parts.append("/".join(group) + ":" + ",".join(versions))
+    return "|".join(parts)
+
+
+class ManifestCache:
+    def __init__(self, cache_path: Path = Settings.CACHE_PATH):
+        self.cache_path = Path(cache_path)
+        self.entries: Dict[str, dict] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self.entries = data.get("entries", {})
+
+    @staticmethod
+    def _key(jar_path: str) -> str:
+        return str(Path(jar_path).resolve())
+
+    def lookup(self, jar_path: str) -> Optional[Dict[str, Optional[str]]]:
+        """返回缓存的核心信息；核心是新的或已改变时返回 None"""
+        key = self._key(jar_path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return None
+
+        context = folder_context(key)
+        entry = self.entries.get(key)
+        if entry and entry.get("context") != context:
+            return None
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["manifest"]
+
+        # 后备：原路径已不存在（文件夹被重命名或移动）、大小与上下文相同的条目再比较内容哈希；
+        # 同一路径只是 mtime 变了（文件被 touch）也走这里
+        candidates = [
+            e for k, e in self.entries.items()
+            if e["size"] == stat.st_size and e.get("sha256") and e.get("context") == context
+            and (k == key or not os.path.exists(k))
+        ]
+        if not candidates:
+            return None
+        sha256 = file_sha256(key)
+        for candidate in candidates:
+            if candidate["sha256"] == sha256:
+                self.store(jar_path, candidate["manifest"], sha256)
+                return candidate["manifest"]
+        return None
+
+    def store(self, jar_path: str, manifest: Dict[str, Optional[str]], sha256: Optional[str] = None) -> None:
+        """记录一个核心的探测结果，探测出错的结果不缓存"""
+        if manifest.get("server_type") in ("Error", "Unknown", None):
+            return
+        key = self._key(jar_path)
+        try:
+            stat = os.stat(key)
+            if sha256 is None:
+                sha256 = file_sha256(key)
+        except OSError:
+            return
+        self.entries[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "context": folder_context(key),
+            "sha256": sha256,
+            "manifest": dict(manifest),
+        }
+        self.dirty = True
+
+    def sha256(self, jar_path: str) -> Optional[str]:
+        """已缓存的内容哈希（仅当快速指纹仍然有效时）"""
+        entry = self.entries.get(self._key(jar_path))
+        return entry.get("sha256") if entry else None
+
+    def prune(self) -> int:
+        """移除已经不存在的 jar 的条目，返回移除数量"""
+        stale = [key for key in self.entries if not os.path.exists(key)]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self.dirty = True
+        return len(stale)
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        data = {"version": CACHE_VERSION, "entries": self.entries}
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, indent=4, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+
+if __name__ == "__main__":
+    cache = ManifestCache()
+    print(f"缓存条目: {len(cache.entries)}，清理失效条目: {cache.prune()}")
+    cache.save()
@@ -1,38 +1,276 @@
 # Manifester.py
 import subprocess
-import time
 import os
 import re
-from threading import Thread
-from typing import Dict, Optional
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional
+
+from modules import HostInspector, Metrics, Settings, Shutdown
 
 """
 由于各个核心标准也是群魔乱舞，此处实现方法更加抽象。
 1.scanner传递每个核心的路径
-2.for所有路径，逐个创建子进程，运行15秒，通过管道捕获日志，解析日志文本来获得版本信息。
-3.return log_data.解析,传递serverlistinitializer.py
+2.先以zip方式打开核心，读取 version.json / MANIFEST.MF / install.properties 等元数据（静态检测，不启动JVM）。
+3.静态检测无结果时，再创建子进程，运行15秒，通过管道捕获日志，解析日志文本来获得版本信息。
+  多个核心需要探测时，由 manifest_many 按 CPU 与可用内存决定并发数，同时探测。
+  日志逐行匹配，一旦识别出类型与版本立即结束 JVM，不必等满15秒。
+  各服务端家族以 Detector 注册（register_detector），新增核心类型不需要修改 analyze_logs。
+4.return log_data.解析,传递serverlistinitializer.py
 """
 
+MC_VERSION = r"\d+\.\d+(?:\.\d+)?"
+
+# 出现这些日志说明探测进程已经开始加载世界，停止时需要先保存
+WORLD_LOADING_MARKERS = ("Preparing level", "Preparing start region")
+
+
+class Detector:
+    """
+    一个服务端家族的日志识别器。
+    triggers 为字面量关键字：所有识别器的关键字合并成一个正则，每行只扫描一次，
+    命中关键字后才运行对应识别器的预编译 patterns。
+    patterns 使用命名分组 mc / loader / server_type；extract 可替代命名分组自行解析。
+    priority 越高越优先（混合端的日志里同样会出现 Forge 的横幅）。
+    """
+
+    def __init__(
+        self,
+        server_type: str,
+        priority: int,
+        triggers: tuple,
+        patterns: tuple = (),
+        needs_loader: bool = True,
+        conclusive: bool = True,
+        extract: Optional[Callable[["re.Match"], Dict[str, Optional[str]]]] = None,
+    ):
+        self.server_type = server_type
+        self.priority = priority
+        self.triggers = triggers
+        self.patterns = tuple(re.compile(p) if isinstance(p, str) else p for p in patterns)
+        self.needs_loader = needs_loader
+        # 为 False 时即使版本齐全也继续读日志（例如原版横幅之后仍可能出现 CraftBukkit 横幅）
+        self.conclusive = conclusive
+        self.extract = extract
+
+    def match(self, line: str) -> Optional[Dict[str, Optional[str]]]:
+        for pattern in self.patterns:
+            found = pattern.search(line)
+            if not found:
+                continue
+            if self.extract is not None:
+                return self.extract(found)
+            groups = found.groupdict()
+            return {
+                "minecraft_version": groups.get("mc"),
+                "loader_version": groups.get("loader"),
+                "server_type": groups.get("server_type"),
+            }
+        return None
+
+
+DETECTORS: List[Detector] = []
+_trigger_index: Optional[tuple] = None
+
+# 服务器启动完成，之后的日志不会再带有版本信息
+DONE_TRIGGER = 'For help, type "help"'
+
+
+def register_detector(detector: Detector) -> Detector:
+    """注册一个服务端家族识别器，新增核心类型无需修改 analyze_logs"""
+    global _trigger_index
+    DETECTORS.append(detector)
+    DETECTORS.sort(key=lambda d: d.priority, reverse=True)
+    _trigger_index = None
+    return detector
+
+
+def _compiled_triggers() -> tuple:
+    """(合并后的关键字正则, 关键字 -> 识别器列表)，注册表变化后重新生成"""
+    global _trigger_index
+    if _trigger_index is None:
+        by_trigger: Dict[str, List[Detector]] = {DONE_TRIGGER: []}
+        for detector in DETECTORS:
+            for trigger in detector.triggers:
+                by_trigger.setdefault(trigger, []).append(detector)
+        # 长关键字优先；零宽前瞻让相互重叠的关键字都能命中
+        alternatives = sorted(by_trigger, key=len, reverse=True)
+        pattern = re.compile("(?=(" + "|".join(re.escape(trigger) for trigger in alternatives) + "))")
+        _trigger_index = (pattern, by_trigger)
+    return _trigger_index
+
+
+class DetectionSession:
+    """对一次探测的日志做单遍扫描，逐行喂入，随时可以取结果"""
+
+    def __init__(self):
+        self.trigger_pattern, self.by_trigger = _compiled_triggers()
+        # server_type -> {"minecraft_version", "loader_version"}
+        self.seen: Dict[str, Dict[str, Optional[str]]] = {}
+        self.detectors: Dict[str, Detector] = {}
+        # server_type -> 已写入版本信息的最高识别器优先级
+        self.sources: Dict[str, int] = {}
+        self.done = False
+
+    def feed(self, line: str) -> bool:
+        """处理一行日志，返回是否已经可以结束探测"""
+        for found in self.trigger_pattern.finditer(line):
+            trigger = found.group(1)
+            if trigger == DONE_TRIGGER:
+                self.done = True
+            for detector in self.by_trigger[trigger]:
+                self._apply(detector, detector.match(line))
+        return self.conclusive()
+
+    def _apply(self, detector: Detector, matched: Optional[Dict[str, Optional[str]]]) -> None:
+        server_type = (matched or {}).get("server_type") or detector.server_type
+        state = self.seen.setdefault(server_type, {"minecraft_version": None, "loader_version": None})
+        known = self.detectors.get(server_type)
+        if known is None or detector.priority > known.priority:
+            self.detectors[server_type] = detector
+        if matched:
+            # 同一类型被多个识别器命中时，专用识别器的结果覆盖通用识别器
+            overrides = detector.priority > self.sources.get(server_type, -1)
+            for key in ("minecraft_version", "loader_version"):
+                if matched.get(key) and (overrides or not state[key]):
+                    state[key] = matched[key]
+            self.sources[server_type] = max(detector.priority, self.sources.get(server_type, -1))
+
+    def _best(self) -> Optional[str]:
+        if not self.seen:
+            return None
+        return max(self.seen, key=lambda server_type: self.detectors[server_type].priority)
+
+    def conclusive(self) -> bool:
+        if self.done:
+            return True
+        best = self._best()
+        if best is None:
+            return False
+        detector = self.detectors[best]
+        state = self.seen[best]
+        return (
+            detector.conclusive
+            and state["minecraft_version"] is not None
+            and (state["loader_version"] is not None or not detector.needs_loader)
+        )
+
+    def result(self) -> Dict[str, Optional[str]]:
+        best = self._best()
+        if best is None:
+            return {
+                "minecraft_version": None,
+                "server_type": "Unknown",
+                "loader_version": None
+            }
+        minecraft_version = self.seen[best]["minecraft_version"]
+        if minecraft_version is None:
+            # 家族横幅没有带版本时，借用其他横幅（如原版的 Starting minecraft server version）
+            for server_type in sorted(self.seen, key=lambda t: self.detectors[t].priority, reverse=True):
+                minecraft_version = self.seen[server_type]["minecraft_version"]
+                if minecraft_version:
+                    break
+        return {
+            "minecraft_version": minecraft_version,
+            "server_type": best,
+            "loader_version": self.seen[best]["loader_version"]
+        }
+
+
+def _extract_deerfolia(found: "re.Match") -> Dict[str, Optional[str]]:
+    """DeerFolia 双版本格式：Loading DeerFolia 1.21.4-DEV-HEAD@0561727 1.21.4-178-main@636ae0c"""
+    full_version = found.group("full")
+    alt_version = found.group("alt")
+    return {
+        "minecraft_version": full_version.split("-")[0],
+        "loader_version": f"{full_version}+{alt_version}" if alt_version else full_version.split("-", 1)[1],
+        "server_type": None,
+    }
+
+
+def _extract_craftbukkit(found: "re.Match") -> Dict[str, Optional[str]]:
+    """This server is running CraftBukkit version git-Spigot-21fe707-e1ebe52 (MC: 1.8.8)"""
+    loader_version = found.group("loader")
+    server_type = next((t for t in ("Paper", "Spigot") if t.lower() in loader_version.lower()), "CraftBukkit")
+    return {
+        "minecraft_version": found.group("mc"),
+        "loader_version": loader_version,
+        "server_type": server_type,
+    }
+
+
+for _detector in (
+    # 混合端：日志中同样会出现 Forge / Bukkit 横幅，优先级最高
+    Detector("Mohist", 90, ("Mohist - ", "com.mohistmc", " ███╗   ███╗ "),
+             (rf"Mohist - (?P<mc>{MC_VERSION})-(?P<loader>\d+)",)),
+    Detector("Arclight", 90, ("Arclight ", "io.izzel.arclight"),
+             (rf"Arclight\S* (?:\S+ )?(?P<mc>{MC_VERSION})-(?P<loader>[\w.\-]+)",)),
+    # Mod 加载器
+    Detector("Quilt", 60, ("with Quilt Loader", "org.quiltmc.loader"),
+             (r"Loading Minecraft (?P<mc>\S+) with Quilt Loader (?P<loader>\S+)",)),
+    Detector("Fabric", 50, ("with Fabric Loader", "net.fabricmc.loader"),
+             (r"Loading Minecraft (?P<mc>\S+) with Fabric Loader (?P<loader>\S+)",)),
+    Detector("NeoForge", 45, ("NeoForge mod loading", "net.neoforged"),
+             (rf"NeoForge mod loading, version (?P<loader>\S+?), for MC (?P<mc>{MC_VERSION})",)),
+    Detector("Forge", 40, ("MinecraftForge v", "Forge mod loading", "Forge Mod Loader version", "for MC "),
+             (rf"Forge mod loading, version (?P<loader>[\d.]+), for MC (?P<mc>{MC_VERSION})",
+              rf"Forge Mod Loader version (?P<loader>[\d.]+) for Minecraft (?P<mc>{MC_VERSION})",
+              r"MinecraftForge v(?P<loader>\d+\.\d+\.\d+)",
+              rf"for MC (?P<mc>{MC_VERSION})")),
+    # Bukkit 系：[bootstrap] Loading Purpur 1.21.4-2399-HEAD@62cbd47 (...) for Minecraft 1.21.4
+    Detector("DeerFolia", 35, ("Loading DeerFolia ",),
+             (r"Loading DeerFolia (?P<full>\d+\.\d+(?:\.\d+)?-\S+)(?: (?P<alt>\d+\.\d+(?:\.\d+)?-\S+))?",),
+             extract=_extract_deerfolia),
+    Detector("Leaf", 35, ("Loading Leaf ",),
+             (rf"Loading Leaf (?P<mc>{MC_VERSION})-(?P<loader>\S+)",)),
+    Detector("Purpur", 35, ("Loading Purpur ",),
+             (rf"Loading Purpur (?P<mc>{MC_VERSION})-(?P<loader>\S+)",)),
+    Detector("Folia", 35, ("Loading Folia ",),
+             (rf"Loading Folia (?P<mc>{MC_VERSION})-(?P<loader>\S+)",)),
+    Detector("Paper", 30, ("Loading Paper ", "io.papermc.paper"),
+             (rf"Loading Paper (?P<mc>{MC_VERSION})-(?P<loader>\S+)",)),
+    # 其他未登记的 Bukkit 分支，类型取自日志
+    Detector("Bukkit", 10, ("org.bukkit.craftbukkit.Main", "] Loading "),
+             (rf"\] Loading (?P<server_type>[A-Z]\w+) (?P<mc>{MC_VERSION})-(?P<loader>\S+)",)),
+    Detector("CraftBukkit", 20, ("running CraftBukkit version",),
+             (rf"running CraftBukkit version (?P<loader>\S+) \(MC: (?P<mc>{MC_VERSION})\)",),
+             extract=_extract_craftbukkit),
+    # 所有核心都会打印这一行，只作为版本线索与兜底
+    Detector("Vanilla", 0, ("Starting minecraft server version ",),
+             (r"Starting minecraft server version (?P<mc>\S+)",),
+             needs_loader=False, conclusive=False),
+):
+    register_detector(_detector)
+
+
 class ServerManifest:
     def __init__(self):
         self.process: Optional[subprocess.Popen] = None
         self.output_lines: list = []
+        self.session = DetectionSession()
+        # 识别完成、输出结束或达到行数上限时置位
+        self.finished = Event()
 
-    def launch_java_process(self, jar_path: str, timeout: int = 15) -> None:
+    def launch_java_process(self, jar_path: str, timeout: int = 15, java: str = "java") -> None:
         """启动Java进程并捕获输出"""
         if not os.path.exists(jar_path):
             raise FileNotFoundError(f"JAR文件不存在: {jar_path}")
 
         target_dir = os.path.dirname(jar_path)
-        command = ["java", "-jar", os.path.basename(jar_path),"-nogui"]
+        command = [java, "-jar", os.path.basename(jar_path),"-nogui"]
 
         try:
             self.process = subprocess.Popen(
                 command,
                 cwd=target_dir,
+                stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                universal_newlines=True
+                universal_newlines=True,
+                # 独立进程组，终止时连同子进程一起清理
+                start_new_session=(os.name != 'nt')
             )
         except Exception as e:
             raise RuntimeError(f"启动进程失败: {str(e)}") from e
@@ -42,207 +280,462 @@ class ServerManifest:
         output_thread.daemon = True
         output_thread.start()
 
-        # 等待超时或进程结束
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self.process.poll() is not None:  # 进程已退出
-                break
-            time.sleep(0.1)
+        # 等待识别完成、超时或进程结束（进程结束时输出流关闭，同样会置位）
+        self.finished.wait(timeout=timeout)
 
         self._terminate_process()
+        if self.process.stdin is not None:
+            self.process.stdin.close()
         output_thread.join(timeout=0.5)
+        if self.process.stdout is not None and not output_thread.is_alive():
+            self.process.stdout.close()
 
     def _capture_output(self, max_lines: int) -> None:
-        """异步捕获输出"""
+        """异步捕获输出，逐行匹配，识别完成即通知主线程结束进程"""
         if self.process is None or self.process.stdout is None:
+            self.finished.set()
             return
 
-        for line in iter(self.process.stdout.readline, ''):
-            self.output_lines.append(line.strip())
-            if len(self.output_lines) >= max_lines:
-                break
-
-    def _terminate_process(self) -> None:
-        """终止Java进程"""
+        try:
+            for line in iter(self.process.stdout.readline, ''):
+                line = line.strip()
+                self.output_lines.append(line)
+                if self.session.feed(line):
+                    break
+                if len(self.output_lines) >= max_lines:
+                    break
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.finished.set()
+
+    def _terminate_process(self, grace: float = 5) -> None:
+        """
+        终止Java进程，保证不留下僵尸进程。
+        探测通常在加载世界之前就已结束，直接 SIGTERM 即可；若已开始准备世界，则先通过控制台保存并停止。
+        """
         if self.process is None or self.process.poll() is not None:
             return
 
+        timeouts = dict(Settings.stop_timeouts(), terminate=grace)
+        world_loading = any(marker in line for line in self.output_lines for marker in WORLD_LOADING_MARKERS)
         try:
-            if os.name == 'nt':
-                os.system(f"taskkill /F /PID {self.process.pid}")
-            else:
-                self.process.terminate()
+            Shutdown.graceful_stop(Shutdown.PopenTarget(self.process), timeouts, use_console=world_loading)
         except Exception as e:
             raise RuntimeError(f"终止进程失败: {str(e)}") from e
 
     def analyze_logs(self) -> Dict[str, Optional[str]]:
-        """自动检测服务器类型并分析日志"""
-        log_data = '\n'.join(self.output_lines)
-
-        if 'net.fabricmc.loader' in log_data:
-            return self._analyze_fabric(log_data)
-        elif 'MinecraftForge' in log_data:
-            return self._analyze_forge(log_data)
-        elif 'org.bukkit.craftbukkit.Main' in log_data:
-            return self._analyze_bukkits(log_data)
-        elif 'Mohist' or ' ███╗   ███╗ ' in log_data:
-            return self._analyze_mohist(log_data)
+        """自动检测服务器类型并分析日志（结果由逐行喂入的 DetectionSession 给出）"""
+        return self.session.result()
 
-        return {
-            "minecraft_version": None,
-            "server_type": "Unknown",
-            "loader_version": None
-        }
 
-    @staticmethod
-    def _analyze_fabric(log_str: str) -> Dict[str, Optional[str]]:
-        pattern = r"Loading Minecraft (\d+\.\d+\.\d+) with Fabric Loader (\d+\.\d+\.\d+)"
-        match = re.search(pattern, log_str)
-        return {
-            "minecraft_version": match.group(1) if match else None,
-            "server_type": "Fabric",
-            "loader_version": match.group(2) if match else None
-        }
+class JarIntrospector:
+    """
+    不启动 JVM，直接以 zip 方式读取核心 JAR 内的元数据来识别服务端。
+    各 _inspect_* 方法按顺序尝试，第一个给出结果的方法胜出。
+    """
 
-    @staticmethod
-    def _analyze_forge(log_str: str) -> Dict[str, Optional[str]]:
-        mc_version = None
-        forge_version = None
+    # versions.list 中的条目前缀 -> 服务端类型（Paperclip 系）
+    BUNDLER_FAMILIES = {
+        "paper": "Paper",
+        "purpur": "Purpur",
+        "leaf": "Leaf",
+        "folia": "Folia",
+        "deerfolia": "DeerFolia",
+        "pufferfish": "Pufferfish",
+    }
+    # 原版核心的 Main-Class；CraftBukkit / Spigot 等同样带有 version.json，需要排除
+    VANILLA_MAIN_CLASSES = {
+        "net.minecraft.server.Main",
+        "net.minecraft.server.MinecraftServer",
+        "net.minecraft.bundler.Main",
+    }
+    # 不带服务端前缀的原版版本号：1.21.4、1.21-pre1、1.20.5-rc2、24w14a
+    VANILLA_VERSION = re.compile(rf"{MC_VERSION}(?:-(?:pre|rc)\d+)?|\d{{2}}w\d{{2}}[a-z]")
+
+    def __init__(self, jar_path: str):
+        self.jar_path = jar_path
+        self.server_dir = os.path.dirname(jar_path)
+        self.jar_name = os.path.basename(jar_path)
+        self.zf: Optional[zipfile.ZipFile] = None
+        self.names: set = set()
+        self.attributes: Dict[str, str] = {}
+
+    def inspect(self) -> Optional[Dict[str, Optional[str]]]:
+        """返回与 analyze_logs 相同结构的字典；无法识别时返回 None"""
+        try:
+            with zipfile.ZipFile(self.jar_path) as zf:
+                self.zf = zf
+                self.names = set(zf.namelist())
+                self.attributes = self._parse_manifest(self._read_text("META-INF/MANIFEST.MF") or "")
+
+                for inspector in (
+                    self._inspect_fabric_launcher,
+                    self._inspect_fabric_launch_properties,
+                    self._inspect_hybrid_manifest,
+                    self._inspect_bundler,
+                    self._inspect_paperclip_legacy,
+                    self._inspect_libraries,
+                    self._inspect_vanilla,
+                ):
+                    result = inspector()
+                    if result and result.get("server_type") and result.get("minecraft_version"):
+                        return result
+        except (zipfile.BadZipFile, OSError, KeyError):
+            return None
+        finally:
+            self.zf = None
+        return None
+
+    def _read_text(self, name: str) -> Optional[str]:
+        if self.zf is None or name not in self.names:
+            return None
+        return self.zf.read(name).decode("utf-8", errors="replace")
 
-        version_match = re.search(r"for MC (\d+\.\d+\.\d+)", log_str)
-        forge_match = re.search(r"MinecraftForge v(\d+\.\d+\.\d+)", log_str)
+    @staticmethod
+    def _parse_manifest(text: str) -> Dict[str, str]:
+        """解析 MANIFEST.MF，处理以空格开头的续行"""
+        attributes: Dict[str, str] = {}
+        last_key = None
+        for raw_line in text.splitlines():
+            if raw_line.startswith(" ") and last_key:
+                attributes[last_key] += raw_line[1:]
+                continue
+            if ":" not in raw_line:
+                # 空行之后是各 entry 的段落，只关心主段
+                if attributes and not raw_line.strip():
+                    break
+                continue
+            key, value = raw_line.split(":", 1)
+            last_key = key.strip()
+            attributes[last_key] = value.strip()
+        return attributes
 
-        if version_match:
-            mc_version = version_match.group(1)
-        if forge_match:
-            forge_version = forge_match.group(1)
+    @staticmethod
+    def _parse_properties(text: str) -> Dict[str, str]:
+        properties: Dict[str, str] = {}
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            properties[key.strip()] = value.strip()
+        return properties
 
+    @staticmethod
+    def _result(server_type: str, minecraft_version: Optional[str],
+                loader_version: Optional[str]) -> Dict[str, Optional[str]]:
         return {
-            "minecraft_version": mc_version,
-            "server_type": "Forge",
-            "loader_version": forge_version
+            "minecraft_version": minecraft_version,
+            "server_type": server_type,
+            "loader_version": loader_version
         }
-    @staticmethod
-    def _analyze_bukkits(log_str: str) -> Dict[str, Optional[str]]:
+
+    def _inspect_fabric_launcher(self) -> Optional[Dict[str, Optional[str]]]:
+        """meta.fabricmc.net 提供的 fabric-server-mc.*-launcher.*.jar 自带 install.properties"""
+        text = self._read_text("install.properties")
+        if text is None:
+            return None
+        properties = self._parse_properties(text)
+        return self._result(
+            "Fabric",
+            properties.get("game-version"),
+            properties.get("fabric-loader-version")
+        )
+
+    def _inspect_fabric_launch_properties(self) -> Optional[Dict[str, Optional[str]]]:
         """
-        分析 Bukkit 系服务端日志，支持 Purpur/Paper/Spogit 等变种
-
-        支持的日志格式：
-        1. Purpur 格式：[bootstrap] Loading Purpur 1.21.4-2399-HEAD@62cbd47 (...) for Minecraft 1.21.4
-        2. DeerFolia 格式：[bootstrap] Loading DeerFolia 1.21.4-DEV-HEAD@0561727 1.21.4-178-main@636ae0c
-        3. ...
-
-        返回结构：
-        {
-            "minecraft_version": "1.21.4",
-            "server_type": "Purpur",
-            "loader_version": "2399-HEAD@62cbd47"
-        }
+        安装器生成的 fabric-server-launch.jar / quilt-server-launch.jar:
+        版本信息藏在 MANIFEST.MF 的 Class-Path 里
         """
+        if "fabric-server-launch.properties" not in self.names and "quilt-server-launch.properties" not in self.names:
+            return None
+        class_path = self.attributes.get("Class-Path", "")
+        mc_match = re.search(rf"(?:intermediary|hashed)-({MC_VERSION})\.jar", class_path)
+        quilt_match = re.search(r"quilt-loader-([^\s/]+?)\.jar", class_path)
+        fabric_match = re.search(r"fabric-loader-([^\s/]+?)\.jar", class_path)
+        if quilt_match:
+            return self._result("Quilt", mc_match.group(1) if mc_match else None, quilt_match.group(1))
+        return self._result(
+            "Fabric",
+            mc_match.group(1) if mc_match else None,
+            fabric_match.group(1) if fabric_match else None
+        )
+
+    def _inspect_hybrid_manifest(self) -> Optional[Dict[str, Optional[str]]]:
+        """Mohist / Arclight 这类混合端，从 MANIFEST 或文件名取版本"""
+        haystack = " ".join([
+            self.attributes.get("Main-Class", ""),
+            self.attributes.get("Implementation-Title", ""),
+            self.jar_name
+        ]).lower()
+        for keyword, server_type in (("mohist", "Mohist"), ("arclight", "Arclight")):
+            if keyword not in haystack:
+                continue
+            # mohist-1.20.1-923-server.jar / arclight-forge-1.20.1-1.0.5.jar
+            match = re.search(rf"({MC_VERSION})-([\w.]+?)(?:-server)?\.jar$", self.jar_name, re.IGNORECASE)
+            version = self.attributes.get("Implementation-Version", "")
+            mc_version = match.group(1) if match else None
+            loader_version = match.group(2) if match else None
+            if not mc_version:
+                version_match = re.match(rf"({MC_VERSION})-(\S+)", version)
+                if version_match:
+                    mc_version, loader_version = version_match.group(1), version_match.group(2)
+            return self._result(server_type, mc_version, loader_version)
+        return None
+
+    def _inspect_bundler(self) -> Optional[Dict[str, Optional[str]]]:
+        """1.18+ 的原版 bundler 与 Paperclip 都带有 META-INF/versions.list"""
+        text = self._read_text("META-INF/versions.list")
+        if not text:
+            return None
+        for line in text.splitlines():
+            parts = line.split("\t")
+            if len(parts) < 3:
+                continue
+            version_id, inner_path = parts[1], parts[2]
+            family, _, mc_version = version_id.rpartition("-")
+            server_type = self.BUNDLER_FAMILIES.get(family.lower())
+            if server_type is None:
+                # 原版 bundler 的条目形如 1.21.4\t1.21.4/server-1.21.4.jar；
+                # 未知前缀（如 spigot-1.21.4-R0.1-SNAPSHOT）交给后续检测
+                if self.VANILLA_VERSION.fullmatch(version_id):
+                    return self._result("Vanilla", version_id, None)
+                return None
+            return self._result(server_type, mc_version, self._bundled_build(inner_path, mc_version))
+        return None
+
+    def _bundled_build(self, inner_path: str, mc_version: str) -> Optional[str]:
+        """读取 Paperclip 内嵌 JAR 的 Implementation-Version，例如 1.21.4-232-12ab34c"""
+        name = f"META-INF/versions/{inner_path}"
+        if self.zf is None or name not in self.names:
+            return None
+        try:
+            with self.zf.open(name) as inner_file, zipfile.ZipFile(inner_file) as inner:
+                text = inner.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+        except (zipfile.BadZipFile, KeyError, OSError):
+            return None
+        version = self._parse_manifest(text).get("Implementation-Version", "")
+        # 去掉尾部的 "(MC: 1.21.4)"
+        version = version.split(" ")[0]
+        if version.startswith(f"{mc_version}-"):
+            return version[len(mc_version) + 1:]
+        return version or None
+
+    def _inspect_paperclip_legacy(self) -> Optional[Dict[str, Optional[str]]]:
+        """1.17 及更早的 Paperclip 使用 patch.properties"""
+        text = self._read_text("patch.properties")
+        if text is None:
+            return None
+        properties = self._parse_properties(text)
+        match = re.match(r"([A-Za-z]+)-", self.jar_name)
+        server_type = self.BUNDLER_FAMILIES.get(match.group(1).lower(), "Paper") if match else "Paper"
+        build_match = re.search(rf"{re.escape(properties.get('version', ''))}-(\d+)", self.jar_name)
+        return self._result(
+            server_type,
+            properties.get("version"),
+            build_match.group(1) if build_match else None
+        )
+
+    def _inspect_libraries(self) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Forge / NeoForge 1.17+ 由 run.sh 启动，核心信息保存在服务器目录的 libraries/ 中：
+        libraries/net/minecraftforge/forge/<mc>-<forge>/
+        libraries/net/neoforged/neoforge/<neoforge>/
+        libraries/net/neoforged/forge/<mc>-<neoforge>/  (1.20.1)
+        """
+        libraries = os.path.join(self.server_dir, "libraries")
+
+        neoforge_versions = self._list_versions(os.path.join(libraries, "net", "neoforged", "neoforge"))
+        if neoforge_versions:
+            loader_version = neoforge_versions[-1]
+            return self._result("NeoForge", self._neoforge_to_minecraft(loader_version), loader_version)
+
+        for group in (("net", "neoforged", "forge"), ("net", "minecraftforge", "forge")):
+            versions = self._list_versions(os.path.join(libraries, *group))
+            # 优先选择与核心文件名匹配的版本
+            preferred = [v for v in versions if v in self.jar_name] or versions
+            if preferred:
+                mc_version, _, loader_version = preferred[-1].partition("-")
+                server_type = "NeoForge" if "neoforged" in group else "Forge"
+                return self._result(server_type, mc_version, loader_version or None)
+
+        # 旧版 forge-1.12.2-14.23.5.2859.jar
+        match = re.match(rf"forge-({MC_VERSION})-([\d.]+)", self.jar_name)
+        if match:
+            return self._result("Forge", match.group(1), match.group(2))
+        return None
 
-        patterns = [
-
-            re.compile(
-                r"Loading\s+"
-                r"(?P<server_type>Purpur|DeerFolia)\s+"
-                r"(?P<full_version>\d+\.\d+\.\d+-(?P<build>[^\s]+))"
-                r".*for Minecraft (?P<mc_version>\d+\.\d+\.\d+)",
-                re.IGNORECASE
-            ),
-
-            re.compile(
-                r"Loading\s+"
-                r"(?P<server_type>DeerFolia)\s+"
-                r"(?P<full_version>\d+\.\d+\.\d+-[^\s]+)\s+"
-                r"(?P<alt_version>\d+\.\d+\.\d+-[^\s]+)",
-                re.IGNORECASE
-            ),
-
-            re.compile(
-                r"Loading\s+"
-                r"(?P<server_type>\w+)\s+"
-                r"(?P<full_version>\d+\.\d+\.\d+-[^\s]+)",
-                re.IGNORECASE
-            )
-        ]
-
-        for line in log_str.split('\n'):
-            for pattern in patterns:
-                match = pattern.search(line)
-                if match:
-                    server_type = match.group("server_type")
-                    result = {
-                        "minecraft_version": None,
-                        "server_type": server_type,
-                        "loader_version": None
-                    }
-
-                    if pattern == patterns[0]:  # Purpur 格式
-                        result["minecraft_version"] = match.group("mc_version")
-                        result["loader_version"] = match.group("build")
-                    elif pattern == patterns[1]:  # DeerFolia 双版本格式
-                        mc_ver = match.group("full_version").split('-')[0]
-                        result["minecraft_version"] = mc_ver
-                        result["loader_version"] = f"{match.group('full_version')}+{match.group('alt_version')}"
-                    else:
-                        full_ver = match.group("full_version")
-                        ver_parts = full_ver.split('-', 1)
-                        result["minecraft_version"] = ver_parts[0]
-                        result["loader_version"] = ver_parts[1] if len(ver_parts) > 1 else None
-
-                    return result
-
-        return {
-            "minecraft_version": None,
-            "server_type": "Bukkit",
-            "loader_version": None
-        }
+    @staticmethod
+    def _list_versions(path: str) -> List[str]:
+        try:
+            with os.scandir(path) as entries:
+                versions = [entry.name for entry in entries if entry.is_dir()]
+        except OSError:
+            return []
+        return sorted(versions, key=_version_sort_key)
 
     @staticmethod
-    def _analyze_mohist(log_str: str) -> Dict[str, Optional[str]]:
-        """
-        解析 Mohist 服务器日志版本信息
-        支持的日志格式示例：
-        "Thanks for using Mohist - 1.20.1-923, Java(65.0) 21.0.5 PID: 46224"
-
-        返回结构：
-        {
-            "minecraft_version": "1.20.1",
-            "server_type": "Mohist",
-            "loader_version": "923"
-        }
-        """
-        # Match Mohist version 的正则表达式模式
-        pattern = r"Mohist - (\d+\.\d+\.\d+)-(\d+)"
-
-        # scan log
-        for line in log_str.split('\n'):
-            match = re.search(pattern, line)
-            if match:
-                return {
-                    "minecraft_version": match.group(1),
-                    "server_type": "Mohist",  # 固定值
-                    "loader_version": match.group(2)
-                }
+    def _neoforge_to_minecraft(loader_version: str) -> Optional[str]:
+        """NeoForge 21.1.77 -> Minecraft 1.21.1, 21.0.x -> 1.21"""
+        parts = loader_version.split(".")
+        if len(parts) < 2 or not parts[0].isdigit() or not parts[1].isdigit():
+            return None
+        if parts[1] == "0":
+            return f"1.{parts[0]}"
+        return f"1.{parts[0]}.{parts[1]}"
+
+    def _inspect_vanilla(self) -> Optional[Dict[str, Optional[str]]]:
+        """1.14+ 的原版核心根目录带有 version.json"""
+        main_class = self.attributes.get("Main-Class")
+        if main_class and main_class not in self.VANILLA_MAIN_CLASSES:
+            return None
+        text = self._read_text("version.json")
+        if text is None:
+            return None
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return self._result("Vanilla", data.get("id") or data.get("name"), None)
 
-        return {
-            "minecraft_version": None,
-            "server_type": "Mohist",
-            "loader_version": None
-        }
 
+def _version_sort_key(version: str) -> tuple:
+    return tuple(int(part) if part.isdigit() else -1 for part in re.split(r"[.\-]", version))
+
+
+def read_manifest(jar_path: str) -> Dict[str, str]:
+    """读取 JAR 主段的 MANIFEST.MF 属性；不是有效 JAR 时返回空字典"""
+    try:
+        with zipfile.ZipFile(jar_path) as zf:
+            text = zf.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+    except (zipfile.BadZipFile, KeyError, OSError):
+        return {}
+    return JarIntrospector._parse_manifest(text)
+
+
+def inspect_jar(jar_path: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    静态检测核心信息（不启动 JVM）
+    :param jar_path: JAR文件完整路径
+    :return: 包含服务器信息的字典，无法识别时返回 None
+    """
+    return JarIntrospector(jar_path).inspect()
 
 
 def manifest(jar_path: str, timeout: int = 15) -> Dict[str, Optional[str]]:
     """
-    对外暴露的主接口
+    对外暴露的主接口。优先静态检测，只有静态检测无结果时才启动 JVM 解析日志。
     :param jar_path: JAR文件完整路径
     :param timeout: 最大等待时间（秒）
     :return: 包含服务器信息的字典
     """
     try:
+        static_result = inspect_jar(jar_path)
+        if static_result:
+            return static_result
+    except Exception:
+        pass
+    return _probe(jar_path, timeout, probe_java())
+
+# 每个探测 JVM 预留的内存 (MiB)，用于计算并发数
+PROBE_MEMORY_MB = 1024
+
+
+def probe_workers(max_workers: Optional[int] = None) -> int:
+    """
+    根据 CPU 核心数与可用内存决定同时运行的探测 JVM 数量
+    :param max_workers: 用户指定的上限
+    """
+    workers = HostInspector.cpu_count()
+    available_mb = HostInspector.available_memory_mb()
+    if available_mb is not None:
+        workers = min(workers, available_mb // PROBE_MEMORY_MB)
+    if max_workers is not None:
+        workers = min(workers, max_workers)
+    return max(1, workers)
+
+
+def manifest_many(
+    jar_paths: List[str],
+    timeout: int = 15,
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[str, Dict[str, Optional[str]], int, int], None]] = None,
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    批量获取核心信息。静态检测在当前线程完成，其余核心放入有界线程池并发启动 JVM 探测。
+    :param jar_paths: JAR文件完整路径列表
+    :param timeout: 单个探测的最大等待时间（秒）
+    :param workers: 并发探测上限，默认由 probe_workers() 决定
+    :param on_result: 每完成一个核心时回调 (jar_path, result, done, total)
+    :return: {jar_path: 服务器信息字典}
+    """
+    results: Dict[str, Dict[str, Optional[str]]] = {}
+    total = len(jar_paths)
+    pending = []
+
+    def deliver(jar_path: str, result: Dict[str, Optional[str]]) -> None:
+        results[jar_path] = result
+        if on_result is not None:
+            on_result(jar_path, result, len(results), total)
+
+    for jar_path in jar_paths:
+        static_result = None
+        try:
+            static_result = inspect_jar(jar_path)
+        except Exception:
+            pass
+        if static_result:
+            deliver(jar_path, static_result)
+        else:
+            pending.append(jar_path)
+
+    if not pending:
+        return results
+
+    worker_count = probe_workers(workers)
+    worker_count = min(worker_count, len(pending))
+    print(f"需要启动 JVM 探测的核心: {len(pending)}，并发数: {worker_count}，预计耗时约 "
+          f"{timeout * -(-len(pending) // worker_count)} 秒")
+
+    java = probe_java()
+    with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="manifest-probe") as executor:
+        futures = {executor.submit(_probe, jar_path, timeout, java): jar_path for jar_path in pending}
+        for future in as_completed(futures):
+            deliver(futures[future], future.result())
+
+    return results
+
+
+def probe_java() -> str:
+    """
+    探测使用的 Java：需要探测的核心静态检测不出 Minecraft 版本，
+    选择已记录的最新 Java（新版本 Java 能运行的核心最多）
+    """
+    from modules.java import javaselector
+    return javaselector.java_command(None)
+
+
+def _probe_java_mismatch(jar_path: str, java: str) -> Optional[str]:
+    """核心的 class 文件版本高于探测用 Java 时返回错误说明，避免白白启动一次 JVM"""
+    from modules.java import classversion, javaselector
+
+    required = classversion.required_java(jar_path)
+    runtime = next((r for r in javaselector.registered_runtimes() if r["path"] == java), None)
+    if required and runtime and runtime["major"] < required:
+        return f"需要 Java {required}+，探测使用的 {java} 为 Java {runtime['major']}"
+    return None
+
+
+def _probe(jar_path: str, timeout: int, java: str = "java") -> Dict[str, Optional[str]]:
+    """在工作线程中启动一次 JVM 探测，错误以 Error 结果返回"""
+    try:
+        mismatch = _probe_java_mismatch(jar_path, java)
+        if mismatch:
+            raise RuntimeError(mismatch)
         manifestor = ServerManifest()
-        manifestor.launch_java_process(jar_path, timeout)
+        with Metrics.timed("probe"):
+            manifestor.launch_java_process(jar_path, timeout, java)
         return manifestor.analyze_logs()
     except Exception as e:
         return {
@@ -251,6 +744,7 @@ def manifest(jar_path: str, timeout: int = 15) -> Dict[str, Optional[str]]:
             "loader_version": str(e)
         }
 
+
 def ping():
     print("pong!")
 
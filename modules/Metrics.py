@@ -0,0 +1,282 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from modules import Settings
+
+"""
+Prometheus 文本格式的指标端点（可选，默认只监听 127.0.0.1）。
+1.后台线程每隔 interval 秒汇总一次：受管服务器的状态、重启次数、启动耗时（Supervisor），
+  CPU / 内存 / 线程 / 磁盘读写（Sampler），在线人数与延迟（Pinger），卡顿统计（LagAnalyzer），
+  以及 Jartender 自身的扫描 / 探测 / 下载耗时；结果渲染为文本缓存起来。
+2.抓取请求只返回缓存的文本，不会触发探测、Ping 或遍历文件系统。
+3.扫描、探测与下载的耗时由 observe() / timed() 以每次一行的方式追加到 run/timings.log（加文件锁，不重写文件），
+  这些操作通常发生在其他 Jartender 进程中，文件是进程间共享的途径；
+  读取时汇总，日志超过 TIMINGS_COMPACT_BYTES 后并入 run/timings.json 并清空。
+本模块在扫描与探测路径上被导入，顶层只导入标准库的轻量模块，HTTP 服务在 serve() 中才导入。
+"""
+
+TIMINGS_FILE = "timings.json"
+TIMINGS_LOG = "timings.log"
+TIMINGS_COMPACT_BYTES = 256 * 1024
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_HOST = "127.0.0.1"
+
+
+
+@contextmanager
+def _file_lock(f) -> Iterator[None]:
+    """进程间的排他锁（POSIX 为 flock；Windows 下只依赖追加写入）"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def observe(operation: str, seconds: float) -> None:
+    """记录一次操作耗时：向 timings.log 追加一行 [操作, 秒数]"""
+    line = json.dumps([operation, seconds]) + "\n"
+    try:
+        Settings.RUN_DIR.mkdir(parents=True, exist_ok=True)
+        with open(Settings.RUN_DIR / TIMINGS_LOG, "a", encoding="utf-8") as f, _file_lock(f):
+            f.write(line)
+    except OSError:
+        pass
+
+
+@contextmanager
+def timed(operation: str) -> Iterator[None]:
+    """with Metrics.timed("probe"): ...，出错时同样记录"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(operation, time.perf_counter() - started)
+
+
+def _aggregate(timings: Dict[str, dict], lines: str) -> None:
+    """把 timings.log 的内容并入汇总（次数、总耗时、最长、最近一次）"""
+    for line in lines.splitlines():
+        try:
+            operation, seconds = json.loads(line)
+        except (ValueError, TypeError):
+            # 写入被中断的半行
+            continue
+        entry = timings.setdefault(operation, {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0})
+        entry["count"] += 1
+        entry["sum"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+        entry["last"] = seconds
+
+
+def _load_snapshot() -> Dict[str, dict]:
+    try:
+        return json.loads((Settings.RUN_DIR / TIMINGS_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def load_timings() -> Dict[str, dict]:
+    """汇总各操作的耗时；日志过大时并入 timings.json（持锁进行，不会丢失并发追加的记录）"""
+    try:
+        f = open(Settings.RUN_DIR / TIMINGS_LOG, "r+", encoding="utf-8")
+    except OSError:
+        return _load_snapshot()
+    with f, _file_lock(f):
+        timings = _load_snapshot()
+        lines = f.read()
+        _aggregate(timings, lines)
+        if len(lines) > TIMINGS_COMPACT_BYTES:
+            snapshot_path = Settings.RUN_DIR / TIMINGS_FILE
+            try:
+                tmp_path = snapshot_path.with_name(f"{TIMINGS_FILE}.{os.getpid()}.tmp")
+                tmp_path.write_text(json.dumps(timings), encoding="utf-8")
+                os.replace(tmp_path, snapshot_path)
+                f.seek(0)
+                f.truncate()
+            except OSError:
+                pass
+    return timings
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsWriter:
+    """按指标名分组输出 HELP / TYPE 与样本"""
+
+    def __init__(self):
+        self.families: Dict[str, dict] = {}
+
+    def add(self, name: str, kind: str, help_text: str, value, labels: Optional[Dict[str, str]] = None,
+            family_name: Optional[str] = None) -> None:
+        """family_name 用于 summary：_count / _sum 样本归入同一个指标族"""
+        if value is None:
+            return
+        family = self.families.setdefault(family_name or name, {"kind": kind, "help": help_text, "samples": []})
+        label_text = ""
+        if labels:
+            label_text = "{" + ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items()) + "}"
+        text = str(int(value)) if isinstance(value, int) else repr(float(value))
+        family["samples"].append(f"{name}{label_text} {text}")
+
+    def render(self) -> str:
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            lines.extend(family["samples"])
+        return "\n".join(lines) + "\n"
+
+
+class MetricsCollector:
+    def __init__(self, interval: float, ping: bool = True):
+        self.interval = interval
+        self.ping = ping
+        self.body = b"# metrics not collected yet\n"
+        self.updated_at: Optional[float] = None
+
+    def _server_metrics(self, writer: MetricsWriter) -> None:
+        from modules import Supervisor, Sampler, LagAnalyzer
+
+        supervisor = Supervisor.get_supervisor()
+        sampler = Sampler.get_sampler()
+        rows = supervisor.status()
+        if not sampler.running:
+            # 没有后台采样（例如独立运行 metrics 命令）时在汇总线程中采样
+            sampler.sample_all()
+        for row in rows:
+            name = row["server_name"]
+            labels = {"server": name}
+            alive = row["state"] in Supervisor.ALIVE_STATES
+            writer.add("jartender_server_up", "gauge", "受管服务器进程是否在运行", int(alive), labels)
+            for state in (Supervisor.STARTING, Supervisor.RUNNING, Supervisor.STOPPING,
+                          Supervisor.STOPPED, Supervisor.CRASHED):
+                writer.add("jartender_server_state", "gauge", "受管服务器的当前状态",
+                           int(row["state"] == state), dict(labels, state=state))
+            writer.add("jartender_server_restarts", "gauge", "近期自动重启次数", row["restarts"], labels)
+            writer.add("jartender_server_crash_loop", "gauge", "是否因崩溃循环停止自动重启",
+                       int(bool(row["crash_loop"])), labels)
+            writer.add("jartender_server_uptime_seconds", "gauge", "本次运行时长", row["uptime"], labels)
+            writer.add("jartender_server_startup_seconds", "gauge", "最近一次启动到就绪的耗时",
+                       row.get("startup_seconds"), labels)
+
+            if alive:
+                samples = sampler.history(name, 1) or Sampler.load_snapshot(name)[-1:]
+                if samples:
+                    sample = samples[-1]
+                    writer.add("jartender_server_cpu_percent", "gauge", "进程 CPU 占用（单核为 100）", sample["cpu"], labels)
+                    writer.add("jartender_server_rss_bytes", "gauge", "进程常驻内存", sample["rss_kb"] * 1024, labels)
+                    writer.add("jartender_server_threads", "gauge", "进程线程数", sample["threads"], labels)
+                    writer.add("jartender_server_disk_read_bytes_total", "counter", "进程累计磁盘读取",
+                               sample["read_bytes"], labels)
+                    writer.add("jartender_server_disk_write_bytes_total", "counter", "进程累计磁盘写入",
+                               sample["write_bytes"], labels)
+
+            lag = LagAnalyzer.load_status(name) if alive else None
+            if lag is not None:
+                writer.add("jartender_server_lag_spikes", "gauge", "最近窗口内 Can't keep up 次数",
+                           lag["lag_events"], labels)
+                writer.add("jartender_server_lag_spikes_total", "counter",
+                           "supervise 启动以来 Can't keep up 的累计次数", lag["lag_events_total"], labels)
+                writer.add("jartender_server_watchdog_total", "counter",
+                           "supervise 启动以来看门狗警告的累计次数", lag["watchdog_total"], labels)
+                writer.add("jartender_server_lag_worst_seconds", "gauge", "最近窗口内最长的一次卡顿",
+                           lag["worst_ms"] / 1000, labels)
+                writer.add("jartender_server_overloaded", "gauge", "是否持续过载", int(lag["overloaded"]), labels)
+                writer.add("jartender_server_tps", "gauge", "最近一次 /tps 的 1 分钟 TPS", lag["last_tps"], labels)
+
+    def _ping_metrics(self, writer: MetricsWriter) -> None:
+        import asyncio
+        from modules import Pinger
+
+        for row in asyncio.run(Pinger.ping_all(Pinger.targets())):
+            labels = {"server": row["server_name"]}
+            writer.add("jartender_server_ping_up", "gauge", "Server List Ping 是否有回应", int(row["online"]), labels)
+            if row["online"]:
+                writer.add("jartender_server_players_online", "gauge", "在线玩家数", row["players_online"], labels)
+                writer.add("jartender_server_players_max", "gauge", "最大玩家数", row["players_max"], labels)
+                writer.add("jartender_server_ping_latency_seconds", "gauge", "Server List Ping 延迟",
+                           row["latency_ms"] / 1000, labels)
+
+    def refresh(self) -> None:
+        started = time.perf_counter()
+        writer = MetricsWriter()
+        writer.add("jartender_up", "gauge", "Jartender 指标端点在运行", 1)
+        try:
+            self._server_metrics(writer)
+        except Exception as e:
+            print(f"⚠️ 汇总服务器指标失败: {e}")
+        if self.ping:
+            try:
+                self._ping_metrics(writer)
+            except Exception as e:
+                print(f"⚠️ Server List Ping 失败: {e}")
+        for operation, entry in sorted(load_timings().items()):
+            labels = {"operation": operation}
+            family = "jartender_operation_duration_seconds"
+            help_text = "Jartender 操作耗时（扫描、探测、下载）"
+            writer.add(f"{family}_count", "summary", help_text, entry["count"], labels, family)
+            writer.add(f"{family}_sum", "summary", help_text, entry["sum"], labels, family)
+            writer.add("jartender_operation_max_seconds", "gauge", "单次操作最长耗时", entry["max"], labels)
+            writer.add("jartender_operation_last_seconds", "gauge", "最近一次操作耗时", entry["last"], labels)
+        writer.add("jartender_metrics_refresh_seconds", "gauge", "最近一次汇总指标的耗时",
+                   time.perf_counter() - started)
+        self.body = writer.render().encode("utf-8")
+        self.updated_at = time.time()
+
+    def run(self) -> None:
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None, interval: Optional[float] = None,
+          background: bool = True):
+    """
+    启动指标端点
+    :param background: True 时在守护线程中运行并返回 HTTP 服务器对象，False 时阻塞
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    settings = Settings.metrics_settings()
+    collector = MetricsCollector(interval or settings["interval"], settings["ping"])
+    collector.refresh()
+    threading.Thread(target=collector.run, name="metrics-collector", daemon=True).start()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = collector.body
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host or DEFAULT_HOST, port or settings["port"]), Handler)
+    server.daemon_threads = True
+    print(f"📈 指标端点: http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    if background:
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve(background=False)
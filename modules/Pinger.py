@@ -0,0 +1,203 @@
+import asyncio
+import json
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from modules import Settings, Registry, ServerProperties
+
+"""
+Minecraft Server List Ping（1.7+ 的握手 + 状态查询）客户端，基于 asyncio。
+1.所有服务器并发查询，每个查询各自有超时，一次刷新的耗时约等于最慢的那一个（或超时）。
+2.端口与地址读取各服务器的 server.properties（server-port / server-ip），未设置时为 25565 / 127.0.0.1。
+3.报告延迟（ping/pong 往返）、在线 / 最大人数、版本与 MOTD。
+数据包格式：VarInt 长度 + VarInt 包 ID + 数据，字符串为 VarInt 长度 + UTF-8。
+"""
+
+DEFAULT_TIMEOUT = 3.0
+# 等待 pong 的时间；不回应 pong 的服务器（部分代理端）在此之后改用状态查询的耗时
+PONG_TIMEOUT = 1.0
+# 握手中的协议号：-1 表示仅查询状态，服务器按自身版本回应
+STATUS_PROTOCOL = -1
+MAX_PACKET = 2 * 1024 * 1024
+
+
+def encode_varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data: bytes, offset: int = 0) -> Tuple[int, int]:
+    """从 data[offset:] 解码 VarInt，返回 (值, 新偏移)"""
+    result = 0
+    for shift in range(0, 35, 7):
+        if offset >= len(data):
+            raise ValueError("VarInt 不完整")
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            if result & 0x80000000:
+                result -= 1 << 32
+            return result, offset
+    raise ValueError("VarInt 过长")
+
+
+async def read_varint(reader: asyncio.StreamReader) -> int:
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result
+    raise ValueError("VarInt 过长")
+
+
+def encode_string(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return encode_varint(len(data)) + data
+
+
+def packet(packet_id: int, payload: bytes = b"") -> bytes:
+    body = encode_varint(packet_id) + payload
+    return encode_varint(len(body)) + body
+
+
+async def read_packet(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    length = await read_varint(reader)
+    if not 0 < length <= MAX_PACKET:
+        raise ValueError(f"数据包长度异常: {length}")
+    body = await reader.readexactly(length)
+    packet_id, offset = decode_varint(body)
+    return packet_id, body[offset:]
+
+
+def _motd_text(description) -> str:
+    """MOTD 可能是字符串或聊天组件（text + extra）"""
+    if isinstance(description, str):
+        return description
+    if isinstance(description, dict):
+        return description.get("text", "") + "".join(_motd_text(part) for part in description.get("extra", []))
+    if isinstance(description, list):
+        return "".join(_motd_text(part) for part in description)
+    return ""
+
+
+async def _status(host: str, port: int, pong_timeout: float = PONG_TIMEOUT) -> Dict[str, object]:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        handshake = (encode_varint(STATUS_PROTOCOL) + encode_string(host)
+                     + struct.pack(">H", port) + encode_varint(1))
+        writer.write(packet(0x00, handshake) + packet(0x00))
+        started = time.perf_counter()
+        await writer.drain()
+
+        packet_id, payload = await read_packet(reader)
+        status_ms = (time.perf_counter() - started) * 1000
+        if packet_id != 0x00:
+            raise ValueError(f"意外的数据包 ID: {packet_id}")
+        length, offset = decode_varint(payload)
+        status = json.loads(payload[offset:offset + length].decode("utf-8"))
+
+        # ping / pong 测量往返延迟；部分代理端不回应 pong，退回状态查询的耗时
+        latency_ms = status_ms
+        token = int(time.time() * 1000)
+        started = time.perf_counter()
+        writer.write(packet(0x01, struct.pack(">q", token)))
+        await writer.drain()
+        try:
+            packet_id, payload = await asyncio.wait_for(read_packet(reader), pong_timeout)
+            if packet_id == 0x01 and payload == struct.pack(">q", token):
+                latency_ms = (time.perf_counter() - started) * 1000
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    players = status.get("players") or {}
+    version = status.get("version") or {}
+    return {
+        "latency_ms": round(latency_ms, 1),
+        "players_online": players.get("online"),
+        "players_max": players.get("max"),
+        "version": version.get("name"),
+        "protocol": version.get("protocol"),
+        "motd": _motd_text(status.get("description")).strip(),
+    }
+
+
+async def ping(host: str, port: int, timeout: float = DEFAULT_TIMEOUT) -> Dict[str, object]:
+    """
+    查询单个服务器
+    :return: {"online", "latency_ms", "players_online", "players_max", "version", "motd", "error"}
+    """
+    try:
+        # pong 的等待只占总超时的一部分，不回应 pong 时仍能在总超时内返回状态
+        result = await asyncio.wait_for(_status(host, port, min(PONG_TIMEOUT, timeout / 3)), timeout)
+    except asyncio.TimeoutError:
+        return {"online": False, "error": f"超时（{timeout:g}s）"}
+    except (OSError, asyncio.IncompleteReadError, ValueError, UnicodeDecodeError) as e:
+        return {"online": False, "error": str(e) or type(e).__name__}
+    result.update(online=True, error=None)
+    return result
+
+
+def targets(server_names: Optional[List[str]] = None) -> List[Dict[str, object]]:
+    """注册表中的服务器及其地址、端口与超时（config.json 的 ping_timeouts 可按服务器覆盖）"""
+    config = Settings.load_config()
+    root = Settings.server_root(config)
+    default_timeout = float(config.get("ping_timeout", DEFAULT_TIMEOUT))
+    overrides = config.get("ping_timeouts") or {}
+    servers = Registry.all_servers()
+    if server_names:
+        servers = [server for server in servers if server["server_name"] in server_names]
+    result = []
+    for server in servers:
+        properties = ServerProperties.load(root / server["server_name"])
+        result.append({
+            "server_name": server["server_name"],
+            "host": ServerProperties.connect_host(properties),
+            "port": ServerProperties.server_port(properties),
+            "timeout": float(overrides.get(server["server_name"], default_timeout)),
+        })
+    return result
+
+
+async def ping_all(entries: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """并发查询，结果顺序与 entries 相同"""
+    results = await asyncio.gather(*(ping(entry["host"], entry["port"], entry["timeout"]) for entry in entries))
+    return [dict(entry, **result) for entry, result in zip(entries, results)]
+
+
+def refresh(server_names: Optional[List[str]] = None) -> List[Dict[str, object]]:
+    return asyncio.run(ping_all(targets(server_names)))
+
+
+def print_rows(rows: List[Dict[str, object]]) -> None:
+    if not rows:
+        print("注册表中没有服务器。")
+        return
+    for row in rows:
+        address = f"{row['host']}:{row['port']}"
+        if row["online"]:
+            players = f"{row['players_online']}/{row['players_max']}"
+            print(f"🟢 {row['server_name']:<24} {address:<22} {row['latency_ms']:>7.1f}ms "
+                  f"{players:<9} {row['version'] or ''}  {row['motd']}")
+        else:
+            print(f"⚫ {row['server_name']:<24} {address:<22} {row['error']}")
+
+
+if __name__ == "__main__":
+    print_rows(refresh())
@@ -0,0 +1,244 @@
+import asyncio
+import itertools
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from modules import Settings, Registry, ServerProperties
+
+"""
+RCON 客户端，基于 asyncio，用于向多个服务器批量发送命令（广播、save-all、白名单、tps 等）。
+1.地址、端口与密码读取各服务器的 server.properties（enable-rcon、rcon.port、rcon.password），未启用 RCON 的服务器跳过。
+2.连接池按 (地址, 端口, 密码) 复用已认证的连接；同一连接上的命令依次发送，连接断开时重连一次。
+3.批量发送时所有服务器并发执行，每个服务器各自有超时，结果按服务器返回。
+数据包格式（小端）：int32 长度 + int32 请求 ID + int32 类型 + 内容 + 两个 \\0。
+超过 4096 字节的回应会被拆成多个包：收到命令的第一个回应包后再发一个无效类型的"哨兵"包，读到哨兵的回应即表示命令的回应已经结束。
+原版（以及继承它的 Paper）每次 read() 只解析一个包，长度与读到的字节数不符时直接断开连接，
+所以命令与哨兵不能在同一次写入中发送；服务器发完命令的全部回应之后才会读取哨兵。
+"""
+
+AUTH = 3
+EXEC_COMMAND = 2
+RESPONSE_VALUE = 0
+# 服务器对未知类型的请求回应 "Unknown request ..."，用作回应结束的标记
+SENTINEL_TYPE = 200
+AUTH_FAILED_ID = -1
+MAX_PACKET = 1024 * 1024
+
+DEFAULT_TIMEOUT = 5.0
+
+
+class RconError(Exception):
+    """RCON 认证失败或协议错误"""
+
+
+def encode_packet(request_id: int, packet_type: int, payload: str) -> bytes:
+    body = struct.pack("<ii", request_id, packet_type) + payload.encode("utf-8") + b"\x00\x00"
+    return struct.pack("<i", len(body)) + body
+
+
+async def read_packet(reader: asyncio.StreamReader) -> Tuple[int, int, str]:
+    (length,) = struct.unpack("<i", await reader.readexactly(4))
+    if not 10 <= length <= MAX_PACKET:
+        raise RconError(f"数据包长度异常: {length}")
+    body = await reader.readexactly(length)
+    request_id, packet_type = struct.unpack("<ii", body[:8])
+    return request_id, packet_type, body[8:-2].decode("utf-8", errors="replace")
+
+
+class RconConnection:
+    """一个已认证的 RCON 连接"""
+
+    def __init__(self, host: str, port: int, password: str):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        request_id = next(self._ids)
+        self.writer.write(encode_packet(request_id, AUTH, self.password))
+        await self.writer.drain()
+        while True:
+            # 部分实现会在认证结果前先发送一个空的 RESPONSE_VALUE
+            response_id, packet_type, _ = await read_packet(self.reader)
+            if response_id == AUTH_FAILED_ID:
+                await self.close()
+                raise RconError("RCON 密码错误")
+            if packet_type == EXEC_COMMAND and response_id == request_id:
+                return
+
+    async def _execute(self, command: str) -> str:
+        request_id = next(self._ids)
+        sentinel_id = next(self._ids)
+        self.writer.write(encode_packet(request_id, EXEC_COMMAND, command))
+        await self.writer.drain()
+        parts = []
+        # 先等到命令的第一个回应包，再发送哨兵
+        while True:
+            response_id, _, payload = await read_packet(self.reader)
+            if response_id == request_id:
+                parts.append(payload)
+                break
+        self.writer.write(encode_packet(sentinel_id, SENTINEL_TYPE, ""))
+        await self.writer.drain()
+        while True:
+            response_id, _, payload = await read_packet(self.reader)
+            if response_id == sentinel_id:
+                return "".join(parts)
+            if response_id == request_id:
+                parts.append(payload)
+
+    async def command(self, command: str) -> str:
+        """发送一条命令并返回完整回应；连接已断开时重连一次"""
+        async with self.lock:
+            if not self.connected:
+                await self.connect()
+            try:
+                return await self._execute(command)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                await self.connect()
+                return await self._execute(command)
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+
+class RconPool:
+    """按 (地址, 端口, 密码) 复用连接；须在同一个事件循环中使用"""
+
+    def __init__(self):
+        self.connections: Dict[Tuple[str, int, str], RconConnection] = {}
+
+    def get(self, host: str, port: int, password: str) -> RconConnection:
+        key = (host, port, password)
+        connection = self.connections.get(key)
+        if connection is None:
+            connection = self.connections[key] = RconConnection(host, port, password)
+        return connection
+
+    async def send(self, target: Dict[str, object], command: str) -> Dict[str, object]:
+        """向单个服务器发送命令，超时或出错时丢弃该连接"""
+        connection = self.get(target["host"], target["port"], target["password"])
+        try:
+            response = await asyncio.wait_for(connection.command(command), target["timeout"])
+        except asyncio.TimeoutError:
+            await self._discard(connection)
+            return {"ok": False, "response": None, "error": f"超时（{target['timeout']:g}s）"}
+        except (OSError, asyncio.IncompleteReadError, RconError) as e:
+            await self._discard(connection)
+            return {"ok": False, "response": None, "error": str(e) or type(e).__name__}
+        return {"ok": True, "response": response, "error": None}
+
+    async def broadcast(self, targets: List[Dict[str, object]], command: str) -> List[Dict[str, object]]:
+        """并发发送，结果顺序与 targets 相同"""
+        results = await asyncio.gather(*(self.send(target, command) for target in targets))
+        return [{"server_name": target["server_name"], **result} for target, result in zip(targets, results)]
+
+    async def _discard(self, connection: RconConnection) -> None:
+        # 超时的连接上可能还有未读完的回应，不能再复用
+        self.connections.pop((connection.host, connection.port, connection.password), None)
+        await connection.close()
+
+    async def close(self) -> None:
+        for connection in list(self.connections.values()):
+            await connection.close()
+        self.connections.clear()
+
+
+def targets(server_names: Optional[List[str]] = None) -> Tuple[List[Dict[str, object]], List[str]]:
+    """
+    启用了 RCON 的服务器及其连接参数
+    :return: (目标列表, 未启用 RCON 或未设置密码的服务器名)
+    """
+    config = Settings.load_config()
+    root = Settings.server_root(config)
+    default_timeout = float(config.get("rcon_timeout", DEFAULT_TIMEOUT))
+    overrides = config.get("rcon_timeouts") or {}
+    servers = Registry.all_servers()
+    if server_names:
+        servers = [server for server in servers if server["server_name"] in server_names]
+    result, skipped = [], []
+    for server in servers:
+        properties = ServerProperties.load(root / server["server_name"])
+        password = properties.get("rcon.password", "")
+        if not ServerProperties.get_bool(properties, "enable-rcon") or not password:
+            skipped.append(server["server_name"])
+            continue
+        result.append({
+            "server_name": server["server_name"],
+            "host": ServerProperties.connect_host(properties),
+            "port": ServerProperties.get_int(properties, "rcon.port", ServerProperties.DEFAULT_RCON_PORT),
+            "password": password,
+            "timeout": float(overrides.get(server["server_name"], default_timeout)),
+        })
+    return result, skipped
+
+
+async def run_commands(entries: List[Dict[str, object]], commands: List[str]) -> List[List[Dict[str, object]]]:
+    """依次向所有目标广播多条命令，连接在命令之间复用"""
+    pool = RconPool()
+    try:
+        return [await pool.broadcast(entries, command) for command in commands]
+    finally:
+        await pool.close()
+
+
+def send(server_names: Optional[List[str]], command: str) -> List[Dict[str, object]]:
+    """同步接口：向选定的服务器（None 为全部）发送一条命令"""
+    entries, _ = targets(server_names)
+    return asyncio.run(run_commands(entries, [command]))[0]
+
+
+def print_results(results: List[Dict[str, object]]) -> None:
+    for result in results:
+        if result["ok"]:
+            response = result["response"].strip() or "（无输出）"
+            print(f"✅ {result['server_name']}: {response}")
+        else:
+            print(f"❌ {result['server_name']}: {result['error']}")
+
+
+async def _interactive(entries: List[Dict[str, object]]) -> None:
+    loop = asyncio.get_running_loop()
+    pool = RconPool()
+    try:
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line or line.strip() in (":q", ":quit"):
+                break
+            if line.strip():
+                print_results(await pool.broadcast(entries, line.strip()))
+    finally:
+        await pool.close()
+
+
+def interactive(server_names: Optional[List[str]] = None) -> None:
+    """逐行读取命令并广播到选定的服务器，连接保持复用；:q 或 Ctrl+D 退出"""
+    entries, skipped = targets(server_names)
+    if skipped:
+        print(f"⚠️ 未启用 RCON，已跳过: {', '.join(skipped)}")
+    if not entries:
+        print("没有可用的 RCON 服务器（server.properties 中需要 enable-rcon=true 并设置 rcon.password）。")
+        return
+    print(f"📡 已选择 {len(entries)} 个服务器，输入命令广播，:q 退出")
+    asyncio.run(_interactive(entries))
+
+
+if __name__ == "__main__":
+    print_results(send(None, " ".join(sys.argv[1:]) or "list"))
@@ -0,0 +1,280 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+from modules import Settings
+
+"""
+服务器注册表：SQLite 数据访问层，所有模块共用。
+1.list.json 只作为导入/导出格式保留（兼容旧版本与手动编辑）。
+2.首次打开时若表为空而 list.json 中有数据，自动导入。
+3.表结构通过 PRAGMA user_version 递增迁移，新增字段只需在 MIGRATIONS 末尾追加。
+"""
+
+# list.json 中的字段，导出时保持原有格式
+LIST_FIELDS = ("server_name", "jar_name", "jar_path", "minecraft_version", "server_type", "loader_version")
+
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS servers (
+        server_name TEXT PRIMARY KEY,
+        jar_name TEXT,
+        jar_path TEXT,
+        minecraft_version TEXT,
+        server_type TEXT,
+        loader_version TEXT,
+        jar_hash TEXT,
+        updated_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_servers_type ON servers(server_type);
+    CREATE INDEX IF NOT EXISTS idx_servers_mc_version ON servers(minecraft_version);
+    CREATE INDEX IF NOT EXISTS idx_servers_jar_hash ON servers(jar_hash);
+    """,
+    # JVM 参数方案与固定堆大小（为空时自动推算，见 JvmProfiles）
+    """
+    ALTER TABLE servers ADD COLUMN jvm_profile TEXT;
+    ALTER TABLE servers ADD COLUMN heap_mb INTEGER;
+    """,
+    # 手动指定的 Java 可执行文件（为空时按 Minecraft 版本自动选择，见 java.javaselector）
+    """
+    ALTER TABLE servers ADD COLUMN java_path TEXT;
+    """,
+    # 由 class 文件版本推算的最低 Java 主版本（见 java.classversion）
+    """
+    ALTER TABLE servers ADD COLUMN java_major INTEGER;
+    """,
+    # 启动基准的历史结果（见 Bootbench），每次运行一行，同一批次共享 batch_id
+    """
+    CREATE TABLE IF NOT EXISTS bench_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        batch_id TEXT NOT NULL,
+        server_name TEXT NOT NULL,
+        profile TEXT,
+        java_path TEXT,
+        java_major INTEGER,
+        run_index INTEGER,
+        started_at REAL,
+        ok INTEGER,
+        done_s REAL,
+        wall_done_s REAL,
+        first_tick_s REAL,
+        stop_s REAL,
+        markers TEXT,
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_bench_runs_server ON bench_runs(server_name, profile, java_path, started_at);
+    """,
+    # 启动基准使用的堆大小，不同堆大小的批次不互相比较
+    """
+    ALTER TABLE bench_runs ADD COLUMN heap_mb INTEGER;
+    """,
+]
+
+
+# 本进程中已经完成 WAL 设置与迁移的数据库文件，之后的连接跳过这两步
+_prepared: Set[str] = set()
+_prepare_lock = threading.Lock()
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for index in range(version, len(MIGRATIONS)):
+        with conn:
+            conn.executescript(MIGRATIONS[index])
+            conn.execute(f"PRAGMA user_version = {index + 1}")
+
+
+def _columns(conn: sqlite3.Connection) -> List[str]:
+    return [row[1] for row in conn.execute("PRAGMA table_info(servers)")]
+
+
+@contextmanager
+def connect(db_path: Optional[Path] = None):
+    """打开注册表连接（自动迁移表结构），用法：with Registry.connect() as conn"""
+    path = Path(db_path or Settings.REGISTRY_PATH)
+    key = str(path.resolve())
+    with closing(sqlite3.connect(str(path), timeout=10)) as conn:
+        conn.row_factory = sqlite3.Row
+        if key not in _prepared:
+            with _prepare_lock:
+                if key not in _prepared:
+                    first_open = conn.execute("PRAGMA user_version").fetchone()[0] == 0
+                    # journal_mode=WAL 写入数据库文件，对之后的所有连接都有效
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    _migrate(conn)
+                    if first_open and Settings.LIST_PATH.exists():
+                        _import_json(conn, Settings.LIST_PATH)
+                    _prepared.add(key)
+        yield conn
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict:
+    server = dict(row)
+    server.pop("updated_at", None)
+    return server
+
+
+def _upsert(conn: sqlite3.Connection, servers: Iterable[dict]) -> int:
+    columns = [c for c in _columns(conn) if c != "updated_at"]
+    count = 0
+    now = time.time()
+    for server in servers:
+        # 只更新传入的字段，未传入的字段（如手动设置的覆盖项）保持不变
+        fields = [c for c in columns if c in server]
+        placeholders = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in fields if c != "server_name")
+        conn.execute(
+            f"INSERT INTO servers ({', '.join(fields)}, updated_at) VALUES ({placeholders}, ?) "
+            f"ON CONFLICT(server_name) DO UPDATE SET {updates + ', ' if updates else ''}updated_at = excluded.updated_at",
+            [server[c] for c in fields] + [now],
+        )
+        count += 1
+    return count
+
+
+def _import_json(conn: sqlite3.Connection, list_path: Path) -> int:
+    try:
+        servers = json.loads(Path(list_path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return 0
+    with conn:
+        return _upsert(conn, (s for s in servers if isinstance(s, dict) and s.get("server_name")))
+
+
+def all_servers() -> List[dict]:
+    with connect() as conn:
+        return [_row_to_dict(row) for row in conn.execute("SELECT * FROM servers ORDER BY server_name")]
+
+
+def get_server(server_name: str) -> Optional[dict]:
+    with connect() as conn:
+        row = conn.execute("SELECT * FROM servers WHERE server_name = ?", (server_name,)).fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def find_servers(**criteria) -> List[dict]:
+    """按索引字段查询，例如 find_servers(server_type="Paper", minecraft_version="1.21.4")"""
+    with connect() as conn:
+        columns = set(_columns(conn))
+        unknown = set(criteria) - columns
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+        where = " AND ".join(f"{key} = ?" for key in criteria) or "1"
+        rows = conn.execute(f"SELECT * FROM servers WHERE {where} ORDER BY server_name", list(criteria.values()))
+        return [_row_to_dict(row) for row in rows]
+
+
+def count() -> int:
+    with connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM servers").fetchone()[0]
+
+
+def upsert_servers(servers: Iterable[dict]) -> int:
+    """在一个事务中插入或更新多个服务器"""
+    with connect() as conn:
+        with conn:
+            return _upsert(conn, servers)
+
+
+def update_server(server_name: str, **fields) -> bool:
+    """部分更新单个服务器的字段"""
+    if not fields:
+        return False
+    with connect() as conn:
+        columns = set(_columns(conn))
+        unknown = set(fields) - columns
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE servers SET {assignments}, updated_at = ? WHERE server_name = ?",
+                list(fields.values()) + [time.time(), server_name],
+            )
+        return cursor.rowcount > 0
+
+
+def delete_servers(server_names: Iterable[str]) -> int:
+    with connect() as conn:
+        with conn:
+            return conn.executemany(
+                "DELETE FROM servers WHERE server_name = ?", [(name,) for name in server_names]
+            ).rowcount
+
+
+def replace_all(servers: List[dict], keep: Iterable[str] = ()) -> None:
+    """
+    全量扫描后的结果：删除不再存在的服务器，其余 upsert（保留手动设置的字段）
+    :param keep: 仍然存在但本次未能识别的服务器，保留其原有记录（包括手动设置的字段）
+    """
+    names = [s["server_name"] for s in servers] + list(keep)
+    with connect() as conn:
+        with conn:
+            # 服务器名放进临时表，避免 NOT IN (?, ?, ...) 的参数个数随服务器数量增长
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS scanned_names (server_name TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM scanned_names")
+            conn.executemany("INSERT OR IGNORE INTO scanned_names VALUES (?)", [(name,) for name in names])
+            conn.execute("DELETE FROM servers WHERE server_name NOT IN (SELECT server_name FROM scanned_names)")
+            _upsert(conn, servers)
+
+
+BENCH_FIELDS = (
+    "batch_id", "server_name", "profile", "java_path", "java_major", "heap_mb", "run_index",
+    "started_at", "ok", "done_s", "wall_done_s", "first_tick_s", "stop_s", "markers", "error",
+)
+
+
+def add_bench_runs(runs: Iterable[dict]) -> int:
+    """记录启动基准结果；markers 以 JSON 保存"""
+    rows = [
+        [json.dumps(run[f], ensure_ascii=False) if f == "markers" and run.get(f) is not None else run.get(f)
+         for f in BENCH_FIELDS]
+        for run in runs
+    ]
+    with connect() as conn:
+        with conn:
+            conn.executemany(
+                f"INSERT INTO bench_runs ({', '.join(BENCH_FIELDS)}) VALUES ({', '.join('?' for _ in BENCH_FIELDS)})",
+                rows,
+            )
+    return len(rows)
+
+
+def bench_history(server_name: str, limit: int = 500) -> List[dict]:
+    """某个服务器最近的启动基准结果（从旧到新）"""
+    with connect() as conn:
+        rows = conn.execute(
+            "SELECT * FROM (SELECT * FROM bench_runs WHERE server_name = ? ORDER BY started_at DESC, id DESC LIMIT ?) "
+            "ORDER BY started_at, id",
+            (server_name, limit),
+        ).fetchall()
+    history = []
+    for row in rows:
+        run = dict(row)
+        run["markers"] = json.loads(run["markers"]) if run["markers"] else {}
+        history.append(run)
+    return history
+
+
+def import_json(list_path: Path = Settings.LIST_PATH) -> int:
+    """从 list.json 导入（upsert）"""
+    with connect() as conn:
+        return _import_json(conn, list_path)
+
+
+def export_json(list_path: Path = Settings.LIST_PATH) -> None:
+    """导出为原有 list.json 格式（原子写入）"""
+    servers = [{key: server.get(key) for key in LIST_FIELDS} for server in all_servers()]
+    list_path = Path(list_path)
+    tmp_path = list_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(servers, indent=4, ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(list_path)
+
+
+if __name__ == "__main__":
+    for server in all_servers():
+        print(server)
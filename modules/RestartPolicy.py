@@ -0,0 +1,106 @@
+import os
+import random
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from modules import Settings
+
+"""
+崩溃重启策略（由 Supervisor 在服务器进入 crashed 状态时调用）。
+1.window 秒内重启次数达到 max_restarts 时判定为崩溃循环，不再重启。
+2.启动后很快崩溃、且 crash-reports/ 中新的崩溃报告与上一次描述相同，说明重启无济于事，同样判定为崩溃循环。
+3.重启延迟按指数退避并加入随机抖动；多个服务器同时崩溃时由 RestartScheduler 错开重启时间，避免同时启动争抢磁盘与 CPU。
+"""
+
+CRASH_REPORT_DIR = "crash-reports"
+
+
+def find_crash_report(server_dir: Optional[str], since: Optional[float]) -> Optional[dict]:
+    """
+    服务器本次运行期间生成的最新崩溃报告
+    :return: {"path", "description"}，没有时返回 None
+    """
+    if not server_dir or since is None:
+        return None
+    report_dir = os.path.join(server_dir, CRASH_REPORT_DIR)
+    newest = None
+    try:
+        with os.scandir(report_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".txt"):
+                    continue
+                mtime = entry.stat().st_mtime
+                if mtime >= since and (newest is None or mtime > newest[0]):
+                    newest = (mtime, entry.path)
+    except OSError:
+        return None
+    if newest is None:
+        return None
+
+    description = None
+    try:
+        with open(newest[1], "r", encoding="utf-8", errors="replace") as f:
+            for _, line in zip(range(50), f):
+                if line.startswith("Description:"):
+                    description = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return {"path": newest[1], "description": description}
+
+
+class RestartPolicy:
+    def __init__(self, enabled: bool = True, max_restarts: int = 5, window: float = 600.0,
+                 base_delay: float = 5.0, max_delay: float = 300.0, jitter: float = 0.2,
+                 stagger: float = 10.0, min_uptime: float = 60.0):
+        self.enabled = enabled
+        self.max_restarts = max_restarts
+        self.window = window
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.stagger = stagger
+        self.min_uptime = min_uptime
+
+    @classmethod
+    def from_config(cls, config: Optional[dict] = None) -> "RestartPolicy":
+        return cls(**Settings.restart_policy(config))
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次（从 0 开始）重启前的等待时间"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def decide(self, restart_times: List[float], uptime: Optional[float],
+               crash: Optional[dict], previous_crash: Optional[dict]) -> Tuple[Optional[float], str]:
+        """
+        :param restart_times: 之前自动重启的时间戳
+        :return: (重启前等待的秒数, 原因)；不应重启时等待时间为 None
+        """
+        if not self.enabled:
+            return None, "自动重启已关闭"
+        now = time.time()
+        recent = [t for t in restart_times if now - t <= self.window]
+        if len(recent) >= self.max_restarts:
+            return None, f"{int(self.window)} 秒内已重启 {len(recent)} 次，判定为崩溃循环"
+        quick_crash = uptime is not None and uptime < self.min_uptime
+        if (quick_crash and crash and previous_crash and crash.get("description")
+                and crash.get("description") == previous_crash.get("description")):
+            return None, f"连续出现相同的崩溃报告: {crash['description']}"
+        return self.backoff(len(recent)), "等待退避后重启"
+
+
+class RestartScheduler:
+    """全局错开重启时间：任意两次重启之间至少间隔 stagger 秒"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_slot = 0.0
+
+    def schedule(self, delay: float, stagger: float) -> float:
+        """返回实际的重启时间戳"""
+        with self.lock:
+            at = max(time.time() + delay, self.last_slot + stagger)
+            self.last_slot = at
+            return at
@@ -0,0 +1,328 @@
+import json
+import os
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from modules import Settings
+
+"""
+受管服务器的资源采样（Linux /proc）。
+1.每隔 interval 秒读取 /proc/<pid>/stat（CPU 时间、线程数）、status（VmRSS）与 io（磁盘读写字节）。
+2.CPU% 为两次采样间 utime+stime 的增量除以墙钟时间，单核满载为 100%，多核可超过 100%。
+3.每个服务器的样本存放在定长的环形缓冲（array，预分配），内存占用固定，旧样本被覆盖。
+4.supervise 运行时在后台采样，并把最近的样本写入 run/<服务器>/resources.json，菜单与 status 命令从中读取；
+  没有守护进程时 top 命令在本进程内自行采样。
+"""
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE_KB = (os.sysconf("SC_PAGE_SIZE") // 1024) if hasattr(os, "sysconf") else 4
+SNAPSHOT_FILE = "resources.json"
+# 写入快照的最近样本数
+SNAPSHOT_SAMPLES = 60
+
+
+def read_proc(pid: int) -> Optional[Dict[str, int]]:
+    """
+    读取进程的累计资源数据；进程不存在时返回 None
+    :return: {"cpu_ticks", "rss_kb", "threads", "read_bytes", "write_bytes"}
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # comm 字段可能含空格与括号，从最后一个 ")" 之后切分
+            fields = f.read().rsplit(b")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    try:
+        # 第 3 个字段起：utime=14、stime=15、num_threads=20、rss=24
+        result = {
+            "cpu_ticks": int(fields[11]) + int(fields[12]),
+            "threads": int(fields[17]),
+            "rss_kb": int(fields[21]) * PAGE_SIZE_KB,
+            "read_bytes": 0,
+            "write_bytes": 0,
+        }
+    except (IndexError, ValueError):
+        return None
+
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    result["rss_kb"] = int(line.split()[1])
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(f"/proc/{pid}/io", "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("read_bytes", "write_bytes"):
+                    result[key] = int(value)
+    except (OSError, ValueError):
+        # io 需要与目标进程相同的用户（或 CAP_SYS_PTRACE），读不到时记为 0
+        pass
+    return result
+
+
+class SampleRing:
+    """定长时间序列：各列为预分配的 array，head 指向下一个写入位置"""
+
+    COLUMNS = (("ts", "d"), ("cpu", "f"), ("rss_kb", "q"), ("threads", "l"),
+               ("read_bytes", "q"), ("write_bytes", "q"))
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.columns = {name: array(code, [0]) * self.capacity for name, code in self.COLUMNS}
+        self.head = 0
+        self.size = 0
+
+    def append(self, sample: Dict[str, float]) -> None:
+        for name, column in self.columns.items():
+            column[self.head] = sample[name]
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        if not self.size:
+            return None
+        index = (self.head - 1) % self.capacity
+        return {name: column[index] for name, column in self.columns.items()}
+
+    def history(self, count: Optional[int] = None) -> List[Dict[str, float]]:
+        """最近 count 个样本（从旧到新）"""
+        count = self.size if count is None else min(count, self.size)
+        start = (self.head - count) % self.capacity
+        return [
+            {name: column[(start + offset) % self.capacity] for name, column in self.columns.items()}
+            for offset in range(count)
+        ]
+
+
+class Sampler:
+    def __init__(self, capacity: Optional[int] = None):
+        settings = Settings.sampler_settings()
+        self.capacity = capacity or settings["history"]
+        self.interval = settings["interval"]
+        self.rings: Dict[str, SampleRing] = {}
+        # 上一次读数：服务器名 -> (pid, 单调时间, cpu_ticks)
+        self._previous: Dict[str, tuple] = {}
+        self.lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self, server_name: str, pid: int) -> Optional[Dict[str, float]]:
+        """采样一个进程；CPU% 需要两次读数，首次读数记为 0"""
+        reading = read_proc(pid)
+        now = time.monotonic()
+        if reading is None:
+            self._previous.pop(server_name, None)
+            return None
+        previous = self._previous.get(server_name)
+        cpu = 0.0
+        if previous and previous[0] == pid and now > previous[1]:
+            cpu = (reading["cpu_ticks"] - previous[2]) / CLK_TCK / (now - previous[1]) * 100
+        self._previous[server_name] = (pid, now, reading["cpu_ticks"])
+        sample = {
+            "ts": time.time(),
+            "cpu": max(0.0, cpu),
+            "rss_kb": reading["rss_kb"],
+            "threads": reading["threads"],
+            "read_bytes": reading["read_bytes"],
+            "write_bytes": reading["write_bytes"],
+        }
+        with self.lock:
+            ring = self.rings.get(server_name)
+            if ring is None:
+                ring = self.rings[server_name] = SampleRing(self.capacity)
+            ring.append(sample)
+        return sample
+
+    def sample_all(self, persist: bool = False) -> Dict[str, Dict[str, float]]:
+        """采样所有正在运行的受管服务器"""
+        from modules import Supervisor
+
+        supervisor = Supervisor.get_supervisor()
+        results = {}
+        for row in supervisor.status():
+            if row["state"] not in Supervisor.ALIVE_STATES or not row["pid"]:
+                continue
+            sample = self.sample(row["server_name"], row["pid"])
+            if sample is None:
+                continue
+            results[row["server_name"]] = sample
+            if persist:
+                self.save_snapshot(row["server_name"])
+        return results
+
+    def current(self, server_name: str) -> Optional[Dict[str, float]]:
+        with self.lock:
+            ring = self.rings.get(server_name)
+            return ring.latest() if ring else None
+
+    def history(self, server_name: str, count: Optional[int] = None) -> List[Dict[str, float]]:
+        with self.lock:
+            ring = self.rings.get(server_name)
+            return ring.history(count) if ring else []
+
+    def save_snapshot(self, server_name: str) -> None:
+        run_dir = Settings.RUN_DIR / server_name
+        path = run_dir / SNAPSHOT_FILE
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps({
+                "interval": self.interval,
+                "samples": self.history(server_name, SNAPSHOT_SAMPLES),
+            }), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None, persist: bool = True) -> None:
+        """在后台线程中持续采样"""
+        if self.running:
+            return
+        self.interval = interval or self.interval
+
+        def loop():
+            while True:
+                self.sample_all(persist)
+                time.sleep(self.interval)
+
+        self._thread = threading.Thread(target=loop, name="sampler", daemon=True)
+        self._thread.start()
+
+
+_sampler: Optional[Sampler] = None
+
+
+def get_sampler() -> Sampler:
+    """进程内唯一的 Sampler"""
+    global _sampler
+    if _sampler is None:
+        _sampler = Sampler()
+    return _sampler
+
+
+def load_snapshot(server_name: str, max_age: Optional[float] = None) -> List[Dict[str, float]]:
+    """读取 supervise 写入的最近样本；超过 max_age 秒未更新视为过期，返回空列表"""
+    path = Settings.RUN_DIR / server_name / SNAPSHOT_FILE
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    samples = data.get("samples") or []
+    if max_age is None:
+        max_age = 3 * float(data.get("interval") or Settings.DEFAULT_SAMPLER["interval"])
+    if not samples or time.time() - samples[-1]["ts"] > max_age:
+        return []
+    return samples
+
+
+def io_rates(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    """最近两个样本间的磁盘读写速率（字节/秒）"""
+    if len(samples) < 2 or samples[-1]["ts"] <= samples[-2]["ts"]:
+        return {"read": 0.0, "write": 0.0}
+    elapsed = samples[-1]["ts"] - samples[-2]["ts"]
+    return {
+        "read": max(0.0, (samples[-1]["read_bytes"] - samples[-2]["read_bytes"]) / elapsed),
+        "write": max(0.0, (samples[-1]["write_bytes"] - samples[-2]["write_bytes"]) / elapsed),
+    }
+
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values: List[float]) -> str:
+    if not values:
+        return ""
+    top = max(values) or 1.0
+    return "".join(SPARK_CHARS[min(len(SPARK_CHARS) - 1, int(value / top * (len(SPARK_CHARS) - 1)))]
+                   for value in values)
+
+
+def _format_bytes(value: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}GiB"
+
+
+def collect(interval: float = 1.0) -> Dict[str, List[Dict[str, float]]]:
+    """
+    各运行中服务器的最近样本：优先使用 supervise 的快照，没有时在本进程采样两次（间隔 interval 秒）
+    """
+    from modules import Supervisor
+
+    names = [row["server_name"] for row in Supervisor.get_supervisor().status()
+             if row["state"] in Supervisor.ALIVE_STATES]
+    results = {name: load_snapshot(name) for name in names}
+    missing = [name for name, samples in results.items() if not samples]
+    if missing:
+        sampler = get_sampler()
+        sampler.sample_all()
+        if any(len(sampler.history(name, 2)) < 2 for name in missing):
+            time.sleep(interval)
+            sampler.sample_all()
+        for name in missing:
+            results[name] = sampler.history(name)
+    return results
+
+
+def print_table(results: Dict[str, List[Dict[str, float]]], spark_width: int = 30) -> None:
+    if not results:
+        print("当前没有正在运行的服务器。")
+        return
+    print(f"{'服务器':<22} {'CPU%':>7} {'内存':>10} {'线程':>5} {'读/s':>10} {'写/s':>10}  CPU 走势")
+    ranked = sorted(results.items(), key=lambda item: item[1][-1]["cpu"] if item[1] else 0, reverse=True)
+    for name, samples in ranked:
+        if not samples:
+            print(f"{name:<22} {'-':>7}")
+            continue
+        latest = samples[-1]
+        rates = io_rates(samples)
+        trend = sparkline([sample["cpu"] for sample in samples[-spark_width:]])
+        print(f"{name:<22} {latest['cpu']:>7.1f} {_format_bytes(latest['rss_kb'] * 1024):>10} "
+              f"{int(latest['threads']):>5} {_format_bytes(rates['read']):>10} {_format_bytes(rates['write']):>10}  {trend}")
+
+
+def top(interval: float = 2.0, count: Optional[int] = None) -> None:
+    """持续刷新的资源表，按 Ctrl+C 退出；count 为刷新次数（None 为不限）"""
+    from modules import Supervisor
+
+    sampler = get_sampler()
+    sampler.sample_all()
+    shown = 0
+    while count is None or shown < count:
+        time.sleep(interval)
+        sampler.sample_all()
+        names = [row["server_name"] for row in Supervisor.get_supervisor().status()
+                 if row["state"] in Supervisor.ALIVE_STATES]
+        if count is None:
+            print("\033[2J\033[H", end="")
+        print(time.strftime("%H:%M:%S"))
+        print_table({name: sampler.history(name) for name in names})
+        shown += 1
+
+
+def print_history(server_name: str, count: int = SNAPSHOT_SAMPLES) -> None:
+    """某个服务器的近期样本：CPU 与内存走势及逐条记录"""
+    samples = collect().get(server_name) or get_sampler().history(server_name)
+    samples = samples[-count:]
+    if not samples:
+        print(f"服务器 {server_name} 未在运行或还没有样本。")
+        return
+    print(f"CPU  {sparkline([sample['cpu'] for sample in samples])}")
+    print(f"内存 {sparkline([sample['rss_kb'] for sample in samples])}")
+    for sample in samples:
+        print(f"{time.strftime('%H:%M:%S', time.localtime(sample['ts']))}  CPU {sample['cpu']:>6.1f}%  "
+              f"内存 {_format_bytes(sample['rss_kb'] * 1024):>9}  线程 {int(sample['threads'])}")
+
+
+if __name__ == "__main__":
+    print_table(collect())
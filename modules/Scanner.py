@@ -1,91 +1,226 @@
 import os
+import re
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-from jartender import BColors
+from modules.Colors import BColors
+from modules import Manifester
 
 
-def scan_core(path: str) -> dict:
-    print(f"hi, doing at {path}")
+# 有效服务器目录必须同时包含的文件/目录
+SERVER_MARKERS = frozenset({'eula.txt', 'server.properties', 'libraries'})
+
+
+def inspect_folder(folder_path: str) -> dict:
+    """
+    检查单个文件夹，可在线程池中并发执行（只做 IO，不做交互与输出）
+    :param folder_path: 服务器文件夹路径
+    :return: {"folder", "status": ok/invalid/no_jar/error, "jar_files", "error"}
+    """
+    folder = os.path.basename(folder_path)
+    result = {"folder": folder, "status": "ok", "jar_files": [], "error": None}
+
+    try:
+        with os.scandir(folder_path) as entries:
+            names = set()
+            jar_files = []
+            for entry in entries:
+                names.add(entry.name)
+                if entry.name.endswith('.jar') and 'installer' not in entry.name.lower():
+                    jar_files.append(entry.name)
+    except OSError as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+        return result
+
+    # 检查是否为有效的服务器目录
+    mohist_jars = [jar for jar in jar_files if 'mohist' in jar.lower()]
+    is_mohist = 'libraries' in names and bool(mohist_jars)
+
+    if not is_mohist and not SERVER_MARKERS <= names:
+        result["status"] = "invalid"
+        return result
+
+    if not jar_files:
+        result["status"] = "no_jar"
+        return result
+
+    # 处理 Mohist 核心的特殊条件：优先选择 Mohist 核心
+    result["jar_files"] = sorted(mohist_jars if is_mohist else jar_files)
+    return result
+
+
+# 常见核心文件名
+CORE_NAME_PATTERN = re.compile(
+    r"paper|purpur|leaf|folia|pufferfish|spigot|craftbukkit|mohist|arclight|"
+    r"fabric-server|quilt-server|neoforge|forge|minecraft_server|^server\.jar$",
+    re.IGNORECASE
+)
+
+# 已知的服务端入口类
+KNOWN_MAIN_CLASSES = frozenset({
+    "net.minecraft.server.Main",
+    "net.minecraft.server.MinecraftServer",
+    "net.minecraft.bundler.Main",
+    "io.papermc.paperclip.Main",
+    "io.papermc.paperclip.Paperclip",
+    "net.fabricmc.installer.ServerLauncher",
+    "net.fabricmc.loader.launch.server.FabricServerLauncher",
+    "net.fabricmc.loader.impl.launch.server.FabricServerLauncher",
+    "org.quiltmc.loader.impl.launch.server.QuiltServerLauncher",
+    "org.bukkit.craftbukkit.Main",
+    "com.mohistmc.MohistMCStart",
+    "io.izzel.arclight.server.Launcher",
+    "net.minecraftforge.bootstrap.shim.Main",
+})
+
+# 第一名与第二名分差小于该值时视为无法确定
+AMBIGUITY_MARGIN = 30
+
+
+def rank_jars(folder_path: str, jar_files: list, previous: Optional[str] = None) -> List[Tuple[int, str]]:
+    """
+    为候选核心打分并按分数降序排列
+    1.上次为该文件夹选择的核心 +100
+    2.MANIFEST.MF 中的 Main-Class 为已知入口 +60，其他可执行 JAR +10，没有 Main-Class（库文件）-50
+    3.文件名匹配常见核心名称 +40
+    4.文件大小 +0~20（核心通常比插件/工具类 JAR 更大）
+    """
+    ranked = []
+    for jar in jar_files:
+        jar_path = os.path.join(folder_path, jar)
+        score = 0
+        if previous and jar == previous:
+            score += 100
+
+        main_class = Manifester.read_manifest(jar_path).get("Main-Class")
+        if main_class in KNOWN_MAIN_CLASSES:
+            score += 60
+        elif main_class:
+            score += 10
+        else:
+            score -= 50
+
+        if CORE_NAME_PATTERN.search(jar):
+            score += 40
+
+        try:
+            size_mb = os.path.getsize(jar_path) / (1024 * 1024)
+            score += min(20, int(5 * math.log2(1 + size_mb)))
+        except OSError:
+            pass
+
+        ranked.append((score, jar))
+
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return ranked
+
+
+def select_jar(folder: str, jar_files: list) -> str:
+    """多个 JAR 文件时由用户手动选择"""
+    if len(jar_files) == 1:
+        return jar_files[0]
+
+    print(f"{BColors.FAIL}❌ 文件夹 {folder} 中存在多个 JAR 文件，请手动选择：{BColors.ENDC}")
+    for idx, jar in enumerate(jar_files, start=1):
+        print(f"{BColors.OKGREEN}{idx}. {jar}{BColors.ENDC}")
+
+    while True:
+        try:
+            choice = int(input(f"{BColors.WARNING}⚠️ 请输入序号选择核心 JAR 文件: {BColors.ENDC}"))
+            if 1 <= choice <= len(jar_files):
+                return jar_files[choice - 1]
+            print(f"{BColors.WARNING}⚠️ 请输入 1 到 {len(jar_files)} 之间的数字{BColors.ENDC}")
+        except ValueError:
+            print(f"{BColors.WARNING}⚠️ 请输入有效的数字{BColors.ENDC}")
+
+
+def list_server_folders(path: str) -> list:
+    """单次 scandir 列出根目录下的文件夹，复用 DirEntry 缓存的类型信息"""
+    with os.scandir(path) as entries:
+        return sorted(entry.path for entry in entries if entry.is_dir())
+
+
+def scan_core(
+    path: str,
+    workers: Optional[int] = None,
+    interactive: bool = True,
+    previous: Optional[Dict[str, str]] = None,
+    summary: Optional[dict] = None,
+) -> dict:
     """
     扫描指定路径下的服务器文件夹，识别并选择核心 JAR 文件
     实际上实现方法非常抽象。
     :param path: 服务器根目录路径
+    :param workers: 并发检查文件夹的线程数（网络存储上每次 stat 都很慢）
+    :param interactive: 为 False 时不询问用户，自动选择得分最高的核心
+    :param previous: {文件夹: 上次选择的核心}，参与打分
+    :param summary: 传入字典时记录 skipped / ambiguous 供机器读取
     :return: 包含服务器名称和对应核心 JAR 文件的字典
     """
     """
-    1.listdir>current_server
+    1.scandir>服务器文件夹（并发检查每个文件夹）
     2.移除current_server列表内所有不endwith .jar的项目
     3.移除包含install的项目
-    4.若只剩一个项目，就完成核心的识别。否则用户手动选择。
+    4.若只剩一个项目，就完成核心的识别。否则按打分排序，交互模式下由用户手动选择，无人值守模式下自动选择第一名。
     """
+    previous = previous or {}
+    if summary is not None:
+        summary.setdefault("skipped", [])
+        summary.setdefault("ambiguous", [])
     if not os.path.exists(path):
         raise FileNotFoundError(f"路径不存在: {path}")
 
     server_dict = {}
-    scanned_folders = os.listdir(path)
-    print(scanned_folders)
+    folder_paths = list_server_folders(path)
 
-    if scanned_folders == []:
+    if not folder_paths:
         print(f"❌没有于{path}找到服务器!")
+        return server_dict
 
-    for folder in scanned_folders:
-        folder_path = os.path.join(path, folder)
-        if not os.path.isdir(folder_path):
-            continue  # 跳过非目录项
+    max_workers = workers or min(32, len(folder_paths))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scanner") as executor:
+        # map 保持原有顺序，交互与输出仍在主线程中依次进行
+        inspected = list(executor.map(inspect_folder, folder_paths))
 
+    for result in inspected:
+        folder = result["folder"]
         print(f"\n{BColors.OKBLUE}正在扫描文件夹: {folder}{BColors.ENDC}")
-        current_server = os.listdir(folder_path)
 
-        # 检查是否为有效的服务器目录
-        is_mohist = 'libraries' in current_server and any(
-            'mohist' in item.lower() and item.endswith('.jar')
-            for item in current_server
-        )
-
-        if not is_mohist and not all(item in current_server for item in ['eula.txt', 'server.properties', 'libraries']):
+        if result["status"] != "ok" and summary is not None:
+            summary["skipped"].append({"folder": folder, "reason": result["status"], "error": result["error"]})
+        if result["status"] == "error":
+            print(f"{BColors.FAIL}❌ 读取文件夹 {folder} 失败: {result['error']}{BColors.ENDC}")
+            continue
+        if result["status"] == "invalid":
             print(f"{BColors.WARNING}⚠️ 文件夹 {folder} 不是有效的服务器目录，跳过{BColors.ENDC}")
             continue
-
-        # 过滤 JAR 文件
-        jar_files = [
-            item for item in current_server
-            if item.endswith('.jar') and 'installer' not in item.lower()
-        ]
-
-        if not jar_files:
+        if result["status"] == "no_jar":
             print(f"{BColors.FAIL}❌ 文件夹 {folder} 中未找到有效的 JAR 文件{BColors.ENDC}")
             continue
 
-        # 处理 Mohist 核心的特殊条件
-        if is_mohist:
-            mohist_jars = [jar for jar in jar_files if 'mohist' in jar.lower()]
-            if mohist_jars:
-                jar_files = mohist_jars  # 优先选择 Mohist 核心
-
-        # 处理多个 JAR 文件的情况
+        jar_files = result["jar_files"]
         if len(jar_files) > 1:
-            print(f"{BColors.FAIL}❌ 文件夹 {folder} 中存在多个 JAR 文件，请手动选择：{BColors.ENDC}")
-            for idx, jar in enumerate(jar_files, start=1):
-                print(f"{BColors.OKGREEN}{idx}. {jar}{BColors.ENDC}")
-
-            while True:
-                try:
-                    choice = int(input(f"{BColors.WARNING}⚠️ 请输入序号选择核心 JAR 文件: {BColors.ENDC}"))
-                    if 1 <= choice <= len(jar_files):
-                        selected_jar = jar_files[choice - 1]
-                        break
-                    print(f"{BColors.WARNING}⚠️ 请输入 1 到 {len(jar_files)} 之间的数字{BColors.ENDC}")
-                except ValueError:
-                    print(f"{BColors.WARNING}⚠️ 请输入有效的数字{BColors.ENDC}")
-        else:
-            selected_jar = jar_files[0]
-
+            ranked = rank_jars(os.path.join(path, folder), jar_files, previous.get(folder))
+            jar_files = [jar for _, jar in ranked]
+            if not interactive:
+                if ranked[0][0] - ranked[1][0] < AMBIGUITY_MARGIN:
+                    print(f"{BColors.WARNING}⚠️ 文件夹 {folder} 中的核心无法确定，已暂选 {jar_files[0]}{BColors.ENDC}")
+                    if summary is not None:
+                        summary["ambiguous"].append({
+                            "folder": folder,
+                            "selected": jar_files[0],
+                            "candidates": [{"jar": jar, "score": score} for score, jar in ranked],
+                        })
+                jar_files = jar_files[:1]
+
+        selected_jar = select_jar(folder, jar_files)
         print(f"{BColors.OKGREEN}✅ 已选择 {selected_jar} 为 {folder} 的核心 JAR 文件{BColors.ENDC}")
         server_dict[folder] = selected_jar
 
     return server_dict
 
-
-
 if __name__ == "__main__":
     path = r"C:\Users\tempusr\Documents\Jartender\Servers"
     try:
@@ -1,21 +1,10 @@
-import os
 import subprocess
 import sys
 from pathlib import Path
 
-class BColors:
-    HEADER = '\033[95m'
-    OKBLUE = '\033[94m'
-    OKCYAN = '\033[96m'
-    OKGREEN = '\033[38;2;120;200;120m'
-    LOGOYELLOW = '\033[38;2;200;180;100m'
-    WARNING = '\033[93m'
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-
-from modules import FabricCrawler, Contractor
+from modules.Colors import BColors
+from modules import FabricCrawler, Contractor, Shutdown, JvmProfiles
+from modules.java import javaselector
 
 
 def run(server_root: Path):
@@ -30,6 +19,14 @@ def run(server_root: Path):
     elif choice == "3":
         print("敬请期待")
 
+def first_run_jvm_args(java: str) -> list:
+    """首次运行使用默认 JVM 方案，堆大小按当前已在运行的服务器数量推算"""
+    from modules import Supervisor
+
+    cohosted = Supervisor.get_supervisor().running_count() + 1
+    return JvmProfiles.resolve(None, cohosted, javaselector.runtime_major(java))["args"]
+
+
 def nametag(server_root: Path):
     while True:
         name = input("名称:")
@@ -51,15 +48,17 @@ def install_fabric(server_root: Path) -> None:
     :param current_dir: 当前工作目录路径
     """
     new_dir, name = nametag(server_root)
-    server_jar = FabricCrawler.fabric_crawler(str(new_dir))[0]
+    server_jar, minecraft_version, _ = FabricCrawler.fabric_crawler(str(new_dir))
     print(server_jar)
+    java = javaselector.java_command({"minecraft_version": minecraft_version})
+    print(f"使用 Java: {java}")
     print("开始进行Fabric服务器初始化...")
 
     # 阶段1: 首次运行以生成配置文件
     try:
         print("正在执行首次初始化运行...")
         process = subprocess.Popen(
-            ["java", "-jar", server_jar],
+            [java, *first_run_jvm_args(java), "-jar", server_jar],
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
@@ -112,7 +111,8 @@ def install_fabric(server_root: Path) -> None:
     try:
         print("正在启动服务器进行世界生成...")
         process = subprocess.Popen(
-            ["java", "-jar", server_jar, "--nogui"],
+            [java, *first_run_jvm_args(java), "-jar", server_jar, "--nogui"],
+            stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
@@ -132,9 +132,9 @@ def install_fabric(server_root: Path) -> None:
 
             # 检测到世界生成后终止进程
             if "[main/INFO]: No existing world data, creating new world" in line:
-                print("检测到Fabric服务器已初始化完成，终止进程...")
+                print("检测到Fabric服务器已初始化完成，保存并停止服务器...")
                 world_created = True
-                _terminate_process(process)
+                _terminate_process(process, save=True)
                 break
 
         # 确认进程已终止
@@ -151,20 +151,16 @@ def install_fabric(server_root: Path) -> None:
     print("✅ Fabric服务器初始化完成！🎉🎈🎊")
 
 
-def _terminate_process(process: subprocess.Popen) -> None:
-    """跨平台终止进程"""
+def _terminate_process(process: subprocess.Popen, save: bool = False) -> None:
+    """
+    跨平台停止进程
+    :param save: 是否先通过控制台 save-all flush / stop 保存世界（需要以 stdin=PIPE 启动）
+    """
     try:
-        if os.name == 'nt':
-            # Windows系统
-            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], check=True)
-        else:
-            # Unix系统
-            process.terminate()
-
-        # 等待进程结束
-        process.wait(timeout=10)
-    except subprocess.TimeoutExpired:
-        process.kill()
+        target = Shutdown.PopenTarget(process, process_group=False, echo=print)
+        outcome = Shutdown.graceful_stop(target, use_console=save)
+        if outcome == Shutdown.KILLED:
+            print("服务器未在超时内退出，已强制结束。")
     except Exception as e:
         print(f"终止进程失败: {str(e)}")
         raise
@@ -1,29 +1,30 @@
-import json
-import subprocess
+import sqlite3
 from pathlib import Path
-from modules import Settings
+from typing import List, Sequence
+from modules import Settings, Registry, Supervisor, JvmProfiles, AppCDS
+from modules.java import javaselector
 
-def load_server_list():
-    """加载 list.json 并解析 JSON"""
-    if not Settings.LIST_PATH.exists():
-        print(f"❌ 配置文件 {Settings.LIST_PATH} 不存在！")
-        return []
 
-    try:
-        with open(Settings.LIST_PATH, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except json.JSONDecodeError as e:
-        print(f"❌ 解析 JSON 出错: {e}")
-        return []
+def build_command(server: dict, gui: bool, jvm: dict, java: str = "java",
+                  cds_args: Sequence[str] = ()) -> List[str]:
+    """
+    服务器的启动命令：java、JVM 方案参数、AppCDS 参数、核心与 -nogui
+    :param jvm: JvmProfiles.resolve() 的结果，与启动前显示的方案与堆大小是同一份
+    """
+    command = [java, *jvm["args"], *cds_args, "-jar", server["jar_path"]]
+    if not gui:
+        command.append("-nogui")
+    return command
+
 
 def launch(current_server, server_root: Path, gui: bool):
-    """启动指定的 Minecraft 服务器"""
-    servers = load_server_list()
-    if not servers:
+    """在后台启动指定的 Minecraft 服务器，由 Supervisor 守护"""
+    # 按主键查找匹配的服务器
+    try:
+        selected_server = Registry.get_server(current_server)
+    except sqlite3.Error as e:
+        print(f"❌ 读取服务器注册表出错: {e}")
         return
-
-    # 查找匹配的服务器
-    selected_server = next((s for s in servers if s["server_name"] == current_server), None)
     if not selected_server:
         print(f"❌ 找不到名为 '{current_server}' 的服务器！")
         return
@@ -37,18 +38,68 @@ def launch(current_server, server_root: Path, gui: bool):
     print(f"🚀 正在启动服务器: {current_server} ...")
     print(f"📂 服务器核心路径: {fullpath}")
 
+    supervisor = Supervisor.get_supervisor()
+    # 同机运行的服务器越多，分到的堆越小
+    cohosted = supervisor.running_count(exclude=current_server) + 1
+    java = javaselector.select_java(selected_server)
+    required = f"，需要 Java {java['required']}+" if java["required"] else ""
+    print(f"☕ Java: {java['path']}（{java['reason']}{required}）")
+    # 手动指定或 PATH 中的 java 没有记录主版本，探测一次以便检查方案是否可用
+    java_major = java["major"] or javaselector.runtime_major(str(java["path"]))
+    jvm = JvmProfiles.resolve(selected_server, cohosted, java_major)
+    print(f"⚙️ JVM 方案: {jvm['profile']}，堆大小: {jvm['heap_mb']} MiB")
+    cds = AppCDS.prepare(selected_server, str(java["path"]), jvm["profile"])
+    if cds["state"] == AppCDS.USE:
+        print("📦 AppCDS: 使用已有归档")
+    elif cds["state"] == AppCDS.DUMP:
+        print(f"📦 AppCDS: {cds['reason']}，服务器正常停止时生成归档")
+
+    workdir = server_root / current_server
     try:
-        workdir = server_root / current_server
-        if not gui:
-            subprocess.run(["java", "-jar", fullpath, "-nogui"], check=True, cwd=workdir)
-        elif gui:
-            subprocess.run(["java", "-jar", fullpath], check=True, cwd=workdir)
-        else:
-            print(f"❌ 未传递gui参数或参数出现问题")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ 服务器启动失败: {e}")
+        command = build_command(selected_server, gui, jvm, str(java["path"]), cds["args"])
+        managed = supervisor.start(current_server, command, str(workdir))
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
     except FileNotFoundError:
         print("❌ 未找到 Java，请确保 Java 已正确安装并添加到环境变量！")
+        return
+    except OSError as e:
+        print(f"❌ 服务器启动失败: {e}")
+        return
+
+    print(f"✅ 服务器已在后台启动 (PID {managed.pid})")
+    print(f"📜 控制台输出: {managed.log_path}")
+    return managed
+
+
+STOP_OUTCOMES = {
+    "console": "已通过控制台保存并停止",
+    "terminated": "控制台停止超时，已发送 SIGTERM",
+    "killed": "服务器无响应，已强制结束",
+    "already_exited": "服务器已经退出",
+}
+
+
+def stop(current_server) -> bool:
+    """保存世界并停止由 Supervisor 守护的服务器"""
+    print(f"⏹️ 正在保存并停止服务器: {current_server} ...")
+    outcome = Supervisor.get_supervisor().stop(current_server)
+    if outcome is None:
+        print(f"❌ 服务器 '{current_server}' 未在运行")
+        return False
+    print(f"✅ {STOP_OUTCOMES.get(outcome, outcome)}")
+    return True
+
+
+def stop_all() -> bool:
+    """并行停止所有正在运行的受管服务器"""
+    results = Supervisor.get_supervisor().stop_all()
+    if not results:
+        print("当前没有正在运行的服务器。")
+    for server_name, outcome in sorted(results.items()):
+        print(f"⏹️ {server_name}: {STOP_OUTCOMES.get(outcome, outcome)}")
+    return all(outcome != "killed" for outcome in results.values())
 
 if __name__ == "__main__":
     launch("1.21.4-Fabric", Settings.DEFAULT_SERVERS_DIR, False)  # 测试启动
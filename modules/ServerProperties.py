@@ -0,0 +1,106 @@
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+"""
+server.properties 的读写。写入时保留原有的注释、顺序与未修改的行，只替换或追加给定的键。
+"""
+
+FILE_NAME = "server.properties"
+DEFAULT_PORT = 25565
+DEFAULT_RCON_PORT = 25575
+# server-ip 为空或监听全部地址时，从本机连接
+WILDCARD_HOSTS = ("", "0.0.0.0", "::")
+
+
+def _unescape(value: str) -> str:
+    # Java properties 的常见转义：\: \= \\ 以及 \uXXXX
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char != "\\":
+            result.append(char)
+            continue
+        escaped = next(chars, "")
+        if escaped == "u":
+            code = "".join(next(chars, "") for _ in range(4))
+            try:
+                result.append(chr(int(code, 16)))
+            except ValueError:
+                result.append("\\u" + code)
+        else:
+            result.append({"n": "\n", "t": "\t", "r": "\r"}.get(escaped, escaped))
+    return "".join(result)
+
+
+def _split(line: str):
+    """拆分一行为 (键, 值)；注释或空行返回 None"""
+    stripped = line.strip()
+    if not stripped or stripped[0] in "#!":
+        return None
+    for index, char in enumerate(stripped):
+        if char in "=:" and (index == 0 or stripped[index - 1] != "\\"):
+            return stripped[:index].strip(), _unescape(stripped[index + 1:].strip())
+    return stripped, ""
+
+
+def properties_path(server_dir) -> Path:
+    return Path(server_dir) / FILE_NAME
+
+
+def load(server_dir) -> Dict[str, str]:
+    """读取服务器目录下的 server.properties；文件不存在时返回空字典"""
+    try:
+        text = properties_path(server_dir).read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return {}
+    properties = {}
+    for line in text.splitlines():
+        pair = _split(line)
+        if pair is not None:
+            properties[pair[0]] = pair[1]
+    return properties
+
+
+def update(server_dir, values: Dict[str, object]) -> None:
+    """替换或追加若干键（原子写入）"""
+    path = properties_path(server_dir)
+    try:
+        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        lines = []
+    pending = {key: ("true" if value is True else "false" if value is False else str(value))
+               for key, value in values.items()}
+    for index, line in enumerate(lines):
+        pair = _split(line)
+        if pair is not None and pair[0] in pending:
+            lines[index] = f"{pair[0]}={pending.pop(pair[0])}"
+    lines.extend(f"{key}={value}" for key, value in pending.items())
+
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def get_int(properties: Dict[str, str], key: str, default: Optional[int] = None) -> Optional[int]:
+    try:
+        return int(properties.get(key, ""))
+    except ValueError:
+        return default
+
+
+def get_bool(properties: Dict[str, str], key: str, default: bool = False) -> bool:
+    value = properties.get(key)
+    if value is None:
+        return default
+    return value.strip().lower() == "true"
+
+
+def server_port(properties: Dict[str, str]) -> int:
+    return get_int(properties, "server-port", DEFAULT_PORT) or DEFAULT_PORT
+
+
+def connect_host(properties: Dict[str, str]) -> str:
+    """从本机连接该服务器时使用的地址"""
+    host = properties.get("server-ip", "").strip()
+    return "127.0.0.1" if host in WILDCARD_HOSTS else host
@@ -1,70 +1,200 @@
-import json,os
-from modules import Settings
-
-class BColors:
-    HEADER = '\033[95m'
-    OKBLUE = '\033[94m'
-    OKCYAN = '\033[96m'
-    OKGREEN = '\033[38;2;120;200;120m'
-    LOGOYELLOW = '\033[38;2;200;180;100m'
-    WARNING = '\033[93m'
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-
-from modules import Scanner,Manifester
+import os
+import time
+from modules import Settings, Metrics
+from modules.Colors import BColors
+from modules import Scanner,Manifester,Registry
+from modules.ManifestCache import ManifestCache
+from modules.java import classversion
 
 def read_server_path(config_path: str = "config.json") -> str:
     return Settings.load_config()
 """
 1.从config文件获取serverpath
 2.使用scanner.scan获取服务器核心列表。
-3.for server_core_path,使用manifester.manifest获取服务器核心的信息。
-4.构建字典传入json。
+3.查询 manifest_cache.json，未变化的核心直接复用缓存结果。
+4.for 新增或改变的核心,使用manifester.manifest获取服务器核心的信息（优先静态检测，必要时才启动JVM）。
+5.构建字典写入注册表，并导出 list.json。
 """
-def initialize():
-    server_path = Settings.server_root(read_server_path())
-    server_core_path = Scanner.scan_core(server_path)
+def load_previous_choices() -> dict:
+    """读取上一次扫描为每个文件夹选择的核心，供无人值守模式打分"""
+    return {s["server_name"]: s["jar_name"] for s in Registry.all_servers()}
+
+
+def detect_cores(jar_paths: dict, cache: ManifestCache, force: bool = False) -> list:
+    """
+    获取一批核心的信息：未变化的核心复用缓存，其余交给 Manifester 并发探测
+    :param jar_paths: {jar_path: (folder_name, jar_file)}
+    :return: server_info 列表（完成顺序）
+    """
     result_list = []
-    eta = 15 * len(server_core_path)
-    print(BColors.WARNING + f"\n这将花费一些时间，取决于您的服务端数量。过程可能弹出服务器gui。估计大约需要花费{eta}秒。\n" + BColors.ENDC)
-    for folder_name, jar_file in server_core_path.items():
-        # 构建服务器核心路径
-        jar_path = os.path.join(server_path, folder_name, jar_file)
+
+    def collect(jar_path, manifest_data, done, total):
+        folder_name, jar_file = jar_paths[jar_path]
+        # 构建结果字典
+        server_info = {
+            "server_name": folder_name,
+            "jar_name": jar_file,
+            "jar_path": jar_path,
+            "minecraft_version": manifest_data.get("minecraft_version"),
+            "server_type": manifest_data.get("server_type"),
+            "loader_version": manifest_data.get("loader_version")
+        }
+        result_list.append(server_info)
+        print(BColors.ENDC + f"{server_info}")
+        print(BColors.OKGREEN + f"✅ [{done}/{total}] 成功处理: {folder_name}")
+
+    to_probe = []
+    for jar_path in jar_paths:
+        cached = None if force else cache.lookup(jar_path)
+        if cached is None:
+            to_probe.append(jar_path)
+        else:
+            collect(jar_path, cached, len(result_list) + 1, len(jar_paths))
+    if not force:
+        print(BColors.OKBLUE + f"缓存命中 {len(result_list)} 个，需要探测 {len(to_probe)} 个" + BColors.ENDC)
+
+    if to_probe:
+        print(BColors.WARNING + "\n大部分核心可以直接从 JAR 元数据识别；无法识别的核心需要启动约15秒，过程可能弹出服务器gui。\n" + BColors.ENDC)
+        offset = len(result_list)
+
+        def collect_probed(jar_path, manifest_data, done, total):
+            cache.store(jar_path, manifest_data)
+            collect(jar_path, manifest_data, offset + done, len(jar_paths))
+
         try:
             #一开始我想叫它manifest，现在我是真懒得改了
-            manifest_data = Manifester.manifest(jar_path)
-
-            # 构建结果字典
-            server_info = {
-                "server_name": folder_name,
-                "jar_name": jar_file,
-                "jar_path": jar_path,
-                "minecraft_version": manifest_data.get("minecraft_version"),
-                "server_type": manifest_data.get("server_type"),
-                "loader_version": manifest_data.get("loader_version")
-            }
-
-            result_list.append(server_info)
-            print(BColors.ENDC + f"{server_info}")
-            print(BColors.OKGREEN + f"✅ 成功处理: {folder_name}")
-
+            Manifester.manifest_many(to_probe, on_result=collect_probed)
         except Exception as e:
-            print(BColors.FAIL + f"❌ 处理 {folder_name} 时发生错误: {str(e)}" + BColors.OKGREEN)
-            continue
+            print(BColors.FAIL + f"❌ 探测服务器核心时发生错误: {str(e)}" + BColors.OKGREEN)
+
+    # 所需 Java 版本只进注册表，不写入 list.json
+    for server_info in result_list:
+        server_info["java_major"] = required_java_major(server_info["jar_path"], cache)
+
+    # 查找完成后再清理，重命名的文件夹才能通过内容哈希命中旧条目
+    pruned = cache.prune()
+    if pruned:
+        print(BColors.OKBLUE + f"已清理 {pruned} 个失效的缓存条目" + BColors.ENDC)
+
+    try:
+        cache.save()
+    except OSError as e:
+        print(BColors.FAIL + f"❌写入缓存失败: {str(e)}" + BColors.OKGREEN)
+
+    # 内容哈希只进注册表，不写入 list.json
+    for server_info in result_list:
+        server_info["jar_hash"] = cache.sha256(server_info["jar_path"])
+    return result_list
+
+
+def required_java_major(jar_path: str, cache: ManifestCache):
+    """核心所需的最低 Java 主版本：读取 class 文件版本，结果随核心信息一起缓存"""
+    cached = cache.lookup(jar_path)
+    if cached is not None and "java_major" in cached:
+        return cached["java_major"]
+    java_major = classversion.required_java(jar_path)
+    if cached is not None:
+        cache.store(jar_path, dict(cached, java_major=java_major), cache.sha256(jar_path))
+    return java_major
 
-    # 写入JSON文件
+
+def write_server_list(result_list: list, keep=()) -> None:
+    """全量写入注册表，并导出 list.json；keep 中的服务器保留原有记录"""
     try:
-        with open(Settings.LIST_PATH, 'w', encoding='utf-8') as f:
-            json.dump(result_list, f, indent=4, ensure_ascii=False)
-        print(BColors.OKGREEN + f"✅数据已成功写入 {Settings.LIST_PATH}")
+        Registry.replace_all(result_list, keep)
+        Registry.export_json()
+        print(BColors.OKGREEN + f"✅数据已成功写入 {Settings.REGISTRY_PATH} 与 {Settings.LIST_PATH}")
     except Exception as e:
         print(BColors.FAIL + f"❌写入文件失败: {str(e)}" + BColors.OKGREEN)
 
 
+def load_server_list() -> list:
+    return Registry.all_servers()
+
+
+def initialize(force: bool = False, unattended: bool = False) -> dict:
+    """
+    扫描服务器目录并重建 list.json
+    :param force: 忽略缓存，重新探测所有核心
+    :param unattended: 无人值守模式，多个核心时自动选择，不调用 input()
+    :return: 扫描摘要 {"servers", "skipped", "ambiguous", "errors"}，可直接序列化为 JSON
+    """
+    started = time.perf_counter()
+    server_path = Settings.server_root(read_server_path())
+    summary = {}
+    server_core_path = Scanner.scan_core(
+        server_path,
+        interactive=not unattended,
+        previous=load_previous_choices(),
+        summary=summary,
+    )
+
+    cache = ManifestCache()
+
+    # 构建服务器核心路径
+    jar_paths = {
+        os.path.join(server_path, folder_name, jar_file): (folder_name, jar_file)
+        for folder_name, jar_file in server_core_path.items()
+    }
+    result_list = detect_cores(jar_paths, cache, force)
+
+    # 按扫描顺序输出，保持 list.json 稳定
+    order = {folder_name: idx for idx, folder_name in enumerate(server_core_path)}
+    result_list.sort(key=lambda info: order[info["server_name"]])
+
+    # 探测中途出错时部分文件夹没有结果：保留它们在注册表中的原有记录，不当作已删除
+    unprocessed = [folder_name for folder_name in server_core_path if folder_name not in
+                   {info["server_name"] for info in result_list}]
+    if unprocessed:
+        print(BColors.WARNING + f"⚠️ 以下服务器未能完成识别，保留原有记录: {', '.join(unprocessed)}" + BColors.ENDC)
+
+    # 写入注册表与 JSON 文件
+    write_server_list(result_list, keep=unprocessed)
+
+    summary["servers"] = result_list
+    summary["errors"] = [s["server_name"] for s in result_list if s["server_type"] in ("Error", "Unknown")]
+    summary["errors"] += unprocessed
+    Metrics.observe("scan", time.perf_counter() - started)
+    return summary
+
+
+def refresh_servers(folder_names, force: bool = False) -> dict:
+    """
+    只重新识别受影响的服务器文件夹，并就地更新注册表与 list.json（供监视模式使用）
+    :param folder_names: 新增、删除、重命名或核心被替换的文件夹名
+    :return: {"updated": [...], "removed": [...]}
+    """
+    started = time.perf_counter()
+    server_path = Settings.server_root(read_server_path())
+    changes = {"updated": [], "removed": []}
+
+    jar_paths = {}
+    for folder in sorted(set(folder_names)):
+        folder_path = os.path.join(server_path, folder)
+        result = Scanner.inspect_folder(folder_path) if os.path.isdir(folder_path) else {"status": "missing"}
+        known = Registry.get_server(folder)
+        if result["status"] != "ok":
+            if known is not None:
+                changes["removed"].append(folder)
+                print(BColors.WARNING + f"➖ 已移除服务器: {folder}" + BColors.ENDC)
+            continue
+
+        jar_files = result["jar_files"]
+        if len(jar_files) > 1:
+            previous = known["jar_name"] if known else None
+            jar_files = [jar for _, jar in Scanner.rank_jars(folder_path, jar_files, previous)]
+        jar_paths[os.path.join(folder_path, jar_files[0])] = (folder, jar_files[0])
+
+    if changes["removed"]:
+        Registry.delete_servers(changes["removed"])
+    if jar_paths:
+        cache = ManifestCache()
+        updated = detect_cores(jar_paths, cache, force)
+        Registry.upsert_servers(updated)
+        changes["updated"] = [server_info["server_name"] for server_info in updated]
 
-if __name__ == "__main__":
-    server_path = read_server_path()['serverpath']
-    print(server_path)
-    #print(scanner.scan_core(server_path))
+    if changes["updated"] or changes["removed"]:
+        Registry.export_json()
+        print(BColors.OKGREEN + f"✅数据已成功写入 {Settings.REGISTRY_PATH} 与 {Settings.LIST_PATH}")
+    Metrics.observe("rescan", time.perf_counter() - started)
+    return changes
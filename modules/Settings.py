@@ -6,8 +6,50 @@ from typing import Tuple
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 CONFIG_PATH = PROJECT_ROOT / "config.json"
 LIST_PATH = PROJECT_ROOT / "list.json"
+CACHE_PATH = PROJECT_ROOT / "manifest_cache.json"
+REGISTRY_PATH = PROJECT_ROOT / "jartender.db"
+RUN_DIR = PROJECT_ROOT / "run"
+BENCH_DIR = PROJECT_ROOT / "bench"
+CDS_DIR = PROJECT_ROOT / "cds"
 DEFAULT_SERVERS_DIR = PROJECT_ROOT / "Servers"
 
+# 停止服务器各阶段的超时（秒），可在 config.json 的 stop_timeouts 中覆盖
+DEFAULT_STOP_TIMEOUTS = {"save": 30.0, "stop": 60.0, "terminate": 15.0, "kill": 5.0}
+
+# 崩溃自动重启策略，可在 config.json 的 restart_policy 中覆盖
+DEFAULT_RESTART_POLICY = {
+    "enabled": True,
+    "max_restarts": 5,      # window 秒内最多重启次数，超过视为崩溃循环
+    "window": 600.0,
+    "base_delay": 5.0,      # 指数退避：base_delay * 2^n，不超过 max_delay
+    "max_delay": 300.0,
+    "jitter": 0.2,          # 退避时间随机浮动的比例
+    "stagger": 10.0,        # 多个服务器同时崩溃时，相邻两次重启的最小间隔
+    "min_uptime": 60.0,     # 运行不足该时长即崩溃视为"启动即崩溃"
+}
+
+# 资源采样设置，可在 config.json 的 sampler 中覆盖
+DEFAULT_SAMPLER = {
+    "interval": 5.0,
+    "history": 720,         # 每个服务器保留的样本数，默认约 1 小时
+}
+
+# 卡顿分析设置，可在 config.json 的 lag 中覆盖
+DEFAULT_LAG = {
+    "window_minutes": 5,        # 判断持续过载的时间窗口
+    "overloaded_minutes": 3,    # 窗口内出现卡顿的分钟数达到该值视为持续过载
+    "tps_threshold": 18.0,      # /tps 低于该值的分钟也算卡顿
+    "history_minutes": 60,      # 每个服务器保留的分钟统计数
+}
+
+# Prometheus 指标端点，可在 config.json 的 metrics 中覆盖；enabled 为 true 时随 supervise 启动
+DEFAULT_METRICS = {
+    "enabled": False,
+    "port": 9465,
+    "interval": 15.0,           # 汇总间隔（秒），抓取只读取最近一次汇总的结果
+    "ping": True,               # 汇总时通过 Server List Ping 获取在线人数
+}
+
 
 def ensure_bootstrap_files() -> Tuple[bool, bool]:
     """
@@ -42,3 +84,47 @@ def save_config(config: dict) -> None:
 def server_root(config: dict | None = None) -> Path:
     cfg = config if config is not None else load_config()
     return Path(cfg["serverpath"]).expanduser()
+
+
+def _merged_section(key: str, defaults: dict, config: dict | None) -> dict:
+    """默认值与 config.json 中对应小节合并，类型不符的值忽略"""
+    merged = dict(defaults)
+    if config is None:
+        try:
+            config = load_config()
+        except (OSError, json.JSONDecodeError):
+            config = {}
+    for name, value in (config.get(key) or {}).items():
+        if name not in merged:
+            continue
+        if isinstance(merged[name], bool):
+            if isinstance(value, bool):
+                merged[name] = value
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+            merged[name] = type(merged[name])(value)
+    return merged
+
+
+def stop_timeouts(config: dict | None = None) -> dict:
+    """停止流程的超时设置：默认值与 config.json 中 stop_timeouts 合并"""
+    return _merged_section("stop_timeouts", DEFAULT_STOP_TIMEOUTS, config)
+
+
+def restart_policy(config: dict | None = None) -> dict:
+    """崩溃重启策略：默认值与 config.json 中 restart_policy 合并"""
+    return _merged_section("restart_policy", DEFAULT_RESTART_POLICY, config)
+
+
+def sampler_settings(config: dict | None = None) -> dict:
+    """资源采样设置：默认值与 config.json 中 sampler 合并"""
+    return _merged_section("sampler", DEFAULT_SAMPLER, config)
+
+
+def lag_settings(config: dict | None = None) -> dict:
+    """卡顿分析设置：默认值与 config.json 中 lag 合并"""
+    return _merged_section("lag", DEFAULT_LAG, config)
+
+
+def metrics_settings(config: dict | None = None) -> dict:
+    """指标端点设置：默认值与 config.json 中 metrics 合并"""
+    return _merged_section("metrics", DEFAULT_METRICS, config)
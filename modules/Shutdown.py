@@ -0,0 +1,186 @@
+import io
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Optional
+
+from modules import Settings
+
+"""
+停止流程：先通过控制台保存并停止，只有超时后才逐级升级为 SIGTERM、SIGKILL。
+1.向标准输入写入 save-all flush，等待 "Saved the game"。
+2.写入 stop，等待区块保存完成（"All dimensions are saved" / "ThreadedAnvilChunkStorage ... All chunks are saved"）并等待进程退出。
+3.超时后向进程组发送 SIGTERM（JVM 关闭钩子仍会保存世界），再超时则 SIGKILL。
+每个阶段的超时来自 Settings.stop_timeouts()，总耗时不超过各阶段超时之和。
+"""
+
+CONSOLE = "console"
+TERMINATED = "terminated"
+KILLED = "killed"
+ALREADY_EXITED = "already_exited"
+
+SAVE_DONE_MARKERS = ("Saved the game",)
+STOP_DONE_MARKERS = ("All dimensions are saved", "All chunks are saved")
+
+
+def signal_process(pid: int, sig: int, process_group: bool = True) -> None:
+    """向进程（或其所在进程组）发送信号；Windows 下用 taskkill 代替"""
+    try:
+        if os.name == "nt":
+            command = ["taskkill", "/T", "/PID", str(pid)]
+            if sig != signal.SIGTERM:
+                command.insert(1, "/F")
+            subprocess.run(command, capture_output=True)
+        elif process_group:
+            os.killpg(pid, sig)
+        else:
+            os.kill(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class StopTarget(ABC):
+    """停止流程操作的对象：能发送控制台命令、等待输出、等待退出、发送信号"""
+
+    pid: int = 0
+    process_group = True
+
+    @abstractmethod
+    def is_alive(self) -> bool:
+        """进程是否仍在运行"""
+
+    def send(self, line: str) -> bool:
+        """写入一行控制台命令，无法写入时返回 False"""
+        return False
+
+    def wait_for(self, markers: Iterable[str], timeout: float) -> bool:
+        """等待输出中出现任一标志；进程退出或超时返回 False"""
+        return False
+
+    def wait_exit(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.is_alive():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.2)
+        return True
+
+    def terminate(self) -> None:
+        signal_process(self.pid, signal.SIGTERM, self.process_group)
+
+    def kill(self) -> None:
+        signal_process(self.pid, getattr(signal, "SIGKILL", signal.SIGTERM), self.process_group)
+
+
+class PopenTarget(StopTarget):
+    """本进程通过 subprocess.Popen 启动、输出为管道的服务器"""
+
+    def __init__(self, process: subprocess.Popen, process_group: bool = True,
+                 echo: Optional[Callable[[str], None]] = None):
+        """
+        :param process_group: 进程是否以 start_new_session 启动（决定信号发给整个进程组还是单个进程）
+        :param echo: 停止过程中读到的输出交给它显示，例如 print
+        """
+        self.process = process
+        self.pid = process.pid
+        self.process_group = process_group and os.name != "nt"
+        self.echo = echo
+        self._lines: Optional[queue.Queue] = None
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def send(self, line: str) -> bool:
+        if self.process.stdin is None or not self.is_alive():
+            return False
+        data = line + "\n"
+        try:
+            if not isinstance(self.process.stdin, io.TextIOBase):
+                data = data.encode("utf-8")
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def _start_reader(self) -> queue.Queue:
+        # 只有真正需要等待输出时才开始读取管道，避免与调用方自己的读取线程争抢
+        if self._lines is None:
+            self._lines = queue.Queue()
+            threading.Thread(target=self._read_output, daemon=True).start()
+        return self._lines
+
+    def _read_output(self) -> None:
+        try:
+            while True:
+                line = self.process.stdout.readline()
+                if not line:
+                    break
+                if isinstance(line, bytes):
+                    line = line.decode("utf-8", errors="replace")
+                self._lines.put(line.rstrip())
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._lines.put(None)
+
+    def wait_for(self, markers: Iterable[str], timeout: float) -> bool:
+        if self.process.stdout is None:
+            return False
+        markers = tuple(markers)
+        lines = self._start_reader()
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                line = lines.get(timeout=remaining)
+            except queue.Empty:
+                return False
+            if line is None:
+                # 输出流关闭，进程已经退出
+                lines.put(None)
+                return False
+            if self.echo is not None:
+                self.echo(line)
+            if any(marker in line for marker in markers):
+                return True
+
+    def wait_exit(self, timeout: float) -> bool:
+        try:
+            self.process.wait(timeout=timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+
+def graceful_stop(target: StopTarget, timeouts: Optional[dict] = None, use_console: bool = True) -> str:
+    """
+    按 控制台保存并停止 -> SIGTERM -> SIGKILL 的顺序停止进程
+    :param use_console: 为 False 时跳过控制台阶段（例如只输出了几行日志的探测进程）
+    :return: 最终生效的阶段：console / terminated / killed / already_exited
+    """
+    timeouts = timeouts or Settings.stop_timeouts()
+    if not target.is_alive():
+        return ALREADY_EXITED
+
+    if use_console and target.send("save-all flush"):
+        target.wait_for(SAVE_DONE_MARKERS, timeouts["save"])
+        if target.send("stop"):
+            deadline = time.monotonic() + timeouts["stop"]
+            target.wait_for(STOP_DONE_MARKERS, timeouts["stop"])
+            if target.wait_exit(max(0.0, deadline - time.monotonic())):
+                return CONSOLE
+
+    target.terminate()
+    if target.wait_exit(timeouts["terminate"]):
+        return TERMINATED
+
+    target.kill()
+    target.wait_exit(timeouts["kill"])
+    return KILLED
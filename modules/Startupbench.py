@@ -0,0 +1,110 @@
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from modules import Settings
+
+"""
+启动耗时基准：用 python -X importtime 导入入口脚本，统计累计导入耗时与冷启动墙钟时间。
+超出预算或在启动阶段导入了重量级依赖时返回失败，可直接放进 CI 或部署脚本中运行：
+    python jartender.py bench-startup --budget-ms 150
+"""
+
+# 这些模块只应在对应菜单被使用时才导入
+FORBIDDEN_AT_STARTUP = (
+    "requests",
+    "tabulate",
+    "sqlite3",
+    "modules.FabricCrawler",
+    "modules.ForgeCrawler",
+    "modules.Lister",
+    "modules.Manifester",
+    "modules.java.javafinder",
+)
+
+DEFAULT_BUDGET_MS = 150.0
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> Dict[str, dict]:
+    """解析 -X importtime 输出：{模块名: {"self_us", "cumulative_us", "depth"}}"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        modules[match.group(4)] = {
+            "self_us": int(match.group(1)),
+            "cumulative_us": int(match.group(2)),
+            "depth": (len(match.group(3)) - 1) // 2,
+        }
+    return modules
+
+
+def _run_once(entry: str) -> tuple:
+    root = str(Settings.PROJECT_ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry}"],
+        cwd=root, capture_output=True, text=True, timeout=60,
+    )
+    modules = parse_importtime(result.stderr)
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, f"{entry}.py", "--help"], cwd=root, capture_output=True, timeout=60)
+    wall_ms = (time.perf_counter() - start) * 1000
+    return modules, wall_ms
+
+
+def measure(runs: int = 5, entry: str = "jartender") -> dict:
+    """
+    多次冷启动取中位数
+    :return: {"import_ms", "wall_ms", "heaviest", "forbidden"}
+    """
+    import_samples: List[float] = []
+    wall_samples: List[float] = []
+    modules: Dict[str, dict] = {}
+    for _ in range(max(1, runs)):
+        modules, wall_ms = _run_once(entry)
+        import_samples.append(modules.get(entry, {}).get("cumulative_us", 0) / 1000)
+        wall_samples.append(wall_ms)
+
+    heaviest = sorted(
+        ((name, info["self_us"] / 1000) for name, info in modules.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:10]
+    forbidden = [name for name in FORBIDDEN_AT_STARTUP if name in modules]
+    return {
+        "import_ms": statistics.median(import_samples),
+        "wall_ms": statistics.median(wall_samples),
+        "heaviest": heaviest,
+        "forbidden": forbidden,
+    }
+
+
+def run(runs: int = 5, budget_ms: float = DEFAULT_BUDGET_MS) -> bool:
+    """打印基准结果，返回是否在预算内"""
+    result = measure(runs)
+    print(f"导入 jartender 累计耗时（中位数）: {result['import_ms']:.1f} ms，预算 {budget_ms:.1f} ms")
+    print(f"冷启动墙钟时间（中位数，含解释器启动）: {result['wall_ms']:.1f} ms")
+    print("自身耗时最多的模块:")
+    for name, self_ms in result["heaviest"]:
+        print(f"  {self_ms:8.2f} ms  {name}")
+
+    ok = True
+    if result["forbidden"]:
+        print(f"❌ 启动阶段导入了应当延迟加载的模块: {', '.join(result['forbidden'])}")
+        ok = False
+    if result["import_ms"] > budget_ms:
+        print("❌ 启动耗时超出预算")
+        ok = False
+    if ok:
+        print("✅ 启动耗时在预算内")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run() else 1)
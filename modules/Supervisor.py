@@ -0,0 +1,662 @@
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from modules import Settings, Shutdown, RestartPolicy
+
+"""
+服务器守护：以脱离终端的方式启动服务器，一个 Jartender 进程可以同时管理多个服务器。
+1.每个服务器在 run/<服务器名>/ 下保存 server.pid、state.json 与 console.log（标准输出），
+  每次启动前把上一次的 console.log 轮转为 console.log.1 ...，只保留最近 LOG_BACKUPS 份。
+2.POSIX 系统下服务器的标准输入来自命名管道 console.in，Jartender 重启后仍然可以向控制台发送命令。
+3.Jartender 重启后读取 state.json，凭 PID 与进程启动时间重新接管仍在运行的服务器。
+4.状态：starting -> running -> stopping -> stopped；意外退出为 crashed。
+5.停止时经由控制台保存世界，超时才升级为信号（见 Shutdown）。
+6.崩溃后按 RestartPolicy 退避并错开时间自动重启。重启只由 supervise 子命令执行（同一时间只允许一个 supervise），
+  菜单、status、metrics 等其他进程只读取与记录状态，避免两个进程同时重启同一个服务器。
+7.停止请求可能来自其他进程（stop 命令、菜单）或游戏内 / RCON 的 stop，判定退出原因前重新读取 state.json。
+  没有停止请求时：本次运行产生了崩溃报告或 "Encountered an unexpected exception" 即为崩溃
+  （tick 循环崩溃后同样会打印关服日志，且退出码常为 0）；否则按退出码判定，
+  只有接管的进程（拿不到退出码）才根据正常关服的日志判定。
+"""
+
+STARTING = "starting"
+RUNNING = "running"
+STOPPING = "stopping"
+STOPPED = "stopped"
+CRASHED = "crashed"
+
+ALIVE_STATES = (STARTING, RUNNING, STOPPING)
+
+# 服务器启动完成的标志
+DONE_MARKER = b'For help, type "help"'
+# 保留的历史 console.log 份数
+LOG_BACKUPS = 3
+# 日志器前缀的结尾：原版 / Paper / Forge 为 "]: "，Fabric 为 "] (Minecraft) "；玩家聊天 "<名字> ..." 不会紧跟其后出现关键字
+_LOGGER_END = rb"(?:\]: |\] \([^)]*\) )"
+# 正常关服的日志
+CLEAN_STOP_PATTERN = re.compile(
+    _LOGGER_END + rb"(?:Stopping server|(?:ThreadedAnvilChunkStorage(?: \([^)]*\))?: )?All (?:dimensions|chunks) are saved)"
+)
+# tick 循环崩溃（随后仍会打印正常关服的日志）
+CRASH_PATTERN = re.compile(_LOGGER_END + rb"Encountered an unexpected exception")
+# 判定退出原因时最多回看的日志字节数
+CLEAN_STOP_SCAN_BYTES = 1024 * 1024
+SUPERVISE_LOCK = "supervise.lock"
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    """进程是否仍在运行（Windows 下不能用 os.kill(pid, 0)，那会直接结束进程）"""
+    if not pid:
+        return False
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    # 已退出但尚未被回收的子进程
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            return f.read().rsplit(b")", 1)[1].split()[0] != b"Z"
+    except (OSError, IndexError):
+        return True
+
+
+def process_start_time(pid: int) -> Optional[int]:
+    """进程启动时间（/proc/<pid>/stat 第 22 个字段），用于识别 PID 被复用的情况"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+        return int(fields[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class ManagedServer:
+    """一个受守护的服务器及其持久化状态"""
+
+    def __init__(self, server_name: str):
+        self.server_name = server_name
+        self.run_dir = Settings.RUN_DIR / server_name
+        self.pid: Optional[int] = None
+        self.proc_start_time: Optional[int] = None
+        self.state = STOPPED
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.exit_code: Optional[int] = None
+        self.stop_requested = False
+        self.command: List[str] = []
+        self.cwd: Optional[str] = None
+        # 已经扫描过的 console.log 字节数（用于检测启动完成）
+        self.log_offset = 0
+        # 本次运行的输出在 console.log 中的起始位置（轮转失败、继续追加时不为 0）
+        self.log_start = 0
+        # 自动重启：历次重启时间、计划中的下一次重启、最近一次崩溃报告
+        self.restart_times: List[float] = []
+        self.next_restart_at: Optional[float] = None
+        self.restart_reason: Optional[str] = None
+        self.crash_report: Optional[dict] = None
+        self.crash_loop = False
+        # 只有本进程启动的服务器才有 Popen 对象，可以拿到退出码
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def state_path(self) -> Path:
+        return self.run_dir / "state.json"
+
+    @property
+    def pid_path(self) -> Path:
+        return self.run_dir / "server.pid"
+
+    @property
+    def log_path(self) -> Path:
+        return self.run_dir / "console.log"
+
+    @property
+    def console_path(self) -> Path:
+        return self.run_dir / "console.in"
+
+    def rotate_log(self, backups: int = LOG_BACKUPS) -> None:
+        """console.log -> console.log.1 -> ... -> console.log.<backups>，最旧的一份被覆盖"""
+        if not self.log_path.exists():
+            return
+        try:
+            for index in range(backups - 1, 0, -1):
+                older = self.log_path.with_name(f"{self.log_path.name}.{index}")
+                if older.exists():
+                    os.replace(older, self.log_path.with_name(f"{self.log_path.name}.{index + 1}"))
+            if backups > 0:
+                os.replace(self.log_path, self.log_path.with_name(f"{self.log_path.name}.1"))
+            else:
+                self.log_path.unlink()
+        except OSError:
+            # Windows 下文件仍被其他进程打开时无法改名，本次继续追加
+            pass
+
+    def to_dict(self) -> dict:
+        return {
+            "server_name": self.server_name,
+            "pid": self.pid,
+            "proc_start_time": self.proc_start_time,
+            "state": self.state,
+            "started_at": self.started_at,
+            "ready_at": self.ready_at,
+            "exit_code": self.exit_code,
+            "stop_requested": self.stop_requested,
+            "command": self.command,
+            "cwd": self.cwd,
+            "log_offset": self.log_offset,
+            "log_start": self.log_start,
+            "restart_times": self.restart_times,
+            "next_restart_at": self.next_restart_at,
+            "restart_reason": self.restart_reason,
+            "crash_report": self.crash_report,
+            "crash_loop": self.crash_loop,
+        }
+
+    def save(self) -> None:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), indent=4, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+        if self.pid and self.state in ALIVE_STATES:
+            self.pid_path.write_text(str(self.pid), encoding="utf-8")
+        elif self.pid_path.exists():
+            self.pid_path.unlink()
+
+    @classmethod
+    def load(cls, server_name: str) -> Optional["ManagedServer"]:
+        server = cls(server_name)
+        try:
+            data = json.loads(server.state_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        for key, value in data.items():
+            if hasattr(server, key) and key != "server_name":
+                setattr(server, key, value)
+        return server
+
+    def is_alive(self) -> bool:
+        if self.process is not None:
+            return self.process.poll() is None
+        if not pid_alive(self.pid):
+            return False
+        # PID 被其他进程复用时不算存活
+        if self.proc_start_time is not None:
+            current = process_start_time(self.pid)
+            if current is not None and current != self.proc_start_time:
+                return False
+        return True
+
+    def uptime(self) -> Optional[float]:
+        if self.started_at is None or self.state not in ALIVE_STATES:
+            return None
+        return time.time() - self.started_at
+
+
+class Supervisor:
+    def __init__(self):
+        self.servers: Dict[str, ManagedServer] = {}
+        self.lock = threading.RLock()
+        self._loaded = False
+        self._lock_file = None
+        self.policy: Optional[RestartPolicy.RestartPolicy] = None
+        self.scheduler = RestartPolicy.RestartScheduler()
+
+    # ---------- 接管 ----------
+
+    def load(self) -> None:
+        """读取 run/ 下的状态文件，重新接管上次运行的服务器"""
+        with self.lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not Settings.RUN_DIR.exists():
+                return
+            for run_dir in sorted(Settings.RUN_DIR.iterdir()):
+                if not run_dir.is_dir():
+                    continue
+                server = ManagedServer.load(run_dir.name)
+                if server is not None:
+                    self.servers[server.server_name] = server
+                    self.refresh(server)
+
+    def _sync_from_disk(self) -> None:
+        """
+        supervise 使用：接管其他进程新启动的服务器，并同步其他进程取消的自动重启
+        （state.json 是进程间共享状态的唯一途径）
+        """
+        if not Settings.RUN_DIR.exists():
+            return
+        for run_dir in sorted(Settings.RUN_DIR.iterdir()):
+            if not run_dir.is_dir():
+                continue
+            on_disk = ManagedServer.load(run_dir.name)
+            if on_disk is None:
+                continue
+            with self.lock:
+                server = self.servers.get(on_disk.server_name)
+                if server is None or (on_disk.started_at != server.started_at and not server.is_alive()):
+                    self.servers[on_disk.server_name] = on_disk
+                elif on_disk.started_at == server.started_at and server.next_restart_at and not on_disk.next_restart_at:
+                    server.next_restart_at = None
+                    server.restart_reason = on_disk.restart_reason
+
+    def get(self, server_name: str) -> Optional[ManagedServer]:
+        self.load()
+        return self.servers.get(server_name)
+
+    # ---------- 启动 ----------
+
+    def start(self, server_name: str, command: List[str], cwd: str,
+              previous: Optional[ManagedServer] = None) -> ManagedServer:
+        """
+        以脱离终端的方式启动服务器；已在运行时抛出 RuntimeError
+        :param previous: 自动重启时传入崩溃的那一次运行，沿用其重启历史
+        """
+        self.load()
+        with self.lock:
+            server = self.servers.get(server_name)
+            if server is not None and server.is_alive():
+                raise RuntimeError(f"服务器 {server_name} 已在运行 (PID {server.pid})")
+
+            server = ManagedServer(server_name)
+            server.run_dir.mkdir(parents=True, exist_ok=True)
+            server.command = list(command)
+            server.cwd = str(cwd)
+            if previous is not None:
+                server.restart_times = previous.restart_times + [time.time()]
+                server.crash_report = previous.crash_report
+
+            server.rotate_log()
+            with open(server.log_path, "ab") as log_file:
+                server.log_offset = server.log_start = log_file.tell()
+                server.process = self._spawn(server, log_file)
+
+            server.pid = server.process.pid
+            server.proc_start_time = process_start_time(server.pid)
+            server.started_at = time.time()
+            server.state = STARTING
+            server.save()
+            self.servers[server_name] = server
+            return server
+
+    def _spawn(self, server: ManagedServer, log_file) -> subprocess.Popen:
+        if os.name == "nt":
+            return subprocess.Popen(
+                server.command,
+                cwd=server.cwd,
+                stdin=subprocess.PIPE,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS,
+            )
+
+        if not server.console_path.exists():
+            os.mkfifo(server.console_path)
+        # 以读写方式打开命名管道：服务器永远不会读到 EOF，且打开时不会阻塞
+        console_fd = os.open(server.console_path, os.O_RDWR)
+        try:
+            return subprocess.Popen(
+                server.command,
+                cwd=server.cwd,
+                stdin=console_fd,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        finally:
+            os.close(console_fd)
+
+    # ---------- 状态 ----------
+
+    def refresh(self, server: ManagedServer) -> str:
+        """根据进程与日志更新状态并持久化，返回最新状态"""
+        with self.lock:
+            previous = server.state
+            if server.state in ALIVE_STATES:
+                if server.is_alive():
+                    if server.state == STARTING and self._log_contains(server, DONE_MARKER):
+                        server.state = RUNNING
+                        server.ready_at = time.time()
+                else:
+                    if server.process is not None:
+                        server.exit_code = server.process.returncode
+                    self._merge_stop_request(server)
+                    clean_exit = self._exited_cleanly(server)
+                    uptime = time.time() - server.started_at if server.started_at else None
+                    server.state = STOPPED if clean_exit else CRASHED
+                    server.process = None
+                    if server.state == CRASHED:
+                        self._handle_crash(server, uptime)
+            if server.state != previous:
+                server.save()
+            return server.state
+
+    @staticmethod
+    def _merge_stop_request(server: ManagedServer) -> None:
+        """其他进程发出的停止请求只记录在 state.json 中（同一次运行才算）"""
+        on_disk = ManagedServer.load(server.server_name)
+        if on_disk is None or on_disk.started_at != server.started_at or on_disk.pid != server.pid:
+            return
+        if on_disk.stop_requested or on_disk.state in (STOPPING, STOPPED):
+            server.stop_requested = True
+
+    @staticmethod
+    def _exited_cleanly(server: ManagedServer) -> bool:
+        """
+        判定退出原因：停止请求 > 崩溃证据 > 退出码 > 正常关服的日志（仅限拿不到退出码的接管进程）
+        用户要求停止时，停止过程中的崩溃也不自动重启
+        """
+        if server.stop_requested or server.state == STOPPING:
+            return True
+        try:
+            with open(server.log_path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(server.log_start, size - CLEAN_STOP_SCAN_BYTES))
+                data = f.read()
+        except OSError:
+            data = b""
+        if CRASH_PATTERN.search(data) or RestartPolicy.find_crash_report(server.cwd, server.started_at):
+            return False
+        if server.exit_code is not None:
+            return server.exit_code == 0
+        return CLEAN_STOP_PATTERN.search(data) is not None
+
+    @staticmethod
+    def _log_contains(server: ManagedServer, marker: bytes) -> bool:
+        """增量扫描 console.log 的新内容"""
+        try:
+            with open(server.log_path, "rb") as f:
+                # 回退一点，避免标志恰好被截断在两次读取之间
+                start = max(0, server.log_offset - len(marker))
+                f.seek(start)
+                data = f.read()
+        except OSError:
+            return False
+        server.log_offset = start + len(data)
+        return marker in data
+
+    def running_count(self, exclude: Optional[str] = None) -> int:
+        """正在运行的受管服务器数量（用于推算堆大小等）"""
+        self.load()
+        with self.lock:
+            return sum(
+                1 for name, server in self.servers.items()
+                if name != exclude and server.state in ALIVE_STATES and server.is_alive()
+            )
+
+    def status(self) -> List[dict]:
+        """所有受管服务器的状态"""
+        self.load()
+        result = []
+        with self.lock:
+            for server in self.servers.values():
+                self.refresh(server)
+                result.append({
+                    "server_name": server.server_name,
+                    "state": server.state,
+                    "pid": server.pid if server.state in ALIVE_STATES else None,
+                    "uptime": server.uptime(),
+                    "startup_seconds": (server.ready_at - server.started_at
+                                        if server.ready_at and server.started_at else None),
+                    "exit_code": server.exit_code,
+                    "restarts": len(server.restart_times),
+                    "next_restart_at": server.next_restart_at,
+                    "crash_loop": server.crash_loop,
+                    "restart_reason": server.restart_reason,
+                })
+        return result
+
+    # ---------- 崩溃重启 ----------
+
+    def _handle_crash(self, server: ManagedServer, uptime: Optional[float]) -> None:
+        """服务器刚进入 crashed 状态：查找崩溃报告，按策略决定是否以及何时重启"""
+        if self.policy is None:
+            self.policy = RestartPolicy.RestartPolicy.from_config()
+        crash = RestartPolicy.find_crash_report(server.cwd, server.started_at)
+        delay, reason = self.policy.decide(server.restart_times, uptime, crash, server.crash_report)
+        server.crash_report = crash or server.crash_report
+        server.restart_reason = reason
+        if delay is None:
+            server.next_restart_at = None
+            server.crash_loop = self.policy.enabled
+        else:
+            server.next_restart_at = self.scheduler.schedule(delay, self.policy.stagger)
+
+    def _restart_due(self) -> None:
+        now = time.time()
+        with self.lock:
+            due = [
+                server for server in self.servers.values()
+                if server.state == CRASHED and server.next_restart_at and server.next_restart_at <= now
+            ]
+        for server in due:
+            try:
+                self.start(server.server_name, server.command, server.cwd, previous=server)
+            except (OSError, RuntimeError) as e:
+                with self.lock:
+                    server.next_restart_at = None
+                    server.restart_reason = f"重启失败: {e}"
+                    server.save()
+
+    def cancel_restart(self, server_name: str) -> bool:
+        """取消计划中的自动重启"""
+        server = self.get(server_name)
+        if server is None or not server.next_restart_at:
+            return False
+        with self.lock:
+            server.next_restart_at = None
+            server.restart_reason = "已手动取消自动重启"
+            server.save()
+        return True
+
+    def acquire_supervise_lock(self) -> None:
+        """同一时间只允许一个 supervise 进程，已有时抛出 RuntimeError"""
+        if self._lock_file is not None:
+            return
+        Settings.RUN_DIR.mkdir(parents=True, exist_ok=True)
+        lock_file = open(Settings.RUN_DIR / SUPERVISE_LOCK, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError("已有另一个 supervise 进程在运行")
+        # 锁随文件对象一直持有到进程退出
+        self._lock_file = lock_file
+
+    def supervise(self, interval: float = 1.0) -> None:
+        """在前台持续守护（适合作为 systemd 等服务运行）：推进状态、执行到期的重启，直到 Ctrl+C"""
+        self.acquire_supervise_lock()
+        self.load()
+        while True:
+            self._sync_from_disk()
+            with self.lock:
+                servers = list(self.servers.values())
+            for server in servers:
+                self.refresh(server)
+            self._restart_due()
+            time.sleep(interval)
+
+    # ---------- 控制台与停止 ----------
+
+    def send_command(self, server_name: str, command: str) -> bool:
+        """向服务器控制台写入一行命令"""
+        server = self.get(server_name)
+        if server is None or not server.is_alive():
+            return False
+        if command.strip().lstrip("/") == "stop":
+            # 记录停止请求，守护进程据此把退出判定为正常停止而不是崩溃
+            with self.lock:
+                self.refresh(server)
+                server.stop_requested = True
+                server.save()
+        data = (command.rstrip("\n") + "\n").encode("utf-8")
+        if server.process is not None and server.process.stdin is not None:
+            server.process.stdin.write(data)
+            server.process.stdin.flush()
+            return True
+        if os.name == "nt" or not server.console_path.exists():
+            return False
+        try:
+            fd = os.open(server.console_path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            return False
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        return True
+
+    def stop(self, server_name: str, timeouts: Optional[dict] = None) -> Optional[str]:
+        """
+        通过控制台保存并停止服务器，超时后逐级升级为 SIGTERM、SIGKILL（见 Shutdown）
+        :return: 生效的停止阶段；服务器未在运行时返回 None
+        """
+        server = self.get(server_name)
+        if server is None:
+            return None
+        if not server.is_alive():
+            # 崩溃后等待重启的服务器：停止即取消重启
+            return Shutdown.ALREADY_EXITED if self.cancel_restart(server_name) else None
+        with self.lock:
+            server.stop_requested = True
+            server.state = STOPPING
+            server.save()
+        outcome = Shutdown.graceful_stop(ManagedTarget(self, server), timeouts)
+        self.refresh(server)
+        return outcome
+
+    def stop_all(self, server_names: Optional[List[str]] = None, timeouts: Optional[dict] = None) -> Dict[str, str]:
+        """并行停止多个服务器，总耗时由单个服务器的超时上限决定，而不是随数量累加"""
+        self.load()
+        if server_names is None:
+            server_names = [
+                name for name, server in self.servers.items() if server.is_alive() or server.next_restart_at
+            ]
+        timeouts = timeouts or Settings.stop_timeouts()
+        results: Dict[str, str] = {}
+        threads = []
+        for name in server_names:
+            thread = threading.Thread(
+                target=lambda n=name: results.__setitem__(n, self.stop(n, timeouts)),
+                name=f"stop-{name}",
+            )
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return {name: outcome for name, outcome in results.items() if outcome is not None}
+
+
+class ManagedTarget(Shutdown.StopTarget):
+    """停止流程中的受管服务器：命令写入 console.in，输出从 console.log 读取"""
+
+    def __init__(self, supervisor: Supervisor, server: ManagedServer):
+        self.supervisor = supervisor
+        self.server = server
+        self.pid = server.pid
+        self.process_group = True
+        try:
+            self.log_offset = server.log_path.stat().st_size
+        except OSError:
+            self.log_offset = 0
+
+    def is_alive(self) -> bool:
+        return self.server.is_alive()
+
+    def send(self, line: str) -> bool:
+        return self.supervisor.send_command(self.server.server_name, line)
+
+    def wait_for(self, markers, timeout: float) -> bool:
+        markers = tuple(markers)
+        deadline = time.monotonic() + timeout
+        pending = b""
+        while time.monotonic() < deadline:
+            try:
+                with open(self.server.log_path, "rb") as f:
+                    f.seek(self.log_offset)
+                    data = f.read()
+            except OSError:
+                data = b""
+            self.log_offset += len(data)
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if any(marker.encode() in line for marker in markers):
+                    return True
+            if not self.is_alive():
+                return False
+            time.sleep(0.2)
+        return False
+
+    def wait_exit(self, timeout: float) -> bool:
+        if self.server.process is not None:
+            try:
+                self.server.process.wait(timeout=timeout)
+                return True
+            except subprocess.TimeoutExpired:
+                return False
+        return super().wait_exit(timeout)
+
+
+_supervisor: Optional[Supervisor] = None
+
+
+def get_supervisor() -> Supervisor:
+    """进程内唯一的 Supervisor"""
+    global _supervisor
+    if _supervisor is None:
+        _supervisor = Supervisor()
+    return _supervisor
+
+
+def print_status() -> None:
+    from modules import Sampler, LagAnalyzer
+
+    rows = get_supervisor().status()
+    if not rows:
+        print("当前没有受管的服务器。")
+        return
+    for row in rows:
+        uptime = f"{int(row['uptime'])}s" if row["uptime"] is not None else "-"
+        exit_code = row["exit_code"] if row["exit_code"] is not None else "-"
+        print(f"{row['server_name']:<24} {row['state']:<9} PID {row['pid'] or '-':<8} 运行 {uptime:<8} 退出码 {exit_code}")
+        samples = Sampler.load_snapshot(row["server_name"]) if row["state"] in ALIVE_STATES else []
+        if samples:
+            latest = samples[-1]
+            print(f"{'':<24} CPU {latest['cpu']:.1f}%  内存 {latest['rss_kb'] / 1024:.0f} MiB  线程 {int(latest['threads'])}")
+        lag = LagAnalyzer.load_status(row["server_name"]) if row["state"] in ALIVE_STATES else None
+        if lag and lag["overloaded"]:
+            print(f"{'':<24} ⚠️ 持续过载: {lag['reason']}")
+        if row["next_restart_at"]:
+            wait = max(0, int(row["next_restart_at"] - time.time()))
+            when = f"{wait} 秒后" if wait else "等待 supervise "
+            print(f"{'':<24} ↻ {when}自动重启（已重启 {row['restarts']} 次）")
+        elif row["crash_loop"]:
+            print(f"{'':<24} ⚠️ 已停止自动重启: {row['restart_reason']}")
+
+
+if __name__ == "__main__":
+    print_status()
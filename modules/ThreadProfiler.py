@@ -0,0 +1,211 @@
+import os
+import re
+import shutil
+import subprocess
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+"""
+基于线程转储的采样分析器，不需要在服务器中安装任何东西。
+1.使用启动该服务器的 Java 同目录下的 jcmd（找不到时用按服务器选择的 Java 或 PATH 中的 jcmd），
+  按设定的间隔对进程执行 jcmd <pid> Thread.print，持续 N 秒。
+2.只保留 "Server thread" 与工作线程（Worker-Main-*、Server-Worker-* 等）的栈；工作线程名去掉编号后合并。
+  Server thread 的所有状态都计入（等待下一个 tick 的时间就是空闲时间），其他线程默认只计入 RUNNABLE。
+3.输出 collapsed stack 格式（"线程;外层帧;...;内层帧 次数"，可直接交给 flamegraph.pl / speedscope），
+  以及按自身样本数与包含样本数排序的热点帧报告。
+"""
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_DURATION = 30.0
+JCMD_TIMEOUT = 10.0
+
+# 参与统计的线程：(匹配线程名的正则, 是否总是计入)
+THREAD_GROUPS = (
+    (re.compile(r"^Server thread$"), True),
+    (re.compile(r"^(Worker-Main|Server-Worker|Worker|Tracy|C2ME|Region Scheduler|Paper Async)\b.*"), False),
+)
+THREAD_HEADER = re.compile(r'^"(?P<name>[^"]*)"')
+THREAD_STATE = re.compile(r"^\s+java\.lang\.Thread\.State: (\w+)")
+STACK_FRAME = re.compile(r"^\s+at (?P<frame>[^\s(]+)")
+TRAILING_NUMBER = re.compile(r"[-#]?\d+$")
+
+
+def find_jcmd(java: Optional[str]) -> Optional[str]:
+    """java 可执行文件同目录下的 jcmd"""
+    if java:
+        java_path = shutil.which(java) or java
+        name = "jcmd.exe" if os.name == "nt" else "jcmd"
+        candidate = Path(os.path.realpath(java_path)).parent / name
+        if candidate.exists():
+            return str(candidate)
+    return None
+
+
+def resolve_jcmd(server_name: str, command: Optional[List[str]]) -> Optional[str]:
+    """优先使用启动该服务器的 Java 对应的 jcmd，其次是按服务器选择的 Java，最后是 PATH"""
+    jcmd = find_jcmd(command[0]) if command else None
+    if jcmd is None:
+        from modules import Registry
+        from modules.java import javaselector
+
+        jcmd = find_jcmd(javaselector.java_command(Registry.get_server(server_name)))
+    return jcmd or shutil.which("jcmd")
+
+
+def thread_group(name: str) -> Optional[Tuple[str, bool]]:
+    """线程所属的组名（编号合并）与是否总是计入；不参与统计时返回 None"""
+    for pattern, always in THREAD_GROUPS:
+        if pattern.match(name):
+            return TRAILING_NUMBER.sub("", name) if not always else name, always
+    return None
+
+
+def _frame_name(token: str) -> str:
+    """去掉类加载器 / 模块前缀："app//a.B.c"、"java.base@21.0.2/java.lang.Thread.run" -> 类名.方法名"""
+    if "//" in token:
+        return token.split("//", 1)[1]
+    prefix, slash, rest = token.partition("/")
+    # 含 $ 的是 lambda 类名（Foo$$Lambda/0x...），不是模块前缀
+    if slash and "$" not in prefix:
+        return rest
+    return token
+
+
+def parse_thread_dump(text: str) -> Iterable[Tuple[str, str, List[str]]]:
+    """逐个线程产出 (线程名, 状态, 栈帧列表[内层在前])"""
+    name = state = None
+    frames: List[str] = []
+    for line in text.splitlines():
+        header = THREAD_HEADER.match(line)
+        if header:
+            if name is not None:
+                yield name, state, frames
+            name, state, frames = header.group("name"), None, []
+            continue
+        if name is None:
+            continue
+        match = STACK_FRAME.match(line)
+        if match:
+            frames.append(_frame_name(match.group("frame")))
+            continue
+        match = THREAD_STATE.match(line)
+        if match:
+            state = match.group(1)
+    if name is not None:
+        yield name, state, frames
+
+
+def fold(text: str, stacks: Counter, all_states: bool = False) -> int:
+    """把一次线程转储折叠进 stacks，返回计入的线程数"""
+    counted = 0
+    for name, state, frames in parse_thread_dump(text):
+        group = thread_group(name)
+        if group is None or not frames:
+            continue
+        group_name, always = group
+        if not (always or all_states or state == "RUNNABLE"):
+            continue
+        stacks[";".join([group_name, *reversed(frames)])] += 1
+        counted += 1
+    return counted
+
+
+def sample(jcmd: str, pid: int, duration: float, interval: float,
+           all_states: bool = False) -> Tuple[Counter, int]:
+    """
+    按间隔采样线程转储
+    :return: (折叠后的栈计数, 成功的转储次数)
+    """
+    stacks: Counter = Counter()
+    dumps = 0
+    deadline = time.monotonic() + duration
+    next_at = time.monotonic()
+    while time.monotonic() < deadline:
+        try:
+            result = subprocess.run([jcmd, str(pid), "Thread.print"], stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, text=True, timeout=JCMD_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            result = None
+        if result is not None and result.returncode == 0:
+            fold(result.stdout, stacks, all_states)
+            dumps += 1
+        elif dumps == 0 and result is not None:
+            raise RuntimeError(result.stdout.strip() or f"jcmd 返回 {result.returncode}")
+        # jcmd 本身可能比采样间隔更慢，此时不再等待，也不为落后的次数补采
+        next_at = max(next_at + interval, time.monotonic())
+        time.sleep(max(0.0, next_at - time.monotonic()))
+    return stacks, dumps
+
+
+def top_frames(stacks: Counter, limit: int = 20) -> Dict[str, List[Tuple[str, int]]]:
+    """自身样本（栈顶帧）与包含样本（帧在栈中出现，同一栈只计一次）最多的帧"""
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    return {"self": self_counts.most_common(limit), "total": total_counts.most_common(limit)}
+
+
+def write_collapsed(stacks: Counter, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+
+
+def print_report(stacks: Counter, dumps: int, limit: int = 20) -> None:
+    samples = sum(stacks.values())
+    if not samples:
+        print("没有采集到相关线程的栈。")
+        return
+    groups: Counter = Counter()
+    for stack, count in stacks.items():
+        groups[stack.split(";", 1)[0]] += count
+    print(f"线程转储 {dumps} 次，计入栈样本 {samples} 个")
+    for group, count in groups.most_common():
+        print(f"  {group:<28} {count:>6}")
+    report = top_frames(stacks, limit)
+    for title, key in (("自身样本最多的帧", "self"), ("包含样本最多的帧", "total")):
+        print(f"=== {title} ===")
+        for frame, count in report[key]:
+            print(f"{count / samples * 100:>6.1f}%  {count:>6}  {frame}")
+
+
+def profile(server_name: str, duration: float = DEFAULT_DURATION, interval: float = DEFAULT_INTERVAL,
+            limit: int = 20, all_states: bool = False, output: Optional[str] = None) -> Optional[Path]:
+    """对受管服务器采样并输出报告，返回 collapsed stack 文件路径"""
+    from modules import Supervisor
+
+    server = Supervisor.get_supervisor().get(server_name)
+    if server is None or not server.is_alive():
+        print(f"❌ 服务器 '{server_name}' 未在运行")
+        return None
+    jcmd = resolve_jcmd(server_name, server.command)
+    if jcmd is None:
+        print("❌ 找不到 jcmd，请为该服务器选择完整的 JDK（仅有 JRE 时没有 jcmd）")
+        return None
+
+    print(f"🔬 使用 {jcmd} 对 {server_name} (PID {server.pid}) 采样 {duration:g} 秒，间隔 {interval:g} 秒...")
+    try:
+        stacks, dumps = sample(jcmd, server.pid, duration, interval, all_states)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ 线程转储失败: {e}")
+        return None
+
+    path = Path(output) if output else server.run_dir / f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+    write_collapsed(stacks, path)
+    print_report(stacks, dumps, limit)
+    print(f"📄 collapsed stack 已写入: {path}（可用 flamegraph.pl 或 speedscope 打开）")
+    return path
+
+
+if __name__ == "__main__":
+    import sys
+    counter: Counter = Counter()
+    fold(sys.stdin.read(), counter)
+    print_report(counter, 1)
@@ -0,0 +1,236 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from typing import Dict, Optional, Set
+
+from modules import Settings, Scanner, Serverlistinitializer
+
+"""
+监视服务器根目录，让 list.json 增量保持最新。
+1.Linux 下使用 inotify：监视根目录（服务器文件夹的增删与重命名）以及每个服务器文件夹的顶层（核心 JAR 与标记文件）。
+2.其他系统或 inotify 不可用时，退化为定时 scandir 轮询。
+3.两种方式都只给出"可能变化"的文件夹，再与快照比对，真正变化的文件夹才交给 Serverlistinitializer.refresh_servers 重新识别。
+"""
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+FOLDER_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ATTRIB | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def folder_state(folder_path: str) -> Optional[tuple]:
+    """
+    文件夹的指纹：顶层 JAR 的 (名称, 大小, mtime) 与标记文件是否齐全。
+    只看顶层，世界存档、日志的变化不会触发重新识别。
+    """
+    try:
+        with os.scandir(folder_path) as entries:
+            jars = []
+            markers = []
+            for entry in entries:
+                if entry.name.endswith('.jar'):
+                    stat = entry.stat()
+                    jars.append((entry.name, stat.st_size, stat.st_mtime_ns))
+                elif entry.name in Scanner.SERVER_MARKERS:
+                    markers.append(entry.name)
+    except OSError:
+        return None
+    return tuple(sorted(jars)), tuple(sorted(markers))
+
+
+def is_relevant(name: str) -> bool:
+    """服务器文件夹顶层中会影响识别结果的文件"""
+    return name.endswith('.jar') or name in Scanner.SERVER_MARKERS
+
+
+class ServerWatcher:
+    def __init__(self, server_root: str, interval: float = 5.0, debounce: float = 2.0, use_inotify: bool = True):
+        """
+        :param server_root: 服务器根目录
+        :param interval: 轮询间隔（秒），仅轮询模式使用
+        :param debounce: 最后一次事件后等待的时间（秒），避免复制大 JAR 时反复识别
+        """
+        self.server_root = str(server_root)
+        self.interval = interval
+        self.debounce = debounce
+        self.snapshot: Dict[str, Optional[tuple]] = {}
+        self.inotify = _Inotify.create() if use_inotify else None
+
+    def take_snapshot(self) -> Dict[str, Optional[tuple]]:
+        return {
+            os.path.basename(folder_path): folder_state(folder_path)
+            for folder_path in Scanner.list_server_folders(self.server_root)
+        }
+
+    def changed_folders(self, candidates: Optional[Set[str]] = None) -> Set[str]:
+        """与快照比对，返回真正变化的文件夹并更新快照；candidates 为 None 时比对全部"""
+        if candidates is None:
+            current = self.take_snapshot()
+            names = set(current) | set(self.snapshot)
+        else:
+            names = set(candidates)
+            current = {
+                name: folder_state(os.path.join(self.server_root, name))
+                for name in names
+                if os.path.isdir(os.path.join(self.server_root, name))
+            }
+
+        changed = set()
+        for name in names:
+            if current.get(name) != self.snapshot.get(name) or (name in current) != (name in self.snapshot):
+                changed.add(name)
+            if name in current:
+                self.snapshot[name] = current[name]
+            else:
+                self.snapshot.pop(name, None)
+        return changed
+
+    def apply(self, folders: Set[str]) -> None:
+        if not folders:
+            return
+        print(f"🔄 检测到变化: {', '.join(sorted(folders))}")
+        changes = Serverlistinitializer.refresh_servers(folders)
+        print(f"✅ 已更新 {len(changes['updated'])} 个，移除 {len(changes['removed'])} 个")
+
+    def run(self) -> None:
+        """持续监视，直到 Ctrl+C"""
+        self.snapshot = self.take_snapshot()
+        # 启动时先对齐一次 list.json 与磁盘
+        known = {s["server_name"] for s in Serverlistinitializer.load_server_list()}
+        self.apply(known.symmetric_difference(self.snapshot))
+
+        if self.inotify is not None:
+            print(f"👀 正在监视 {self.server_root} (inotify)，按 Ctrl+C 退出")
+        else:
+            print(f"👀 正在监视 {self.server_root} (每 {self.interval} 秒轮询)，按 Ctrl+C 退出")
+
+        try:
+            while True:
+                if self.inotify is not None:
+                    self._run_inotify_round()
+                else:
+                    time.sleep(self.interval)
+                    self.apply(self.changed_folders())
+        except KeyboardInterrupt:
+            print("已停止监视。")
+        finally:
+            if self.inotify is not None:
+                self.inotify.close()
+
+    def _run_inotify_round(self) -> None:
+        self.inotify.sync_watches(self.server_root, self.snapshot)
+        pending = self.inotify.wait(None)
+        if pending is None:
+            return
+        # 去抖：持续收集事件，直到安静 debounce 秒
+        while True:
+            more = self.inotify.wait(self.debounce)
+            if more is None:
+                break
+            pending |= more
+        if "" in pending:
+            # 队列溢出：退化为全量比对
+            self.apply(self.changed_folders())
+        else:
+            self.apply(self.changed_folders(pending))
+
+
+class _Inotify:
+    """基于 ctypes 的最小 inotify 封装"""
+
+    def __init__(self, libc, fd: int):
+        self.libc = libc
+        self.fd = fd
+        self.root_wd: Optional[int] = None
+        self.watches: Dict[int, str] = {}
+
+    @classmethod
+    def create(cls) -> Optional["_Inotify"]:
+        if not hasattr(os, "uname") or os.uname().sysname != "Linux":
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return cls(libc, fd)
+
+    def _add_watch(self, path: str, mask: int) -> Optional[int]:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        return wd if wd >= 0 else None
+
+    def sync_watches(self, server_root: str, snapshot: Dict[str, Optional[tuple]]) -> None:
+        """确保根目录和每个服务器文件夹都有监视（新文件夹出现后补上）"""
+        if self.root_wd is None:
+            self.root_wd = self._add_watch(server_root, ROOT_MASK)
+        watched = set(self.watches.values())
+        for name in snapshot:
+            if name not in watched:
+                wd = self._add_watch(os.path.join(server_root, name), FOLDER_MASK)
+                if wd is not None:
+                    self.watches[wd] = name
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[str]]:
+        """
+        等待事件，返回可能变化的文件夹名集合；超时返回 None。
+        返回集合中包含空字符串时表示事件队列溢出。
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return None
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        folders: Set[str] = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="replace")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                folders.add("")
+            elif mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+            elif wd == self.root_wd:
+                if mask & IN_ISDIR and name:
+                    folders.add(name)
+            elif wd in self.watches and (is_relevant(name) or mask & (IN_DELETE_SELF | IN_MOVE_SELF)):
+                folders.add(self.watches[wd])
+        return folders
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def watch(interval: float = 5.0, use_inotify: bool = True) -> None:
+    """监视配置中的服务器根目录"""
+    server_root = Settings.server_root()
+    ServerWatcher(str(server_root), interval=interval, use_inotify=use_inotify).run()
+
+
+if __name__ == "__main__":
+    watch()
@@ -0,0 +1,104 @@
+import io
+import re
+import struct
+import zipfile
+from typing import Iterable, List, Optional
+
+"""
+从核心 JAR 的 class 文件版本推算所需的 Java 主版本，不需要启动 JVM。
+1.读取 MANIFEST.MF 的 Main-Class 与均匀抽样的若干 class 文件，取最高的 class 文件主版本（52 -> Java 8，61 -> 17，65 -> 21）。
+2.Paperclip 等 bundler 把真正的服务端放在 META-INF/versions/**.jar 中，外层启动器通常仍以 Java 8 编译，需要一并读取。
+3.Multi-Release JAR 中 META-INF/versions/<n>/ 下的 class 只在 Java n+ 上才会加载，不计入要求。
+"""
+
+CLASS_MAGIC = b"\xca\xfe\xba\xbe"
+# class 文件主版本与 Java 版本的差值：52 - 44 = 8
+MAJOR_OFFSET = 44
+SAMPLE_SIZE = 48
+# 嵌套 JAR 读入内存的上限，防止异常文件占用过多内存
+NESTED_JAR_LIMIT = 256 * 1024 * 1024
+
+MULTI_RELEASE_ENTRY = re.compile(r"^META-INF/versions/\d+/")
+
+
+def class_major(header: bytes) -> Optional[int]:
+    """class 文件头（至少 8 字节）中的主版本号"""
+    if len(header) < 8 or header[:4] != CLASS_MAGIC:
+        return None
+    _, major = struct.unpack(">HH", header[4:8])
+    return major
+
+
+def java_for_major(major: Optional[int]) -> Optional[int]:
+    return major - MAJOR_OFFSET if major and major > MAJOR_OFFSET else None
+
+
+def _main_class_entry(zf: zipfile.ZipFile) -> Optional[str]:
+    try:
+        manifest = zf.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+    except KeyError:
+        return None
+    for line in manifest.splitlines():
+        if line.startswith("Main-Class:"):
+            return line.split(":", 1)[1].strip().replace(".", "/") + ".class"
+    return None
+
+
+def _sample(names: List[str], size: int) -> Iterable[str]:
+    """均匀抽样，覆盖 JAR 中不同位置（不同依赖包）的 class"""
+    if len(names) <= size:
+        return names
+    step = len(names) / size
+    return (names[int(i * step)] for i in range(size))
+
+
+def _zip_max_major(zf: zipfile.ZipFile, sample_size: int) -> Optional[int]:
+    classes = [
+        name for name in zf.namelist()
+        if name.endswith(".class") and not MULTI_RELEASE_ENTRY.match(name) and name != "module-info.class"
+    ]
+    entries = list(_sample(classes, sample_size))
+    main_class = _main_class_entry(zf)
+    if main_class and main_class in zf.NameToInfo:
+        entries.append(main_class)
+
+    best = None
+    for name in entries:
+        with zf.open(name) as f:
+            major = class_major(f.read(8))
+        if major is not None and (best is None or major > best):
+            best = major
+    return best
+
+
+def _nested_jars(zf: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    return [
+        info for info in zf.infolist()
+        if info.filename.startswith("META-INF/versions/") and info.filename.endswith(".jar")
+        and info.file_size <= NESTED_JAR_LIMIT
+    ]
+
+
+def required_java(jar_path: str, sample_size: int = SAMPLE_SIZE) -> Optional[int]:
+    """
+    核心 JAR 所需的最低 Java 主版本；不是有效 JAR 或没有 class 文件时返回 None
+    """
+    try:
+        with zipfile.ZipFile(jar_path) as zf:
+            majors = [_zip_max_major(zf, sample_size)]
+            for info in _nested_jars(zf):
+                try:
+                    with zipfile.ZipFile(io.BytesIO(zf.read(info))) as nested:
+                        majors.append(_zip_max_major(nested, sample_size))
+                except zipfile.BadZipFile:
+                    continue
+    except (OSError, zipfile.BadZipFile, KeyError):
+        return None
+    majors = [major for major in majors if major is not None]
+    return java_for_major(max(majors)) if majors else None
+
+
+if __name__ == "__main__":
+    import sys
+    for path in sys.argv[1:]:
+        print(path, required_java(path))
@@ -43,7 +43,7 @@ import sys
 import platform
 import shutil
 from pathlib import Path
-from typing import Literal, TypedDict, List, Callable, Optional
+from typing import Literal, TypedDict, List, Callable, Dict, Optional
 
 # Windows Reg Access
 if platform.system() == "Windows":
@@ -480,185 +480,81 @@ def _windows_candidates() -> List[Path]:
     return _unique_existing(candidates)
 
 
-def find_java():
-    """Entry used by javamgr."""
-    info = detect_os()
-    print(f"{info['os']} ({info['raw']})")
-    if info["os"] == "macOS":
-        paths = _macos_candidates()
-        if not paths:
-            print("未找到任何已存在的 Java 可执行文件。")
-        else:
-            print("发现：")
-            rows = []
-            for idx, p in enumerate(paths, 1):
-                meta = javainvestigator.probe_show_settings(str(p))
-                rows.append(
-                    {
-                        "idx": str(idx),
-                        "version": meta.get("version") or "Unknown",
-                        "vendor": meta.get("vendor_version") or "Unknown",
-                        "arch": meta.get("arch") or "Unknown",
-                        "path": str(p),
-                    }
-                )
-
-            # 按版本号升序排序
-            rows.sort(key=lambda row: _parse_version(row["version"]))
-
-            # 更新索引
-            for idx, row in enumerate(rows, 1):
-                row["idx"] = str(idx)
-
-            # 动态列宽对齐
-            headers = {"idx": "#", "version": "版本", "vendor": "名称", "arch": "架构", "path": "路径"}
-            col_widths = {
-                key: max(len(headers[key]), *(len(row[key]) for row in rows))
-                for key in headers
-            }
+def _candidates_for(os_name: str) -> Optional[List[Path]]:
+    """当前系统的候选 Java 路径；不支持的系统返回 None"""
+    if os_name == "macOS":
+        return _macos_candidates()
+    if os_name == "Windows":
+        return _windows_candidates()
+    if os_name == "Linux":
+        return _linux_candidates()
+    return None
 
-            def fmt(row):
-                return " | ".join(
-                    [
-                        row["idx"].rjust(col_widths["idx"]),
-                        row["version"].ljust(col_widths["version"]),
-                        row["vendor"].ljust(col_widths["vendor"]),
-                        row["arch"].ljust(col_widths["arch"]),
-                        row["path"],
-                    ]
-                )
-
-            header_line = " | ".join(
-                [
-                    headers["idx"].rjust(col_widths["idx"]),
-                    headers["version"].ljust(col_widths["version"]),
-                    headers["vendor"].ljust(col_widths["vendor"]),
-                    headers["arch"].ljust(col_widths["arch"]),
-                    headers["path"],
-                ]
-            )
-            print(header_line)
-            print("-" * len(header_line))
-            for row in rows:
-                print(fmt(row))
-                
-    elif info["os"] == "Windows":
-        paths = _windows_candidates()
-        if not paths:
-            print("未找到任何已存在的 Java 可执行文件。")
-        else:
-            print("发现：")
-            rows = []
-            for idx, p in enumerate(paths, 1):
-                meta = javainvestigator.probe_show_settings(str(p))
-                rows.append(
-                    {
-                        "idx": str(idx),
-                        "version": meta.get("version") or "Unknown",
-                        "vendor": meta.get("vendor_version") or "Unknown",
-                        "arch": meta.get("arch") or "Unknown",
-                        "path": str(p),
-                    }
-                )
-
-            # 按版本号升序排序
-            rows.sort(key=lambda row: _parse_version(row["version"]))
-
-            # 更新索引
-            for idx, row in enumerate(rows, 1):
-                row["idx"] = str(idx)
-
-            # 动态列宽对齐
-            headers = {"idx": "#", "version": "版本", "vendor": "名称", "arch": "架构", "path": "路径"}
-            col_widths = {
-                key: max(len(headers[key]), *(len(row[key]) for row in rows))
-                for key in headers
-            }
 
-            def fmt(row):
-                return " | ".join(
-                    [
-                        row["idx"].rjust(col_widths["idx"]),
-                        row["version"].ljust(col_widths["version"]),
-                        row["vendor"].ljust(col_widths["vendor"]),
-                        row["arch"].ljust(col_widths["arch"]),
-                        row["path"],
-                    ]
-                )
-
-            header_line = " | ".join(
-                [
-                    headers["idx"].rjust(col_widths["idx"]),
-                    headers["version"].ljust(col_widths["version"]),
-                    headers["vendor"].ljust(col_widths["vendor"]),
-                    headers["arch"].ljust(col_widths["arch"]),
-                    headers["path"],
-                ]
-            )
-            print(header_line)
-            print("-" * len(header_line))
-            for row in rows:
-                print(fmt(row))
-                
-    elif info["os"] == "Linux":
-        paths = _linux_candidates()
-        if not paths:
-            print("未找到任何已存在的 Java 可执行文件。")
-        else:
-            print("发现：")
-            rows = []
-            for idx, p in enumerate(paths, 1):
-                meta = javainvestigator.probe_show_settings(str(p))
-                rows.append(
-                    {
-                        "idx": str(idx),
-                        "version": meta.get("version") or "Unknown",
-                        "vendor": meta.get("vendor_version") or "Unknown",
-                        "arch": meta.get("arch") or "Unknown",
-                        "path": str(p),
-                    }
-                )
-
-            # 按版本号升序排序
-            rows.sort(key=lambda row: _parse_version(row["version"]))
-
-            # 更新索引
-            for idx, row in enumerate(rows, 1):
-                row["idx"] = str(idx)
-
-            # 动态列宽对齐
-            headers = {"idx": "#", "version": "版本", "vendor": "名称", "arch": "架构", "path": "路径"}
-            col_widths = {
-                key: max(len(headers[key]), *(len(row[key]) for row in rows))
-                for key in headers
+def collect_java(paths: Optional[List[Path]] = None) -> List[Dict[str, str]]:
+    """探测所有候选 Java，按版本号升序返回 {"version", "vendor", "arch", "path"}"""
+    if paths is None:
+        paths = _candidates_for(detect_os()["os"]) or []
+    rows = []
+    for p in paths:
+        meta = javainvestigator.probe_show_settings(str(p))
+        rows.append(
+            {
+                "version": meta.get("version") or "Unknown",
+                "vendor": meta.get("vendor_version") or "Unknown",
+                "arch": meta.get("arch") or "Unknown",
+                "path": str(p),
             }
+        )
+
+    # 按版本号升序排序
+    rows.sort(key=lambda row: _parse_version(row["version"]))
+    return rows
+
+
+def _print_rows(rows: List[Dict[str, str]]) -> None:
+    # 动态列宽对齐
+    headers = {"idx": "#", "version": "版本", "vendor": "名称", "arch": "架构", "path": "路径"}
+    rows = [dict(row, idx=str(idx)) for idx, row in enumerate(rows, 1)]
+    col_widths = {
+        key: max(len(headers[key]), *(len(row[key]) for row in rows))
+        for key in headers
+    }
+
+    def fmt(row):
+        return " | ".join(
+            [
+                row["idx"].rjust(col_widths["idx"]),
+                row["version"].ljust(col_widths["version"]),
+                row["vendor"].ljust(col_widths["vendor"]),
+                row["arch"].ljust(col_widths["arch"]),
+                row["path"],
+            ]
+        )
+
+    header_line = fmt(headers)
+    print(header_line)
+    print("-" * len(header_line))
+    for row in rows:
+        print(fmt(row))
+
+
+def find_java() -> List[Dict[str, str]]:
+    """Entry used by javamgr: 打印发现的 Java 并返回探测结果"""
+    info = detect_os()
+    print(f"{info['os']} ({info['raw']})")
+    paths = _candidates_for(info["os"])
+    if paths is None:
+        print(f"不支持的操作系统: {info['os']}")
+        return []
 
-            def fmt(row):
-                return " | ".join(
-                    [
-                        row["idx"].rjust(col_widths["idx"]),
-                        row["version"].ljust(col_widths["version"]),
-                        row["vendor"].ljust(col_widths["vendor"]),
-                        row["arch"].ljust(col_widths["arch"]),
-                        row["path"],
-                    ]
-                )
-
-            header_line = " | ".join(
-                [
-                    headers["idx"].rjust(col_widths["idx"]),
-                    headers["version"].ljust(col_widths["version"]),
-                    headers["vendor"].ljust(col_widths["vendor"]),
-                    headers["arch"].ljust(col_widths["arch"]),
-                    headers["path"],
-                ]
-            )
-            print(header_line)
-            print("-" * len(header_line))
-            for row in rows:
-                print(fmt(row))
+    rows = collect_java(paths)
+    if not rows:
+        print("未找到任何已存在的 Java 可执行文件。")
     else:
-        print(f"不支持的操作系统: {info['os']}")
+        print("发现：")
+        _print_rows(rows)
+    return rows
 
 # This is the biggest module in the project. Java and Windows Registry: HUGE SHIT.
 
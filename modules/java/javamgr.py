@@ -53,7 +53,8 @@ def manage_java():
         return
     print("当前已记录的 Java 版本：")
     for idx, entry in enumerate(java_list, 1):
-        print(f"{idx}. {entry.get('name','unknown')} @ {entry.get('path','')}")
+        version = f" ({entry['version']})" if entry.get("version") else ""
+        print(f"{idx}. {entry.get('name','unknown')}{version} @ {entry.get('path','')}")
 
 
 def download_java():
@@ -62,7 +63,30 @@ def download_java():
     print("1) 选择版本 -> 2) 选择发行版(Adoptium/Azul/OpenJDK/GraalVM...) -> TODO")
 
 
+def merge_detected(rows, java_list=None):
+    """
+    将 javafinder 的探测结果并入 java_list.json 的条目：按路径去重，
+    丢弃已不存在的路径，保留手动添加条目中的其他字段。
+    """
+    from modules.java import javaselector
+
+    entries = {entry.get("path"): entry for entry in (java_list if java_list is not None else load_java_list())}
+    for row in rows:
+        if row.get("version") in (None, "Unknown"):
+            continue
+        entry = entries.setdefault(row["path"], {})
+        entry.update(
+            name=row.get("vendor") or entry.get("name") or "unknown",
+            path=row["path"],
+            version=row["version"],
+            major=javaselector.java_major(row["version"]),
+            arch=row.get("arch"),
+        )
+    return [entry for path, entry in entries.items() if path and Path(path).exists()]
+
+
 def detect_java():
-    """Placeholder: auto-detect Java and list."""
-    javafinder.find_java()
+    """自动检测 Java，并记录到 java_list.json 供启动时选择"""
+    rows = javafinder.find_java()
+    save_java_list(merge_detected(rows))
     manage_java()
@@ -0,0 +1,185 @@
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+"""
+按服务器选择 Java 运行时。
+1.注册表中的 java_path 是手动覆盖项，存在时直接使用。
+2.否则由 Minecraft 版本推算所需的 Java 主版本（≤1.16 为 8，1.17–1.20.4 为 17，1.20.5 起为 21，26.1 起为 25），
+  并与核心 class 文件版本（注册表 java_major，见 classversion）取较高者，
+  在 java_list.json 记录的运行时中选择：主版本正好相同的优先，其次是更高版本中最低的那个。
+3.java_list.json 为空时自动检测一次并保存；仍然找不到时退回 PATH 中的 java。
+"""
+
+# (Minecraft 版本下限, 所需 Java 主版本)，从新到旧排列
+JAVA_REQUIREMENTS: List[Tuple[Tuple[int, ...], int]] = [
+    ((26, 1), 25),
+    ((1, 20, 5), 21),
+    ((1, 17), 17),
+    ((0,), 8),
+]
+
+# 旧版 Forge 系服务端依赖 Java 8 的类加载器，更高版本的 Java 无法启动
+LEGACY_FORGE_TYPES = ("Forge", "Mohist")
+LEGACY_FORGE_MAX = (1, 16, 5)
+
+
+def java_major(version: Optional[str]) -> Optional[int]:
+    """"1.8.0_392" -> 8，"17.0.9" -> 17，"21" -> 21"""
+    if not version:
+        return None
+    match = re.match(r"(\d+)(?:\.(\d+))?", version)
+    if not match:
+        return None
+    major = int(match.group(1))
+    if major == 1 and match.group(2):
+        return int(match.group(2))
+    return major
+
+
+def _mc_version_key(mc_version: str) -> Optional[Tuple[int, ...]]:
+    match = re.match(r"(\d+)\.(\d+)(?:\.(\d+))?", mc_version or "")
+    if not match:
+        return None
+    return tuple(int(part) for part in match.groups() if part is not None)
+
+
+def required_java(mc_version: Optional[str]) -> Optional[int]:
+    """Minecraft 版本所需的最低 Java 主版本；版本未知时返回 None"""
+    key = _mc_version_key(mc_version)
+    if key is None:
+        return None
+    for floor, major in JAVA_REQUIREMENTS:
+        if key >= floor:
+            return major
+    return None
+
+
+def required_major(server: dict) -> Optional[int]:
+    """
+    服务器所需的最低 Java 主版本：Minecraft 版本的要求与核心 class 文件版本（java_major）取较高者，
+    这样首次启动前、甚至 Minecraft 版本未知时也能选对 Java
+    """
+    candidates = [required_java(server.get("minecraft_version")), server.get("java_major")]
+    candidates = [major for major in candidates if major]
+    return max(candidates) if candidates else None
+
+
+def max_java(server: dict) -> Optional[int]:
+    """服务器能使用的最高 Java 主版本（仅旧版 Forge 系有上限）"""
+    key = _mc_version_key(server.get("minecraft_version"))
+    if key is not None and key <= LEGACY_FORGE_MAX and server.get("server_type") in LEGACY_FORGE_TYPES:
+        return 8
+    return None
+
+
+_auto_detected = False
+
+
+def registered_runtimes() -> List[Dict]:
+    """java_list.json 中可用的运行时；列表为空时（每个进程最多）自动检测一次并保存"""
+    global _auto_detected
+    from modules.java import javamgr
+
+    runtimes = javamgr.load_java_list()
+    if not runtimes and not _auto_detected:
+        _auto_detected = True
+        from modules.java import javafinder
+
+        runtimes = javamgr.merge_detected(javafinder.collect_java(), [])
+        if runtimes:
+            javamgr.save_java_list(runtimes)
+    result = []
+    for entry in runtimes:
+        path = entry.get("path")
+        major = entry.get("major") or java_major(entry.get("version"))
+        if path and major and Path(path).exists():
+            result.append(dict(entry, major=major))
+    return result
+
+
+def pick_runtime(runtimes: List[Dict], required: Optional[int], maximum: Optional[int] = None) -> Optional[Dict]:
+    """主版本正好满足的优先，其次选择满足要求的最低版本；不限要求时选择最新版本"""
+    candidates = [r for r in runtimes if maximum is None or r["major"] <= maximum]
+    if required is None:
+        return max(candidates, key=lambda r: r["major"], default=None)
+    exact = [r for r in candidates if r["major"] == required]
+    if exact:
+        return exact[0]
+    newer = [r for r in candidates if r["major"] > required]
+    return min(newer, key=lambda r: r["major"], default=None)
+
+
+def select_java(server: Optional[dict]) -> Dict[str, Optional[object]]:
+    """
+    为服务器选择 Java
+    :return: {"path", "major", "required", "reason"}；path 总是可以直接执行的命令
+    """
+    server = server or {}
+    override = server.get("java_path")
+    if override:
+        if Path(override).exists() or shutil.which(override):
+            return {"path": override, "major": None, "required": None, "reason": "手动指定"}
+        print(f"⚠️ 手动指定的 Java 不存在: {override}，改为自动选择")
+
+    required = required_major(server)
+    runtime = pick_runtime(registered_runtimes(), required, max_java(server))
+    if runtime is not None:
+        reason = "自动选择" if required else "版本未知，使用最新的 Java"
+        return {"path": runtime["path"], "major": runtime["major"], "required": required, "reason": reason}
+    return {"path": "java", "major": None, "required": required, "reason": "未找到匹配的 Java，使用 PATH 中的 java"}
+
+
+def runtime_major(java_path: str) -> Optional[int]:
+    """java_list.json 中记录的主版本，未记录时运行一次 java -XshowSettings 探测"""
+    for runtime in registered_runtimes():
+        if runtime["path"] == java_path:
+            return runtime["major"]
+    from modules.java import javainvestigator
+    return java_major(javainvestigator.probe_show_settings(java_path).get("version"))
+
+
+def java_command(server: Optional[dict]) -> str:
+    return str(select_java(server)["path"])
+
+
+def set_override(server_name: str, java_path: Optional[str]) -> bool:
+    """设置（或以 None 清除）服务器的 Java 覆盖项"""
+    from modules import Registry
+
+    if java_path and not (Path(java_path).exists() or shutil.which(java_path)):
+        raise ValueError(f"Java 不存在: {java_path}")
+    return Registry.update_server(server_name, java_path=java_path or None)
+
+
+def configure_menu(server_name: str) -> None:
+    """交互式查看与设置服务器使用的 Java"""
+    from modules import Registry
+
+    server = Registry.get_server(server_name)
+    if server is None:
+        print(f"❌ 找不到名为 '{server_name}' 的服务器！")
+        return
+    selected = select_java(server)
+    print(f"当前 Java: {selected['path']}（{selected['reason']}）")
+    runtimes = registered_runtimes()
+    for index, runtime in enumerate(runtimes, 1):
+        print(f"{index}. Java {runtime['major']:<3} {runtime.get('name', '')} @ {runtime['path']}")
+    print("0. 自动选择")
+    choice = input("选择 Java（回车保持不变）: ").strip()
+    if not choice:
+        return
+    if choice == "0":
+        set_override(server_name, None)
+    elif choice.isdigit() and 1 <= int(choice) <= len(runtimes):
+        set_override(server_name, runtimes[int(choice) - 1]["path"])
+    else:
+        print("无效输入。")
+        return
+    print(f"✅ 已更新: {java_command(Registry.get_server(server_name))}")
+
+
+if __name__ == "__main__":
+    for version in ("1.12.2", "1.16.5", "1.17.1", "1.20.4", "1.20.6", "1.21.4", "26.1"):
+        print(version, required_java(version))